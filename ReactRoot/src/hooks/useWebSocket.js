@@ -3,11 +3,27 @@ import { supabase } from '../lib/supabase'
 
 const CLOUD_WS_URL = import.meta.env.VITE_CLOUD_WS_URL || 'wss://your-relay-server.railway.app'
 
+// One-shot annotations (rate, sim, landing, maneuver) belong to the sample
+// they arrive on and are not carried into the next merged sample
+const SAMPLE_EVENTS = ['rate', 'sim', 'landing', 'maneuver']
+
+const withoutEvents = (sample) => {
+  const state = { ...sample }
+  SAMPLE_EVENTS.forEach(key => delete state[key])
+  return state
+}
+
+// Delta frames only carry changed fields - merge them onto the previous state
+const applySample = (prev, sample) => (sample.frame === 'delta' ? { ...withoutEvents(prev), ...sample } : sample)
+
 export function useWebSocket(userId) {
   const [connected, setConnected] = useState(false)
   const [data, setData] = useState(null)
+  const [samples, setSamples] = useState([])
+  const [backfill, setBackfill] = useState([])
   const [sessionId, setSessionId] = useState(null)
   const wsRef = useRef(null)
+  const dataRef = useRef(null)
   const reconnectTimeoutRef = useRef(null)
 
   // Get session ID from Supabase
@@ -76,6 +92,7 @@ export function useWebSocket(userId) {
             if (message.type === 'connected') {
               console.log('Session confirmed:', message.sessionId, 'Has bridge:', message.hasBridge)
               if (message.lastData) {
+                dataRef.current = message.lastData
                 setData(message.lastData)
               }
               return
@@ -87,8 +104,24 @@ export function useWebSocket(userId) {
               return
             }
 
-            // Handle telemetry data (skip logging for performance)
-            setData(message)
+            // Samples the bridge recorded while offline - merge by seq, not current state
+            if (message.type === 'backfill') {
+              setBackfill(message.samples)
+              return
+            }
+
+            // Handle telemetry data (skip logging for performance).
+            // Batches carry several samples; data is the newest, samples has them all.
+            const incoming = message.type === 'batch' ? message.samples : [message]
+            const merged = []
+            let state = dataRef.current
+            for (const sample of incoming) {
+              state = applySample(state, sample)
+              merged.push(state)
+            }
+            dataRef.current = state
+            setSamples(merged)
+            setData(state)
           } catch (error) {
             console.error('Error parsing WebSocket message:', error)
           }
@@ -127,7 +160,7 @@ export function useWebSocket(userId) {
     }
   }, [userId, sessionId])
 
-  return { connected, data }
+  return { connected, data, samples, backfill }
 }
 
 
@@ -0,0 +1,132 @@
+"""
+Adaptive sample rate
+Picks the sampling rate from the flight state instead of a fixed HZ: the
+ceiling rate in critical phases (flare, steep turns and their rollout, fast
+pitch changes, large vertical speeds, takeoff and landing rolls), the floor
+rate while parked or in stable cruise, and the base rate otherwise.
+
+Works on the raw SimVar values read by the sampler thread, so angles are
+radians and signs follow SimConnect; only magnitudes are compared.
+"""
+
+import math
+
+FLOOR_HZ = 2
+CEILING_HZ = 30
+
+# A lower rate must be called for this long before it is used, so a
+# momentary lull in a maneuver doesn't drop samples in the middle of it.
+# Raising the rate is immediate.
+SETTLE_SECONDS = 3.0
+
+# Critical phase: any of these selects the ceiling rate
+CRITICAL_AGL_FT = 200.0  # short final and flare
+CRITICAL_BANK_DEG = 30.0  # steep turns
+CRITICAL_ROLL_RATE = 5.0  # deg/s, roll-in and rollout
+CRITICAL_PITCH_RATE = 3.0  # deg/s, flare, stalls, pitch captures
+CRITICAL_VS_FPM = 1500.0
+GROUND_ROLL_KT = 30.0  # on the ground faster than this
+
+# Stable: all of these select the floor rate
+STABLE_BANK_DEG = 5.0
+STABLE_RATE = 1.0  # deg/s on every axis
+STABLE_VS_FPM = 200.0
+PARKED_KT = 1.0
+
+def magnitude(values, name, degrees=False):
+    """Absolute value of a SimVar, or None if it wasn't read"""
+    value = values.get(name)
+    if value is None:
+        return None
+    try:
+        value = abs(float(value))
+    except (TypeError, ValueError):
+        return None
+    return math.degrees(value) if degrees else value
+
+def above(value, limit):
+    return value is not None and value >= limit
+
+def below(value, limit):
+    return value is not None and value < limit
+
+class RateController:
+    """
+    Chooses between floor_hz, hz and ceiling_hz from each sample.
+
+    update() is called by the sampler thread with every sample's values and
+    returns {"hz", "from", "reason"} when the rate changes (None otherwise);
+    the sampler retimes itself and the change goes out in that sample's
+    payload as "rate".
+    """
+
+    def __init__(self, hz, floor_hz=FLOOR_HZ, ceiling_hz=CEILING_HZ, settle=SETTLE_SECONDS):
+        if not 0 < floor_hz <= ceiling_hz:
+            raise ValueError("adaptive rate needs 0 < floor_hz <= ceiling_hz")
+        self.floor_hz = floor_hz
+        self.ceiling_hz = ceiling_hz
+        self.base_hz = min(max(hz, floor_hz), ceiling_hz)
+        self.settle = settle
+        self.hz = self.base_hz
+        self.reason = "start"
+        self.transitions = 0
+        self._pending = None  # (hz, since) of a lower rate waiting to settle
+
+    def classify(self, values):
+        """(hz, reason) the flight state calls for"""
+        on_ground = values.get("SIM_ON_GROUND")
+        on_ground = bool(on_ground) if on_ground is not None else None
+        ias = magnitude(values, "AIRSPEED_INDICATED")
+
+        if on_ground:
+            if above(ias, GROUND_ROLL_KT):
+                return self.ceiling_hz, "ground_roll"
+            if below(ias, PARKED_KT):
+                return self.floor_hz, "parked"
+            return self.base_hz, "taxi"
+
+        agl = values.get("PLANE_ALT_ABOVE_GROUND")
+        bank = magnitude(values, "PLANE_BANK_DEGREES", degrees=True)
+        roll_rate = magnitude(values, "ROTATION_VELOCITY_BODY_Z", degrees=True)
+        pitch_rate = magnitude(values, "ROTATION_VELOCITY_BODY_X", degrees=True)
+        yaw_rate = magnitude(values, "ROTATION_VELOCITY_BODY_Y", degrees=True)
+        vs = magnitude(values, "VERTICAL_SPEED")
+
+        if on_ground is False and agl is not None and agl < CRITICAL_AGL_FT:
+            return self.ceiling_hz, "low_agl"
+        if above(bank, CRITICAL_BANK_DEG):
+            return self.ceiling_hz, "bank"
+        if above(roll_rate, CRITICAL_ROLL_RATE):
+            return self.ceiling_hz, "roll_rate"
+        if above(pitch_rate, CRITICAL_PITCH_RATE):
+            return self.ceiling_hz, "pitch_rate"
+        if above(vs, CRITICAL_VS_FPM):
+            return self.ceiling_hz, "vertical_speed"
+
+        if (on_ground is False and below(bank, STABLE_BANK_DEG) and below(vs, STABLE_VS_FPM)
+                and all(below(rate, STABLE_RATE) for rate in (roll_rate, pitch_rate, yaw_rate))):
+            return self.floor_hz, "stable"
+        return self.base_hz, "maneuvering"
+
+    def update(self, values, now):
+        """Feed one sample; returns the rate change to apply, if any"""
+        hz, reason = self.classify(values)
+        if hz == self.hz:
+            self._pending = None
+            self.reason = reason
+            return None
+        if hz < self.hz:
+            if self._pending is None or self._pending[0] != hz:
+                self._pending = (hz, now)
+            if now - self._pending[1] < self.settle:
+                return None
+
+        change = {"hz": hz, "from": self.hz, "reason": reason}
+        self.hz = hz
+        self.reason = reason
+        self.transitions += 1
+        self._pending = None
+        return change
+
+    def summary(self):
+        return f"rate {self.hz:g} Hz ({self.reason}), {self.transitions} changes"
@@ -0,0 +1,338 @@
+"""
+Bridge benchmark
+Runs the bridge against the fake SimConnect model, a local stand-in for the
+cloud relay and N simulated dashboard clients, each in its own process, and
+prints machine-readable JSON results:
+
+    python bench_bridge.py --clients 1,10,100,500 --duration 10 > bench_output.json
+    python bench_bridge.py --path lan --wire binary --clients 1,50
+
+Per client count it reports sample-to-receive latency percentiles (from the
+sample's capture ts to the client receiving it, so everything must run on
+one machine), achieved sample rate at the bridge and at the clients, bytes
+per sample on the client link, CPU use of the bridge, relay and client
+processes over the measurement window, and the bridge's per-stage timings.
+
+The relay stand-in does what cloud-relay-server.js does per message: parse
+JSON, decode binary frames for JSON clients, and send to every client of
+the session without waiting on any of them.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+import websockets
+
+from bridge_core import BridgeCore
+from bridge_sinks import CloudSink, LocalServerSink
+from pipeline_metrics import METRICS
+from telemetry_codec import decode_binary
+from tick_scheduler import percentile
+
+RELAY_PORT = 8790
+LAN_PORT = 8791
+SESSION_ID = "bench"
+CLIENT_COUNTS = (1, 10, 50, 100, 250, 500)
+WARMUP = 3.0  # seconds for connections and encoders to settle before measuring
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5, check=True).stdout.strip()
+    except Exception:
+        return None
+
+async def sleep_until(deadline):
+    await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+
+class CpuWindow:
+    """Process CPU time between the window start and end (monotonic deadlines)"""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.cpu = None
+
+    async def measure(self):
+        await sleep_until(self.start)
+        cpu = time.process_time()
+        await sleep_until(self.end)
+        self.cpu = time.process_time() - cpu
+
+    def percent(self):
+        return 100.0 * self.cpu / (self.end - self.start) if self.cpu is not None else None
+
+# Relay stand-in
+
+def run_relay(port, start, end, results):
+    asyncio.run(relay_main(port, start, end, results))
+
+async def relay_main(port, start, end, results):
+    clients = set()
+    stats = {"messages_in": 0, "bytes_in": 0, "messages_out": 0}
+    schema = {}
+    window = CpuWindow(start, end)
+
+    def send_all(message):
+        stats["messages_out"] += len(clients)
+        websockets.broadcast(clients, message)
+
+    async def handler(ws):
+        request = getattr(ws, "request", None)
+        path = request.path if request is not None else ws.path
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(path).query))
+        await ws.send(json.dumps({"type": "connected", "sessionId": query.get("sessionId")}))
+        if query.get("role") != "bridge":
+            clients.add(ws)
+            try:
+                await ws.wait_closed()
+            finally:
+                clients.discard(ws)
+            return
+
+        try:
+            async for data in ws:
+                measuring = start <= time.monotonic() < end
+                if measuring:
+                    stats["messages_in"] += 1
+                    stats["bytes_in"] += len(data)
+                if isinstance(data, bytes):
+                    if not schema:
+                        continue
+                    size = schema["size"]
+                    records = [decode_binary(schema, data[i:i + size]) for i in range(0, len(data), size)]
+                    payload = records[0] if len(records) == 1 else {"type": "batch", "samples": records}
+                    send_all(json.dumps(payload))
+                    continue
+                payload = json.loads(data)
+                if payload.get("type") == "schema":
+                    schema.update(payload)
+                    continue
+                send_all(data)
+        except websockets.exceptions.ConnectionClosed:
+            pass  # the bridge going away at the end of the run
+
+    async with websockets.serve(handler, "127.0.0.1", port):
+        await window.measure()
+    results.put(("relay", {**stats, "cpu_percent": window.percent()}))
+
+# Bridge
+
+def run_bridge(args, url, start, end, results):
+    sys.stdout = sys.stderr  # bridge status lines must not mix with the JSON report
+    os.chdir(tempfile.mkdtemp(prefix="bench-bridge-"))  # keep the spool out of the repo
+    asyncio.run(bridge_main(args, url, start, end, results))
+
+async def bridge_main(args, url, start, end, results):
+    core = BridgeCore(args.hz, stats_every=3600, fake_sim=args.fake_sim)
+    core.connect()
+    if args.path == "lan":
+        sink = LocalServerSink(args.send_hz, args.hz, "127.0.0.1", LAN_PORT)
+    else:
+        sink = CloudSink(url, args.send_hz, args.wire, delta=args.delta,
+                         batch=args.send_hz < args.hz, reconnect_delay=0.5)
+
+    window = CpuWindow(start, end)
+    bridge = asyncio.create_task(core.run([sink]))
+    await sleep_until(start)
+    seq_start = core.sampler_thread.seq
+    await window.measure()
+    seq_end = core.sampler_thread.seq
+    bridge.cancel()
+
+    stats = core.sampler_thread.scheduler.stats()
+    results.put(("bridge", {
+        "sample_hz": (seq_end - seq_start) / (end - start),
+        "jitter_p50_ms": stats["jitter_p50_ms"],
+        "jitter_p99_ms": stats["jitter_p99_ms"],
+        "skipped_ticks": stats["skipped"],
+        "cpu_percent": window.percent(),
+        "stages": METRICS.snapshot()["stages"],
+    }))
+
+# Clients
+
+def run_clients(url, count, start, end, results):
+    asyncio.run(clients_main(url, count, start, end, results))
+
+def samples_in(message, schema):
+    """Capture timestamps of the samples in one received message"""
+    if isinstance(message, bytes):
+        if not schema:
+            return []
+        size = schema["size"]
+        return [decode_binary(schema, message[i:i + size])["ts"] for i in range(0, len(message), size)]
+    payload = json.loads(message)
+    kind = payload.get("type")
+    if kind == "schema":
+        schema.update(payload)
+        return []
+    if kind == "batch":
+        return [s.get("ts") for s in payload["samples"]]
+    if kind == "backfill":
+        return []  # not live; latency would be the outage length
+    return [payload["ts"]] if "ts" in payload else []
+
+async def bench_client(url, start, end, totals, latencies):
+    schema = {}
+    async with websockets.connect(url, max_queue=None) as ws:
+        totals["connected"] += 1
+        samples = 0
+        while True:
+            try:
+                message = await asyncio.wait_for(ws.recv(), end - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+            now = time.monotonic()
+            for ts in samples_in(message, schema):
+                if now >= start and ts is not None:
+                    latencies.append(now - ts)
+                    samples += 1
+            if now >= start:
+                totals["bytes"] += len(message)
+                totals["messages"] += 1
+        totals["per_client_samples"].append(samples)
+
+async def clients_main(url, count, start, end, results):
+    totals = {"connected": 0, "bytes": 0, "messages": 0, "per_client_samples": []}
+    latencies = []
+    window = CpuWindow(start, end)
+    tasks = [asyncio.create_task(bench_client(url, start, end, totals, latencies)) for _ in range(count)]
+    await window.measure()
+    await asyncio.wait(tasks, timeout=5)
+    errors = sum(1 for t in tasks if t.done() and not t.cancelled() and t.exception())
+    for task in tasks:
+        task.cancel()
+    results.put(("clients", {**totals, "errors": errors, "latencies": latencies,
+                             "cpu_seconds": window.cpu}))
+
+# Runs
+
+def summarize_clients(parts, duration):
+    latencies = sorted(l for p in parts for l in p["latencies"])
+    per_client = [n for p in parts for n in p["per_client_samples"]]
+    samples = sum(per_client)
+    total_bytes = sum(p["bytes"] for p in parts)
+
+    def ms(fraction):
+        value = percentile(latencies, fraction)
+        return value * 1000.0 if value is not None else None
+
+    return {
+        "connected": sum(p["connected"] for p in parts),
+        "errors": sum(p["errors"] for p in parts),
+        "latency_ms": {"p50": ms(0.50), "p90": ms(0.90), "p99": ms(0.99),
+                       "max": latencies[-1] * 1000.0 if latencies else None},
+        "sample_hz": {
+            "mean": samples / len(per_client) / duration if per_client else None,
+            "min": min(per_client) / duration if per_client else None,
+        },
+        "bytes_per_sample": total_bytes / samples if samples else None,
+        "messages_per_s": sum(p["messages"] for p in parts) / duration,
+        "cpu_percent": 100.0 * sum(p["cpu_seconds"] for p in parts) / duration,
+    }
+
+def bench_run(args, clients):
+    """Start relay, bridge and clients for one client count; returns the run's results"""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    setup = 2.0 + clients / 200.0  # time to start processes and connect
+    start = time.monotonic() + setup + WARMUP
+    end = start + args.duration
+
+    relay_url = f"ws://127.0.0.1:{RELAY_PORT}"
+    bridge_url = f"{relay_url}/?role=bridge&sessionId={SESSION_ID}"
+    if args.path == "lan":
+        client_url = f"ws://127.0.0.1:{LAN_PORT}/?" + ("format=bin" if args.wire == "binary" else "")
+        if args.delta:
+            client_url += "&delta=1"
+        if args.send_hz < args.hz:
+            client_url += "&batch=1"
+    else:
+        client_url = f"{relay_url}/?role=client&sessionId={SESSION_ID}"
+
+    procs = []
+    if args.path == "relay":
+        procs.append(ctx.Process(target=run_relay, args=(RELAY_PORT, start, end, results)))
+    procs.append(ctx.Process(target=run_bridge, args=(args, bridge_url, start, end, results)))
+    workers = max(1, min(args.client_procs, clients))
+    for i in range(workers):
+        count = clients // workers + (1 if i < clients % workers else 0)
+        procs.append(ctx.Process(target=run_clients, args=(client_url, count, start, end, results)))
+
+    procs[0].start()
+    time.sleep(1.0)  # let the relay (or the LAN bridge) listen before anyone connects
+    for proc in procs[1:]:
+        proc.start()
+
+    parts = {"relay": [], "bridge": [], "clients": []}
+    deadline = end + 15
+    while sum(len(v) for v in parts.values()) < len(procs) and time.monotonic() < deadline:
+        try:
+            name, data = results.get(timeout=1)
+        except Exception:
+            continue
+        parts[name].append(data)
+    for proc in procs:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+
+    run = {"clients": clients, "duration_s": args.duration}
+    run["bridge"] = parts["bridge"][0] if parts["bridge"] else None
+    if args.path == "relay":
+        run["relay"] = parts["relay"][0] if parts["relay"] else None
+    run["client_stats"] = summarize_clients(parts["clients"], args.duration) if parts["clients"] else None
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bridge -> relay -> client latency and throughput")
+    parser.add_argument("--clients", default=",".join(map(str, CLIENT_COUNTS)),
+                        help="comma-separated client counts to run")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per run")
+    parser.add_argument("--path", choices=("relay", "lan"), default="relay",
+                        help="bridge -> relay -> clients, or clients on the LAN server")
+    parser.add_argument("--hz", type=int, default=30, help="sampling rate")
+    parser.add_argument("--send-hz", type=int, default=30, help="bridge send rate (below --hz batches)")
+    parser.add_argument("--wire", choices=("json", "binary"), default="json")
+    parser.add_argument("--delta", action="store_true", help="delta frames")
+    parser.add_argument("--fake-sim", default="steep_turns", help="fake SimConnect scenario spec")
+    parser.add_argument("--client-procs", type=int, default=min(4, os.cpu_count() or 1),
+                        help="processes to spread clients over")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    runs = []
+    for clients in (int(c) for c in args.clients.split(",")):
+        print(f"Benchmarking {clients} clients...", file=sys.stderr)
+        runs.append(bench_run(args, clients))
+
+    report = {
+        "benchmark": "bridge",
+        "version": 1,
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("clients", "output")},
+        "runs": runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Bridge checks
+Small behaviour checks for the bridge's streaming pieces, run without a sim,
+node or a network:
+
+    python bridge_checks.py
+
+Each check_* function raises AssertionError on failure. The JavaScript
+parity checks live in js_parity.py, the fake approach check in
+fake_simconnect.py.
+"""
+
+import sys
+
+from bust_filter import MIN_SAMPLES, BustFilter
+from landing_phase import LandingPhaseDetector
+
+def check_noisy_first_sample():
+    """One bad first sample neither busts a rule live nor flickers isBusted"""
+    busting = BustFilter(["alt"])
+    events = busting.update({"alt": True})
+    seen = [busting.result()["alt"]["isBusted"]]
+    for _ in range(2 * MIN_SAMPLES):
+        events += busting.update({"alt": False})
+        seen.append(busting.result()["alt"]["isBusted"])
+    assert events == [], events
+    assert not any(seen), seen
+    assert not busting.result(final=True)["alt"]["isBusted"]
+
+def check_bust_sticks():
+    """A live bust is reported once and stays busted after good samples"""
+    busting = BustFilter(["alt", "spd"])
+    events = []
+    for bad in [True] * 4 + [False] * 100:
+        events += busting.update({"alt": bad, "spd": False})
+    assert events == ["alt"], events
+    assert busting.result()["alt"]["isBusted"]
+    assert busting.busted() == {"alt": True, "spd": False}
+
+def check_zero_length_runway():
+    """A runway whose ends coincide gets an error reply, not a ZeroDivisionError"""
+    detector = LandingPhaseDetector("27")
+    reply = detector.control({"type": "landing", "runway": "30.6,-87.6,30.6,-87.6"})
+    assert reply["type"] == "error", reply
+
+def check_rejected_runway_keeps_previous():
+    """A rejected runway request leaves the previous runway detecting phases"""
+    detector = LandingPhaseDetector("27")
+    for runway in ("not,a,runway", {"threshold": {}}, "auto"):
+        reply = detector.control({"type": "landing", "runway": runway})
+        assert reply["type"] == "error", reply
+    reply = detector.control({"type": "landing"})
+    assert reply["runway"]["name"] == "KJKA 27" and reply["auto"] is False, reply
+    # On final for 27: 2 NM east-southeast of the threshold, heading 294
+    result = detector.process({"lat": 30.2834, "lon": -87.6545, "alt_ft": 700.0, "hdg_true": 294.0})
+    assert result["landing"]["phase"] == "final", result
+
+CHECKS = [check_noisy_first_sample, check_bust_sticks, check_zero_length_runway,
+          check_rejected_runway_keeps_previous]
+
+def main():
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {check.__name__}: {e}")
+        else:
+            print(f"✅ {check.__name__}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Bridge core
+One SimConnect sampler feeding any number of sinks (LAN server, cloud relay,
+recorder) in one process, so running several outputs never means polling
+the sim twice.
+"""
+
+import asyncio
+import os
+
+from adaptive_rate import RateController
+from landing_phase import LandingPhaseDetector
+from maneuver_engine import ManeuverEngine
+from runway_index import load_runways
+from pipeline_metrics import METRICS, METRICS_HOST, serve_metrics
+from sim_sampler import SampleRing, SamplerThread, SimStateWatcher, SimVarBatch, sample_payloads
+from tick_scheduler import TickScheduler
+
+SINK_CAPACITY = 1024  # payloads buffered per sink before the oldest are dropped
+
+class Sink:
+    """
+    A consumer of sample payloads running at its own rate.
+
+    The core offers every payload to every sink; each sink buffers them in
+    its own bounded inbox (dropping the oldest when full) and drains it from
+    its own task in run(), so a slow sink never holds up the sampler or the
+    other sinks. Payloads are shared between sinks and must not be modified.
+    """
+
+    name = "sink"
+
+    def __init__(self, hz, capacity=SINK_CAPACITY):
+        self.hz = hz
+        self.inbox = SampleRing(capacity)
+
+    def offer(self, payloads):
+        for payload in payloads:
+            self.inbox.push(payload)
+
+    async def run(self):
+        raise NotImplementedError
+
+    def summary(self):
+        return f"{self.inbox.dropped} dropped"
+
+class BridgeCore:
+    """
+    Owns the SimConnect connection, the sampler thread and the sinks.
+
+    Processors see every payload once, before it is offered to the sinks.
+    Whatever process(payload) returns (a dict, or None) is merged into the
+    payload as events for every sink; control(request) gets LAN client
+    messages the processors may answer.
+    """
+
+    def __init__(self, hz, stats_every=60, fake_sim=None, timings=False, metrics_port=None,
+                 adaptive=None, runway=None, runways=None, maneuver=None, skill="acs"):
+        self.hz = hz
+        # (floor_hz, ceiling_hz): let the flight state pick the sampling
+        # rate between these instead of always sampling at hz
+        self.adaptive = adaptive
+        self.max_hz = adaptive[1] if adaptive else hz  # highest rate samples can arrive at
+        self.stats_every = stats_every
+        self.timings = timings  # add per-sample stage timings to payloads
+        self.metrics_port = metrics_port  # serve /metrics on 127.0.0.1 at this port
+        # Scenario spec for fake_simconnect instead of MSFS (see that module)
+        self.fake_sim = fake_sim or os.environ.get("MSFS_FAKE_SIM")
+        self.sampler_thread = None
+        self.sinks = []
+        # runway can also be picked by LAN clients, or "auto" from a runway database file
+        self.landing = LandingPhaseDetector(runway, load_runways(runways) if runways else None)
+        self.maneuvers = ManeuverEngine(maneuver, skill)  # likewise the maneuver and skill level
+        self.processors = [self.landing, self.maneuvers]
+
+    def connect(self):
+        """Connect to SimConnect and start sampling (raises ConnectionError without a sim)"""
+        if self.fake_sim:
+            import fake_simconnect
+            sm, aq = fake_simconnect.connect(self.fake_sim)
+            print(f"🧪 Using fake SimConnect: {self.fake_sim}")
+        else:
+            # Imported here so replays and tools run without the SimConnect package
+            from SimConnect import SimConnect, AircraftRequests
+            sm = SimConnect()
+            aq = AircraftRequests(sm, _time=0)
+        sampler = SimVarBatch(sm, aq)
+        sampler.start()
+        sim_state = SimStateWatcher(sm)
+        sim_state.start()
+        rate = RateController(self.hz, *self.adaptive) if self.adaptive else None
+        self.sampler_thread = SamplerThread(sampler, self.hz, rate=rate, sim_state=sim_state)
+        self.sampler_thread.start()
+
+        thread = self.sampler_thread
+        METRICS.counter("samples_total", lambda: thread.seq)
+        METRICS.counter("sampler_errors_total", lambda: thread.errors)
+        METRICS.counter("ring_dropped_total", lambda: thread.ring.dropped)
+        METRICS.counter("simvar_polls_total", lambda: sampler.polls)
+        METRICS.counter("sim_state_changes_total", lambda: sim_state.changes)
+        METRICS.counter("heartbeats_total", lambda: thread.heartbeats)
+        if rate is not None:
+            METRICS.counter("rate_changes_total", lambda: rate.transitions)
+
+    async def run(self, sinks):
+        """Fan samples out to the sinks until cancelled"""
+        self.sinks = list(sinks)
+        tasks = [self._pump(), *(sink.run() for sink in self.sinks)]
+        if self.metrics_port:
+            print(f"📈 Metrics on http://{METRICS_HOST}:{self.metrics_port}/metrics")
+            tasks.append(serve_metrics(self.metrics_port))
+        await asyncio.gather(*tasks)
+
+    def offer(self, payloads):
+        for processor in self.processors:
+            for payload in payloads:
+                events = processor.process(payload)
+                if events:
+                    payload.update(events)
+        for sink in self.sinks:
+            sink.offer(payloads)
+
+    def control(self, request):
+        """Answer a LAN client message, or None if no processor handles it"""
+        for processor in self.processors:
+            reply = processor.control(request)
+            if reply is not None:
+                return reply
+        return None
+
+    def summary(self):
+        return self.sampler_thread.summary()
+
+    def report(self, ticks):
+        if ticks.ticks and ticks.ticks % (self.max_hz * self.stats_every) == 0:
+            print(f"📊 {self.summary()}")
+            for processor in self.processors:
+                print(f"   {processor.name}: {processor.summary()}")
+            for sink in self.sinks:
+                print(f"   {sink.name}: {sink.summary()}")
+
+    async def _pump(self):
+        ticks = TickScheduler(self.max_hz)
+        ring = self.sampler_thread.ring
+        while True:
+            samples = ring.drain()
+            if samples:
+                self.offer(sample_payloads(samples, self.timings))
+            self.report(ticks)
+            await ticks.wait()
@@ -0,0 +1,302 @@
+"""
+Bridge sinks
+Outputs for the bridge core: the LAN websocket server, the cloud relay
+connection and a flight recorder. Any combination can run from one sampler.
+"""
+
+import asyncio
+import json
+import os
+import time
+import urllib.parse
+
+import websockets
+
+from bridge_core import Sink
+from client_queue import CLIENT_QUEUE_SIZE, ClientQueue
+from flight_recorder import FlightRecorder
+from pipeline_metrics import METRICS
+from telemetry_codec import BINARY_SUBPROTOCOL, SUBSCRIBABLE_FIELDS, StreamEncoder, backfill_message
+from telemetry_spool import BACKFILL_RATE, TelemetrySpool, spool_payloads
+from tick_scheduler import TickScheduler
+
+RECORD_DIR = "recordings"
+RECORD_HZ = 1  # recorder flushes per second
+RECORD_CAPACITY = 8192  # payloads the recorder can fall behind by
+
+def request_query(ws):
+    """Query parameters of the client's connection URL"""
+    request = getattr(ws, "request", None)  # websockets >= 13
+    path = request.path if request is not None else getattr(ws, "path", "")
+    return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(path).query))
+
+def select_subprotocol(first, second):
+    """Accept the binary subprotocol if offered, otherwise continue without one"""
+    # websockets >= 13 passes (connection, offered); the legacy server passes (offered, supported)
+    offered = first if isinstance(first, (list, tuple)) else second
+    return BINARY_SUBPROTOCOL if BINARY_SUBPROTOCOL in offered else None
+
+def parse_fields(value):
+    """Subscribed fields from "a,b" or ["a", "b"]; None for all of them"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    elif not isinstance(value, list):
+        raise ValueError(f"fields must be a list or a comma-separated string, not {type(value).__name__}")
+    fields = tuple(f for f in SUBSCRIBABLE_FIELDS if f in value)
+    return fields or None
+
+def encode_timed(encode, payloads, sink):
+    """Run an encoder, recording capture->serialize age and serialize time"""
+    now = time.monotonic()
+    for payload in payloads:
+        METRICS.observe("queue", now - payload["ts"], sink=sink)
+    start = time.perf_counter()
+    messages = encode(payloads)
+    METRICS.observe("serialize", time.perf_counter() - start, sink=sink)
+    return messages
+
+def parse_hz(value, sample_hz):
+    try:
+        hz = float(value)
+    except (TypeError, ValueError):
+        return None
+    return hz if 0 < hz < sample_hz else None  # at or above the sample rate is no limit
+
+class LocalServerSink(Sink):
+    """
+    LAN websocket server for the dashboard pages.
+
+    Clients pick their stream format from the connection URL:
+      binary: msfs-telemetry.bin.v2 subprotocol or ?format=bin
+      delta:  ?delta=1 (JSON keyframes + changed fields)
+      batch:  ?batch=1 (one message per send tick instead of per sample)
+      fields: ?fields=pitch_deg,bank_deg (default: all)
+      hz:     ?hz=2 (maximum samples per second, default: all)
+    and ?latest=1 to only ever be sent the newest frame. Each client has its
+    own ClientQueue, so one slow phone only drops its own frames. Messages
+    of any other type are passed to on_control (replay seek and speed,
+    landing runway, maneuver selection).
+    """
+
+    name = "local"
+
+    def __init__(self, hz, sample_hz, host="0.0.0.0", port=8765, on_control=None):
+        super().__init__(hz)
+        self.sample_hz = sample_hz
+        self.host = host
+        self.port = port
+        self.on_control = on_control
+        self.clients = {}  # ws -> (stream format, ClientQueue)
+        # One encoder per stream format (wire format, delta, batch, fields,
+        # max Hz), shared by every client with the same subscription
+        self.encoders = {}
+
+    def client_format(self, ws, query):
+        binary = ws.subprotocol == BINARY_SUBPROTOCOL or query.get("format") == "bin"
+        return (
+            "binary" if binary else "json",
+            query.get("delta") == "1",
+            query.get("batch") == "1",
+            parse_fields(query.get("fields")),
+            parse_hz(query.get("hz"), self.sample_hz),
+        )
+
+    def subscribe(self, ws, queue, fmt):
+        """Move a client into the group for `fmt` and queue what it needs first"""
+        if fmt not in self.encoders:
+            self.encoders[fmt] = StreamEncoder(*fmt)
+        for msg in self.encoders[fmt].start_messages():
+            queue.put(msg)
+        self.clients[ws] = (fmt, queue)
+
+    async def handler(self, ws):
+        query = request_query(ws)
+        fmt = self.client_format(ws, query)
+        queue = ClientQueue(ws, maxsize=1 if query.get("latest") == "1" else CLIENT_QUEUE_SIZE)
+        try:
+            await ws.send(json.dumps({"type": "hello", "msg": "connected"}))
+            queue.start()
+            self.subscribe(ws, queue, fmt)
+
+            # Clients can change fields and rate later:
+            # {"type": "subscribe", "fields": ["pitch_deg", "bank_deg"], "hz": 30}
+            async for message in ws:
+                try:
+                    request = json.loads(message)
+                except (TypeError, ValueError):
+                    continue
+                if not isinstance(request, dict):
+                    continue
+                if request.get("type") != "subscribe":
+                    if self.on_control is not None:
+                        reply = self.on_control(request)
+                        if reply is not None:
+                            queue.put(json.dumps(reply))
+                    continue
+                try:
+                    fields = parse_fields(request.get("fields"))
+                except ValueError as e:
+                    queue.put(json.dumps({"type": "error", "msg": f"Bad subscription: {e}"}))
+                    continue
+                fmt = fmt[:3] + (fields, parse_hz(request.get("hz"), self.sample_hz))
+                self.subscribe(ws, queue, fmt)
+                queue.put(json.dumps({
+                    "type": "subscribed",
+                    "fields": list(fmt[3] or SUBSCRIBABLE_FIELDS),
+                    "hz": fmt[4] or self.sample_hz,
+                }))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.clients.pop(ws, None)
+            await queue.close()
+
+    async def run(self):
+        async with websockets.serve(self.handler, self.host, self.port,
+                                    subprotocols=[BINARY_SUBPROTOCOL],
+                                    select_subprotocol=select_subprotocol):
+            ticks = TickScheduler(self.hz)
+            while True:
+                # Queue everything sampled since the last tick; each client's
+                # writer task sends at its own pace
+                payloads = self.inbox.drain()
+                if self.clients and payloads:
+                    self.send(payloads)
+                await ticks.wait()
+
+    def send(self, payloads):
+        formats = {fmt for fmt, _ in self.clients.values()}
+        messages = {fmt: encode_timed(self.encoders[fmt].encode, payloads, self.name) for fmt in formats}
+        for fmt, queue in list(self.clients.values()):
+            for msg in messages[fmt]:
+                if not queue.put(msg) and self.encoders[fmt].delta is not None:
+                    # A dropped delta leaves the client stale until the next keyframe
+                    self.encoders[fmt].delta.force_keyframe()
+
+    def summary(self):
+        clients = self.clients.values()
+        lagging = sum(1 for _, queue in clients if queue.lag)
+        dropped = sum(queue.dropped for _, queue in clients)
+        return f"Clients {len(self.clients)}, {lagging} lagging, {dropped} frames dropped"
+
+class CloudSink(Sink):
+    """
+    Connection to the cloud relay as the session's bridge.
+
+    Reconnects forever. While disconnected, samples go to a TelemetrySpool
+    on disk and are sent as backfill after the live stream once the link
+    is back, at most BACKFILL_RATE samples per second.
+    """
+
+    name = "cloud"
+
+    def __init__(self, url, hz, wire_format="json", delta=False, batch=False,
+                 reconnect_delay=5, ready_message=None):
+        super().__init__(hz)
+        self.url = url
+        self.stream = StreamEncoder(wire_format, delta=delta, batch=batch)
+        self.spool = TelemetrySpool()
+        self.backfill_per_tick = max(1, BACKFILL_RATE // hz)
+        self.reconnect_delay = reconnect_delay
+        self.ready_message = ready_message
+        self.connected = False
+
+    async def run(self):
+        ticks = TickScheduler(self.hz)
+        spool = self.spool
+        while True:
+            # Record to disk until the connection is (re)established
+            spooler = asyncio.create_task(spool_payloads(self.inbox, spool))
+            try:
+                async with websockets.connect(self.url) as ws:
+                    spooler.cancel()
+                    self.connected = True
+                    print("✅ Connected to cloud server")
+                    spool.append(self.inbox.drain())
+                    if spool.pending:
+                        print(f"📼 Backfilling {spool.pending} samples recorded while offline")
+                    ticks.reset()
+                    for msg in self.stream.start_messages():
+                        await ws.send(msg)
+
+                    # Wait for confirmation
+                    try:
+                        msg = await asyncio.wait_for(ws.recv(), timeout=2.0)
+                        data = json.loads(msg)
+                        if data.get('type') == 'connected':
+                            print(f"✅ Session confirmed: {data.get('sessionId')}")
+                            if self.ready_message:
+                                print(self.ready_message)
+                    except asyncio.TimeoutError:
+                        pass
+
+                    while True:
+                        # Send everything sampled since the last tick
+                        payloads = self.inbox.drain()
+                        if payloads:
+                            for msg in encode_timed(self.stream.encode, payloads, self.name):
+                                start = time.perf_counter()
+                                await ws.send(msg)
+                                METRICS.observe("send", time.perf_counter() - start, sink=self.name)
+
+                        # Then a capped slice of the offline backlog
+                        backfill = spool.read(self.backfill_per_tick)
+                        if backfill:
+                            await ws.send(backfill_message(backfill))
+                        await ticks.wait()
+
+            except websockets.exceptions.ConnectionClosed:
+                print(f"❌ Connection closed. Reconnecting in {self.reconnect_delay} seconds...")
+                await asyncio.sleep(self.reconnect_delay)
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                print(f"Reconnecting in {self.reconnect_delay} seconds...")
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                self.connected = False
+                spooler.cancel()
+
+    def summary(self):
+        state = "connected" if self.connected else "offline"
+        return f"{state}, {self.spool.pending} spooled, {self.spool.dropped + self.inbox.dropped} dropped"
+
+class RecorderSink(Sink):
+    """
+    Records every sample to a columnar flight recording, one file per run.
+
+    Samples are handed to the FlightRecorder RECORD_HZ times a second and
+    written a compressed chunk at a time. The recorder runs in a worker
+    thread, since a chunk's compression and downsampled tiers take tens of
+    milliseconds, and the inbox holds enough samples that a slow disk only
+    delays the recording, not the event loop or the other sinks.
+    """
+
+    name = "recorder"
+
+    def __init__(self, directory=RECORD_DIR, hz=RECORD_HZ, capacity=RECORD_CAPACITY):
+        super().__init__(hz, capacity)
+        self.directory = directory
+        self.recorder = None
+
+    async def run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, time.strftime("flight-%Y%m%d-%H%M%S.flight"))
+        print(f"⏺ Recording to {path}")
+        ticks = TickScheduler(self.hz)
+        self.recorder = FlightRecorder(path)
+        writing = None
+        try:
+            while True:
+                writing = asyncio.ensure_future(asyncio.to_thread(self.recorder.append, self.inbox.drain()))
+                await asyncio.shield(writing)
+                await ticks.wait()
+        finally:
+            if writing is not None:
+                await asyncio.wait([writing])  # cancelling doesn't stop an append already running
+            await asyncio.to_thread(self.recorder.close)
+
+    def summary(self):
+        recorded = self.recorder.samples if self.recorder is not None else 0
+        return f"{recorded} samples recorded, {self.inbox.dropped} dropped"
@@ -0,0 +1,110 @@
+"""
+Bust filter
+Streaming port of computePhaseBusting (ReactRoot/src/utils/bustFilter.js).
+The JavaScript rescans a phase's whole sample array on every call to get the
+fraction of bad samples and the longest run of them; here each rule keeps a
+bad count, the current run and the longest run, so a sample costs O(1)
+however long the phase gets.
+
+A rule is busted once at least MIN_PERCENT of its samples were bad or
+MIN_CONSECUTIVE bad samples came in a row, which stops one noisy sample from
+busting a maneuver.
+
+While streaming, the percentage only counts from MIN_SAMPLES samples on (one
+bad first sample is 100% bad), and a rule that became busted stays busted,
+so a live bust is reported once and never taken back. A result marked final
+adds computePhaseBusting's verdict over the whole phase.
+"""
+
+MIN_PERCENT = 0.2
+MIN_CONSECUTIVE = 4
+MIN_SAMPLES = 20  # samples before the percent rule can bust a rule live
+
+class PhaseBusting:
+    """Running computePhaseBusting for one rule"""
+
+    __slots__ = ("min_percent", "min_consecutive", "min_samples", "samples", "bad", "consecutive",
+                 "max_consecutive")
+
+    def __init__(self, min_percent=MIN_PERCENT, min_consecutive=MIN_CONSECUTIVE, min_samples=MIN_SAMPLES):
+        self.min_percent = min_percent
+        self.min_consecutive = min_consecutive
+        self.min_samples = min_samples
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self.bad = 0
+        self.consecutive = 0
+        self.max_consecutive = 0
+
+    def update(self, bad):
+        self.samples += 1
+        if bad:
+            self.bad += 1
+            self.consecutive += 1
+            if self.consecutive > self.max_consecutive:
+                self.max_consecutive = self.consecutive
+        else:
+            self.consecutive = 0
+
+    @property
+    def percent_bad(self):
+        return self.bad / self.samples if self.samples else 0.0
+
+    @property
+    def is_busted(self):
+        """computePhaseBusting's verdict on the samples so far"""
+        if not self.samples:
+            return False
+        return self.percent_bad >= self.min_percent or self.max_consecutive >= self.min_consecutive
+
+    @property
+    def is_busted_live(self):
+        """is_busted, with the percent rule waiting for min_samples samples"""
+        return self.max_consecutive >= self.min_consecutive or (
+            self.samples >= self.min_samples and self.percent_bad >= self.min_percent)
+
+    def result(self):
+        return {"isBusted": self.is_busted, "percentBad": self.percent_bad, "maxConsecutiveBad": self.max_consecutive}
+
+def compute_phase_busting(samples, is_bad, min_percent=MIN_PERCENT, min_consecutive=MIN_CONSECUTIVE):
+    """computePhaseBusting over a whole list of samples"""
+    busting = PhaseBusting(min_percent, min_consecutive)
+    for sample in samples or ():
+        busting.update(is_bad(sample))
+    return busting.result()
+
+class BustFilter:
+    """
+    One PhaseBusting per named rule. update() takes {rule: bad} for the
+    rules that apply to the sample (a rule left out doesn't count it) and
+    returns the rules that became busted on it, each only once.
+    """
+
+    def __init__(self, rules, min_percent=MIN_PERCENT, min_consecutive=MIN_CONSECUTIVE, min_samples=MIN_SAMPLES):
+        self.rules = {rule: PhaseBusting(min_percent, min_consecutive, min_samples) for rule in rules}
+        self.fired = set()
+
+    def reset(self):
+        for busting in self.rules.values():
+            busting.reset()
+        self.fired.clear()
+
+    def update(self, flags):
+        newly_busted = []
+        for rule, bad in flags.items():
+            busting = self.rules[rule]
+            busting.update(bad)
+            if rule not in self.fired and busting.is_busted_live:
+                self.fired.add(rule)
+                newly_busted.append(rule)
+        return newly_busted
+
+    def busted(self, final=False):
+        return {rule: rule in self.fired or (final and busting.is_busted) for rule, busting in self.rules.items()}
+
+    def result(self, final=False):
+        """Per rule result; isBusted sticks once busted live, and a final result adds the whole-phase verdict"""
+        busted = self.busted(final)
+        return {rule: {**busting.result(), "isBusted": busted[rule]} for rule, busting in self.rules.items()}
@@ -0,0 +1,84 @@
+"""
+Per-client outgoing queues for the websocket servers
+Each client gets a small bounded queue drained by its own writer task, so a
+slow phone on bad Wi-Fi only delays (and drops) its own frames.
+"""
+
+import asyncio
+import collections
+import time
+
+from pipeline_metrics import METRICS
+
+CLIENT_QUEUE_SIZE = 32  # messages; about 2 seconds at 15 Hz
+
+class ClientQueue:
+    """
+    Bounded outgoing message queue with a writer task for one client.
+
+    put() never waits. When the queue is full the oldest message is dropped
+    and counted; with maxsize=1 the client only ever gets the newest frame.
+    lag is the number of messages waiting, max_lag the worst seen.
+    """
+
+    def __init__(self, ws, maxsize=CLIENT_QUEUE_SIZE):
+        self.ws = ws
+        self.maxsize = maxsize
+        self.sent = 0
+        self.dropped = 0
+        self.max_lag = 0
+        self.closed = False
+        self._messages = collections.deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+        self._task = None
+
+    @property
+    def lag(self):
+        return len(self._messages)
+
+    def start(self):
+        self._task = asyncio.create_task(self._writer())
+
+    def put(self, msg):
+        """Queue a message; returns False if an older message was dropped for it"""
+        if self.closed:
+            return True
+        full = len(self._messages) >= self.maxsize
+        if full:
+            self.dropped += 1
+        self._messages.append(msg)
+        self.max_lag = max(self.max_lag, len(self._messages))
+        self._ready.set()
+        return not full
+
+    async def _writer(self):
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                while self._messages:
+                    start = time.perf_counter()
+                    await self.ws.send(self._messages.popleft())
+                    METRICS.observe("send", time.perf_counter() - start, sink="local")
+                    self.sent += 1
+        except Exception:
+            pass  # connection closed; the handler removes the client
+        finally:
+            self.closed = True
+
+    async def close(self):
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self):
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+        }
@@ -20,6 +20,66 @@ const sessions = new Map();
 // Store recent data per session (for reconnection)
 const sessionData = new Map();
 
+// Packed binary telemetry (see telemetry_codec.py). The bridge sends a JSON
+// schema message first; binary clients get frames as-is, others get JSON.
+const BINARY_SUBPROTOCOL = 'msfs-telemetry.bin.v2';
+const BINARY_TYPES = { I: ['getUint32', 4], f: ['getFloat32', 4], d: ['getFloat64', 8] };
+
+function decodeBinaryFrame(schema, buf) {
+  const view = new DataView(buf.buffer, buf.byteOffset, buf.byteLength);
+  let offset = 0;
+  const read = (type) => {
+    const [getter, size] = BINARY_TYPES[type];
+    const value = view[getter](offset, true);
+    offset += size;
+    return value;
+  };
+
+  const header = {};
+  schema.header.forEach(([name, type]) => { header[name] = read(type); });
+  const { nulls, ...payload } = header;
+  schema.fields.forEach(([name, type], i) => {
+    const value = read(type);
+    payload[name] = (nulls >>> i) & 1 ? null : value;
+  });
+  return payload;
+}
+
+// Split a binary message into records (batches are records back to back)
+function decodeBinaryMessage(schema, buf) {
+  const records = [];
+  for (let offset = 0; offset + schema.size <= buf.length; offset += schema.size) {
+    records.push(decodeBinaryFrame(schema, buf.subarray(offset, offset + schema.size)));
+  }
+  return records;
+}
+
+// One-shot annotations that belong to the sample they arrived on (telemetry_codec.SAMPLE_EVENTS)
+const SAMPLE_EVENTS = ['rate', 'sim', 'landing', 'maneuver'];
+
+function withoutEvents(sample) {
+  const state = { ...sample };
+  SAMPLE_EVENTS.forEach(key => delete state[key]);
+  return state;
+}
+
+// Fold a telemetry message (full frame, delta or batch) into the latest full
+// state. Events are left out so late joiners don't see them happen again.
+function mergeLastData(lastData, payload) {
+  if (payload.type === 'backfill') {
+    return lastData; // older samples from a bridge outage, not the current state
+  }
+  if (payload.type === 'batch') {
+    return payload.samples.reduce(mergeLastData, lastData);
+  }
+  if (payload.frame === 'delta') {
+    // Delta frames only carry changed fields; keep the merged state for late joiners
+    const { frame, ...fields } = payload;
+    return withoutEvents({ ...lastData, ...fields });
+  }
+  return withoutEvents(payload);
+}
+
 const server = http.createServer();
 const wss = new WebSocket.Server({ server });
 
@@ -28,6 +88,7 @@ wss.on('connection', (ws, req) => {
   const role = query.role; // 'bridge' or 'client'
   const sessionId = query.sessionId || 'default';
   const token = query.token; // Optional authentication token
+  const wantsBinary = query.format === 'bin' || ws.protocol === BINARY_SUBPROTOCOL;
 
   console.log(`[${new Date().toISOString()}] Connection: role=${role}, session=${sessionId}`);
 
@@ -36,7 +97,7 @@ wss.on('connection', (ws, req) => {
     handleBridgeConnection(ws, sessionId, token);
   } else {
     // This is a client (GitHub Pages) connecting
-    handleClientConnection(ws, sessionId, token);
+    handleClientConnection(ws, sessionId, token, wantsBinary);
   }
 });
 
@@ -52,6 +113,8 @@ function handleBridgeConnection(ws, sessionId, token) {
     sessions.set(sessionId, {
       bridge: null,
       clients: new Set(),
+      binaryClients: new Set(),
+      schema: null,
       lastData: null,
       createdAt: Date.now()
     });
@@ -59,21 +122,55 @@ function handleBridgeConnection(ws, sessionId, token) {
 
   const session = sessions.get(sessionId);
   session.bridge = ws;
+  session.schema = null;
 
   // Send any recent data to the bridge (acknowledgment)
   ws.send(JSON.stringify({ type: 'connected', sessionId }));
 
   // Forward data from bridge to all clients
-  ws.on('message', (data) => {
+  ws.on('message', (data, isBinary) => {
     try {
+      if (isBinary) {
+        if (!session.schema) return; // no schema yet, can't decode
+        const records = decodeBinaryMessage(session.schema, data);
+        if (records.length === 0) return;
+        const payload = records.length === 1 ? records[0] : { type: 'batch', samples: records };
+        session.lastData = records[records.length - 1];
+        sessionData.set(sessionId, session.lastData);
+
+        // Only build JSON if some client needs it
+        let json = null;
+        session.clients.forEach(client => {
+          if (client.readyState !== WebSocket.OPEN) return;
+          if (session.binaryClients.has(client)) {
+            client.send(data, { binary: true });
+          } else {
+            json = json || JSON.stringify(payload);
+            client.send(json);
+          }
+        });
+        return;
+      }
+
       const payload = JSON.parse(data.toString());
-      session.lastData = payload;
-      sessionData.set(sessionId, payload);
+      if (payload.type === 'schema') {
+        session.schema = payload;
+        session.binaryClients.forEach(client => {
+          if (client.readyState === WebSocket.OPEN) {
+            client.send(JSON.stringify(payload));
+          }
+        });
+        return;
+      }
+
+      session.lastData = mergeLastData(session.lastData, payload);
+      sessionData.set(sessionId, session.lastData);
 
-      // Broadcast to all clients in this session
+      // Broadcast to all clients in this session (as text to binary
+      // clients, so they can tell JSON from packed frames)
       session.clients.forEach(client => {
         if (client.readyState === WebSocket.OPEN) {
-          client.send(data);
+          client.send(data, { binary: !session.binaryClients.has(client) });
         }
       });
     } catch (error) {
@@ -99,12 +196,14 @@ function handleBridgeConnection(ws, sessionId, token) {
   });
 }
 
-function handleClientConnection(ws, sessionId, token) {
+function handleClientConnection(ws, sessionId, token, wantsBinary) {
   // Initialize session if needed
   if (!sessions.has(sessionId)) {
     sessions.set(sessionId, {
       bridge: null,
       clients: new Set(),
+      binaryClients: new Set(),
+      schema: null,
       lastData: null,
       createdAt: Date.now()
     });
@@ -112,6 +211,9 @@ function handleClientConnection(ws, sessionId, token) {
 
   const session = sessions.get(sessionId);
   session.clients.add(ws);
+  if (wantsBinary) {
+    session.binaryClients.add(ws);
+  }
 
   // Send immediate connection status
   const status = {
@@ -122,6 +224,10 @@ function handleClientConnection(ws, sessionId, token) {
   };
   ws.send(JSON.stringify(status));
 
+  if (wantsBinary && session.schema) {
+    ws.send(JSON.stringify(session.schema));
+  }
+
   // If there's recent data, send it immediately
   if (session.lastData) {
     ws.send(JSON.stringify(session.lastData));
@@ -129,6 +235,7 @@ function handleClientConnection(ws, sessionId, token) {
 
   ws.on('close', () => {
     session.clients.delete(ws);
+    session.binaryClients.delete(ws);
     // Clean up empty sessions after 5 minutes
     if (session.clients.size === 0 && !session.bridge) {
       setTimeout(() => {
@@ -144,6 +251,7 @@ function handleClientConnection(ws, sessionId, token) {
   ws.on('error', (error) => {
     console.error(`Client error (session=${sessionId}):`, error);
     session.clients.delete(ws);
+    session.binaryClients.delete(ws);
   });
 }
 
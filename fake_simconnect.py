@@ -0,0 +1,470 @@
+"""
+Fake SimConnect backend
+Drop-in stand-ins for the SimConnect package's SimConnect and
+AircraftRequests, driven by a simple kinematic flight model, so the bridges
+can be run and benchmarked on any machine without MSFS.
+
+Select it with the MSFS_FAKE_SIM environment variable (or --fake-sim on
+msfs_ws_bridge.py), a scenario name optionally followed by settings:
+
+    MSFS_FAKE_SIM=steep_turns
+    MSFS_FAKE_SIM=approach,latency=0.002,jitter=0.001,failure_rate=0.01
+
+Scenarios: steep_turns, slow_flight, approach (KJKA, repeating). Settings:
+    latency         seconds added to every AircraftRequests.get() call
+    jitter          up to this many extra random seconds per call
+    failure_rate    fraction of get() calls that raise
+    frame_drop_rate fraction of data frames that are never delivered
+    frame_hz        simulated sim frame rate (default 60)
+    seed            random seed for jitter and failures
+    pause_every     pause the sim after this many seconds of flying...
+    pause_for       ...for this many seconds (default 10), repeatedly
+
+Values use SimConnect's conventions: pitch is negative nose up, bank is
+positive left wing down, angles are radians, body rotation X/Y/Z is
+pitch/yaw/roll.
+
+Running the module flies the approach scenario through landing phase
+detection against runway 27 and checks it reaches final, threshold and
+rollout:
+
+    python fake_simconnect.py
+"""
+
+import ctypes
+import math
+import random
+import threading
+import time
+import types
+
+from landing_phase import JKA_ELEVATION, JKA_RUNWAY_27
+from tick_scheduler import TickScheduler
+
+SCENARIOS = ("steep_turns", "slow_flight", "approach")
+
+G_FPS2 = 32.174
+FT_PER_KT = 1.68781  # ft/s per knot
+FT_PER_DEG_LAT = 364566.0
+
+# Unit strings returned by AircraftRequests.find(), as the real package does
+SIMVAR_UNITS = {
+    "PLANE_LATITUDE": b"Degrees",
+    "PLANE_LONGITUDE": b"Degrees",
+    "PLANE_ALTITUDE": b"Feet",
+    "PLANE_ALT_ABOVE_GROUND": b"Feet",
+    "AIRSPEED_INDICATED": b"Knots",
+    "VERTICAL_SPEED": b"Feet per minute",
+    "PLANE_HEADING_DEGREES_TRUE": b"Radians",
+    "SIM_ON_GROUND": b"Bool",
+    "PLANE_PITCH_DEGREES": b"Radians",
+    "PLANE_BANK_DEGREES": b"Radians",
+    "ROTATION_VELOCITY_BODY_X": b"Radians per second",
+    "ROTATION_VELOCITY_BODY_Y": b"Radians per second",
+    "ROTATION_VELOCITY_BODY_Z": b"Radians per second",
+    "G_FORCE": b"GForce",
+}
+
+GLIDEPATH_DEG = 3.0
+FINAL_NM = 5.0
+CROSSING_FT = 30.0  # glidepath height over the threshold
+FLARE_FT = 20.0
+# PLANE_ALTITUDE is the aircraft's reference point, which sits this far above
+# the runway with the wheels on it. Landing phase detection only reports a
+# rollout straight after the threshold phase (10-100 ft above the field), so
+# touchdown has to register from above that band.
+GROUND_FT = JKA_ELEVATION + 12.0
+
+def parse_spec(spec):
+    """Split "scenario,key=value,..." into (scenario, settings dict)"""
+    parts = [p.strip() for p in spec.split(",") if p.strip()]
+    scenario = parts[0] if parts and "=" not in parts[0] else "steep_turns"
+    settings = {}
+    for part in parts:
+        if "=" in part:
+            key, value = part.split("=", 1)
+            settings[key.strip()] = int(value) if key.strip() in ("frame_hz", "seed") else float(value)
+    return scenario, settings
+
+def bearing_deg(lat1, lon1, lat2, lon2):
+    north = (lat2 - lat1) * FT_PER_DEG_LAT
+    east = (lon2 - lon1) * FT_PER_DEG_LAT * math.cos(math.radians(lat1))
+    return math.degrees(math.atan2(east, north)) % 360
+
+def wrap180(deg):
+    return (deg + 180.0) % 360.0 - 180.0
+
+def clamp(value, limit):
+    return max(-limit, min(limit, value))
+
+class FlightModel:
+    """
+    Point-mass aircraft flown by a scenario script.
+
+    Scripts are generators that set target bank, airspeed and vertical
+    speed and yield once per step; step() then moves the aircraft towards
+    the targets with rate limits and integrates position. Coordinated
+    turns: turn rate g*tan(bank)/V, load factor 1/cos(bank).
+    """
+
+    def __init__(self, scenario="steep_turns"):
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown fake sim scenario {scenario!r}, expected one of {SCENARIOS}")
+        self.time = 0.0
+        self.lat, self.lon = 30.40, -87.70
+        self.alt_ft = 3000.0
+        self.ias_kt = 100.0
+        self.vs_fpm = 0.0
+        self.heading = 0.0  # degrees true
+        self.bank = 0.0  # degrees, right wing down positive
+        self.pitch = 2.0  # degrees, nose up positive
+        self.on_ground = False
+        self.target_bank = 0.0
+        self.target_ias = 100.0
+        self.target_vs = 0.0
+        self.rates = (0.0, 0.0, 0.0)  # roll, pitch, yaw in deg/s
+        self.g_force = 1.0
+        self._script = getattr(self, scenario)()
+        self._values = self._simvars()
+
+    # Scenario scripts
+
+    def hold(self, seconds, **targets):
+        for name, value in targets.items():
+            setattr(self, "target_" + name, value)
+        end = self.time + seconds
+        while self.time < end:
+            yield
+
+    def turn(self, bank, degrees):
+        """Roll into `bank` until the heading has changed by `degrees`, then roll out"""
+        self.target_bank = bank
+        turned, last = 0.0, self.heading
+        while turned < degrees:
+            yield
+            turned += abs(wrap180(self.heading - last))
+            last = self.heading
+        self.target_bank = 0.0
+
+    def steep_turns(self):
+        while True:
+            yield from self.hold(10, bank=0, ias=100, vs=0)
+            yield from self.turn(45, 360)
+            yield from self.hold(5)
+            yield from self.turn(-45, 360)
+
+    def slow_flight(self):
+        while True:
+            yield from self.hold(10, bank=0, ias=100, vs=0)
+            yield from self.hold(25, ias=55)
+            yield from self.turn(-15, 90)
+            yield from self.hold(5)
+            yield from self.turn(15, 90)
+            yield from self.hold(20, vs=300)
+            yield from self.hold(20, vs=-300)
+            yield from self.hold(25, vs=0, ias=100)
+
+    def approach(self):
+        threshold = (JKA_RUNWAY_27["threshold"]["lat"], JKA_RUNWAY_27["threshold"]["lon"])
+        opposite_end = (JKA_RUNWAY_27["oppositeEnd"]["lat"], JKA_RUNWAY_27["oppositeEnd"]["lon"])
+        elevation = JKA_ELEVATION
+        # The dashboard's runway 27 has its threshold west-northwest of the
+        # opposite end, so the extended centerline through both (about 294°
+        # inbound) is the one final course that stays on centerline and within
+        # 30° of the 270 runway heading, as landing phase detection requires
+        course = bearing_deg(*opposite_end, *threshold)
+        cos_lat = math.cos(math.radians(threshold[0]))
+        slope = math.tan(math.radians(GLIDEPATH_DEG))
+        while True:
+            # Start established on final
+            distance = FINAL_NM * 6076.1
+            back = math.radians(course + 180)
+            self.lat = threshold[0] + distance * math.cos(back) / FT_PER_DEG_LAT
+            self.lon = threshold[1] + distance * math.sin(back) / (FT_PER_DEG_LAT * cos_lat)
+            self.alt_ft = elevation + CROSSING_FT + distance * slope
+            self.heading, self.bank, self.ias_kt = course, 0.0, 75.0
+            self.vs_fpm = -self.ias_kt * FT_PER_KT * 60 * slope
+            self.on_ground = False
+            self.target_ias = 75
+
+            while not self.on_ground:
+                north = (self.lat - threshold[0]) * FT_PER_DEG_LAT
+                east = (self.lon - threshold[1]) * FT_PER_DEG_LAT * cos_lat
+                c = math.radians(course)
+                along = -(north * math.cos(c) + east * math.sin(c))  # ft before the threshold
+                cross = -north * math.sin(c) + east * math.cos(c)  # ft right of centerline
+                agl = self.alt_ft - elevation
+
+                if agl > FLARE_FT:
+                    glidepath = elevation + CROSSING_FT + along * slope
+                    self.target_vs = (-self.ias_kt * FT_PER_KT * 60 * slope
+                                      + clamp((glidepath - self.alt_ft) * 5, 300))
+                else:
+                    self.target_vs = -120  # flare
+                if agl < 500:
+                    self.target_ias = 62 if agl > FLARE_FT else 55
+                wanted = course - clamp(cross * 0.05, 20)
+                self.target_bank = clamp(wrap180(wanted - self.heading) * 2, 15)
+                yield
+
+            yield from self.hold(20, bank=0, ias=0, vs=0)
+
+    # Integration
+
+    def step(self, dt):
+        next(self._script)
+        old_bank, old_pitch, old_vs = self.bank, self.pitch, self.vs_fpm
+
+        self.bank += clamp(self.target_bank - self.bank, 15.0 * dt)
+        accel = 5.0 if self.on_ground else 2.0
+        self.ias_kt = max(0.0, self.ias_kt + clamp(self.target_ias - self.ias_kt, accel * dt))
+        self.vs_fpm += (self.target_vs - self.vs_fpm) * min(1.0, dt / 1.5)
+
+        speed = self.ias_kt * FT_PER_KT
+        turn_rate = 0.0
+        if speed > 1 and not self.on_ground:
+            turn_rate = math.degrees(G_FPS2 * math.tan(math.radians(self.bank)) / speed)
+        self.heading = (self.heading + turn_rate * dt) % 360
+
+        self.alt_ft += self.vs_fpm / 60.0 * dt
+        if self.alt_ft <= GROUND_FT:
+            self.alt_ft = GROUND_FT
+            self.on_ground = True
+            self.vs_fpm = self.target_vs = 0.0
+            self.bank = self.target_bank = 0.0
+
+        if self.on_ground:
+            self.pitch = 0.0
+        else:
+            alpha = min(14.0, 2.0 * (100.0 / max(self.ias_kt, 40.0)) ** 2)
+            gamma = math.degrees(math.atan2(self.vs_fpm / 60.0, max(speed, 1.0)))
+            self.pitch = alpha + gamma
+
+        h = math.radians(self.heading)
+        distance = speed * dt
+        self.lat += distance * math.cos(h) / FT_PER_DEG_LAT
+        self.lon += distance * math.sin(h) / (FT_PER_DEG_LAT * math.cos(math.radians(self.lat)))
+
+        bank_rad = math.radians(self.bank)
+        self.rates = (
+            (self.bank - old_bank) / dt,
+            (self.pitch - old_pitch) / dt + turn_rate * math.sin(bank_rad),
+            turn_rate * math.cos(bank_rad),
+        )
+        vertical_accel = (self.vs_fpm - old_vs) / 60.0 / dt / G_FPS2
+        self.g_force = 1.0 if self.on_ground else 1.0 / math.cos(bank_rad) + vertical_accel
+
+        self.time += dt
+        self._values = self._simvars()
+
+    def _simvars(self):
+        roll_rate, pitch_rate, yaw_rate = (math.radians(r) for r in self.rates)
+        return {
+            "PLANE_LATITUDE": self.lat,
+            "PLANE_LONGITUDE": self.lon,
+            "PLANE_ALTITUDE": self.alt_ft,
+            "PLANE_ALT_ABOVE_GROUND": self.alt_ft - JKA_ELEVATION,
+            "AIRSPEED_INDICATED": self.ias_kt,
+            "VERTICAL_SPEED": self.vs_fpm,
+            "PLANE_HEADING_DEGREES_TRUE": math.radians(self.heading),
+            "SIM_ON_GROUND": 1.0 if self.on_ground else 0.0,
+            "PLANE_PITCH_DEGREES": -math.radians(self.pitch),
+            "PLANE_BANK_DEGREES": -math.radians(self.bank),
+            "ROTATION_VELOCITY_BODY_X": -pitch_rate,
+            "ROTATION_VELOCITY_BODY_Y": yaw_rate,
+            "ROTATION_VELOCITY_BODY_Z": -roll_rate,
+            "G_FORCE": self.g_force,
+        }
+
+    def values(self):
+        """Latest SimVar values (a new dict each step, safe to read from any thread)"""
+        return self._values
+
+class _Id:
+    def __init__(self, value):
+        self.value = value
+
+class _FakeDll:
+    """The SimConnect.dll calls the bridge makes directly"""
+
+    def __init__(self, sm):
+        self.sm = sm
+
+    def AddToDataDefinition(self, handle, definition_id, datum, units, datatype, epsilon, datum_id):
+        name = datum.decode() if isinstance(datum, bytes) else datum
+        self.sm._definitions.setdefault(definition_id, []).append(name.replace(" ", "_"))
+
+    def RequestDataOnSimObject(self, handle, request_id, definition_id, object_id, period,
+                               flags, origin, interval, limit):
+        if period == 0:  # PERIOD_NEVER
+            self.sm._requests.pop(request_id, None)
+        else:
+            self.sm._requests[request_id] = (definition_id, period, interval)
+
+    def SubscribeToSystemEvent(self, handle, event_id, name):
+        name = name.decode() if isinstance(name, bytes) else name
+        self.sm._system_events[name] = event_id
+        self.sm._send_event(name)  # like the sim, report the current state straight away
+
+    def RequestSystemState(self, handle, request_id, name):
+        state = types.SimpleNamespace(dwRequestID=request_id, dwInteger=int(self.sm.running),
+                                      fFloat=0.0, szString=b"")
+        self.sm.handle_state_event(state)
+
+class SimConnect:
+    """
+    Stand-in for SimConnect.SimConnect.
+
+    A daemon thread steps the flight model at frame_hz and delivers data
+    frames for every RequestDataOnSimObject subscription through
+    handle_simobject_event, like the real dispatch thread. With
+    pause_every, the sim pauses periodically: the model and frames stop
+    and Pause_EX1 events go through handle_id_event.
+    """
+
+    def __init__(self, auto_connect=True, library_path=None, scenario="steep_turns",
+                 latency=0.0, jitter=0.0, failure_rate=0.0, frame_drop_rate=0.0,
+                 frame_hz=60, seed=None, pause_every=None, pause_for=10.0):
+        self.hSimConnect = 1
+        self.dll = _FakeDll(self)
+        self.model = FlightModel(scenario)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.frame_drop_rate = frame_drop_rate
+        self.frame_hz = frame_hz
+        self.pause_every = pause_every
+        self.pause_for = pause_for
+        self.random = random.Random(seed)
+        self.frames = 0
+        self.ok = True
+        self.running = True
+        self.paused = False
+        self._ids = 0
+        self._definitions = {}
+        self._requests = {}
+        self._system_events = {}  # system event name -> client event ID
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._dispatch, name="fake-simconnect", daemon=True)
+        if auto_connect:
+            self._thread.start()
+
+    def new_def_id(self):
+        self._ids += 1
+        return _Id(self._ids)
+
+    def new_request_id(self):
+        self._ids += 1
+        return _Id(self._ids)
+
+    def handle_simobject_event(self, obj):
+        pass  # the real library fills its own request caches here
+
+    def handle_id_event(self, event):
+        pass  # the real library tracks SimStart/SimStop here
+
+    def handle_state_event(self, state):
+        pass
+
+    def exit(self):
+        self._stop_event.set()
+
+    def call_delay(self):
+        """Sleep the injected per-call latency; raise for an injected failure"""
+        delay = self.latency + (self.random.random() * self.jitter if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            raise OSError("Injected SimConnect failure")
+
+    def _send_event(self, name):
+        event_id = self._system_events.get(name)
+        if event_id is None:
+            return
+        data = {"Pause_EX1": 1 if self.paused else 0, "Sim": 1 if self.running else 0}.get(name, 0)
+        self.handle_id_event(types.SimpleNamespace(uGroupID=0xFFFFFFFF, uEventID=event_id, dwData=data))
+
+    def _update_pause(self, elapsed):
+        cycle = self.pause_every + self.pause_for
+        paused = elapsed % cycle >= self.pause_every
+        if paused != self.paused:
+            self.paused = paused
+            self._send_event("Pause_EX1")
+
+    def _dispatch(self):
+        dt = 1.0 / self.frame_hz
+        ticks = TickScheduler(self.frame_hz)
+        start = time.monotonic()
+        while not ticks.wait_blocking(self._stop_event):
+            if self.pause_every:
+                self._update_pause(time.monotonic() - start)
+            if self.paused:
+                continue
+            self.model.step(dt)
+            self.frames += 1
+            for request_id, (definition_id, period, interval) in list(self._requests.items()):
+                every = (interval + 1) * (self.frame_hz if period == 4 else 1)  # 4: PERIOD_SECOND
+                if self.frames % every:
+                    continue
+                if self.frame_drop_rate and self.random.random() < self.frame_drop_rate:
+                    continue
+                self._send_frame(request_id, self._definitions.get(definition_id, []))
+
+    def _send_frame(self, request_id, names):
+        values = self.model.values()
+        data = (ctypes.c_double * len(names))(*(values.get(n, 0.0) for n in names))
+        obj = types.SimpleNamespace(dwRequestID=request_id, dwData=ctypes.addressof(data))
+        self.handle_simobject_event(obj)
+
+class _Request:
+    def __init__(self, name):
+        self.definitions = [(name.replace("_", " ").encode(), SIMVAR_UNITS.get(name, b"Number"))]
+
+class AircraftRequests:
+    """Stand-in for SimConnect.AircraftRequests: find() and get()"""
+
+    def __init__(self, sm, _time=0, _attemps=10):
+        self.sm = sm
+
+    def find(self, name):
+        return _Request(name)
+
+    def get(self, name):
+        self.sm.call_delay()
+        return self.sm.model.values().get(name)
+
+def check_approach(seconds=600, dt=0.05):
+    """
+    Fly the approach scenario through landing phase detection against
+    runway 27 and return the phases in the order they were entered
+    (none excluded); a working scenario includes final, threshold, rollout.
+    """
+    from landing_phase import NONE, LandingPhaseDetector
+    from sim_sampler import sample_payloads
+
+    model = FlightModel("approach")
+    detector = LandingPhaseDetector("27")
+    phases = []
+    for seq in range(int(seconds / dt)):
+        model.step(dt)
+        payload = sample_payloads([(seq, seq * dt, model.values(), 0.0, None)])[0]
+        event = (detector.process(payload) or {}).get("landing")
+        if event and event.get("phase", NONE) != NONE:
+            phases.append(event["phase"])
+    return phases
+
+def connect(spec):
+    """Create a (SimConnect, AircraftRequests) pair from an MSFS_FAKE_SIM spec"""
+    scenario, settings = parse_spec(spec)
+    sm = SimConnect(scenario=scenario, **settings)
+    return sm, AircraftRequests(sm, _time=0)
+
+if __name__ == "__main__":
+    import sys
+
+    phases = check_approach()
+    print("Approach phases: " + " -> ".join(phases))
+    expected = ["final", "threshold", "rollout"]
+    ok = any(phases[i:i + 3] == expected for i in range(len(phases)))
+    print("✅ approach reaches final, threshold and rollout" if ok else "❌ approach misses landing phases")
+    sys.exit(0 if ok else 1)
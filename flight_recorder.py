@@ -0,0 +1,439 @@
+"""
+Columnar flight recorder
+Keeps whole flights on the bridge side. Each channel is stored as a typed
+column in fixed-size zlib-compressed chunks, with a time-range index, so a
+multi-hour session is cheap to write and any time window can be read back
+without decompressing the rest of the flight.
+
+File layout (little-endian):
+
+    b"MSFSREC1" | uint32 header length | JSON header
+    (chunk tier*)* | index JSON | uint64 index offset | b"MSFSIDX1"
+
+A chunk is b"CHNK" | uint32 samples | float64 first ts | float64 last ts |
+one uint32 compressed length per column | the compressed columns, in
+header column order. Column bytes are shuffled before compression (all
+first bytes of the values, then all second bytes, ...), which lets zlib
+find the slowly changing high bytes of smooth flight data. The index at
+the end lists every chunk's time range and offset; if the recorder was not
+closed cleanly (sim crash, power cut) readers rebuild it by walking the
+chunk headers.
+
+Each chunk is followed by its downsampled tiers: for every factor in
+TIER_FACTORS, each channel reduced to one point in factor with
+Largest-Triangle-Three-Buckets, which keeps the peaks and turns a plot needs.
+A tier is b"TIER" | uint32 factor | uint32 chunk number | uint32 compressed
+length | zlib of, per channel in TIER_COLUMNS order, uint32 count | float64
+ts * count | values * count (in the column's type). downsample() picks the
+finest tier that fits a point budget, so long flights can be drawn without
+reading every sample.
+
+Writing only needs the standard library; reading returns NumPy arrays.
+"""
+
+import array
+import bisect
+import json
+import math
+import mmap
+import struct
+import sys
+import time
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # only needed to read recordings back
+    np = None
+
+from telemetry_codec import BINARY_FIELDS
+
+FILE_MAGIC = b"MSFSREC1"
+INDEX_MAGIC = b"MSFSIDX1"
+CHUNK_MAGIC = b"CHNK"
+TIER_MAGIC = b"TIER"
+FORMAT_VERSION = 2  # 1: no tiers
+
+# Recorded channels: capture time, sequence number and every payload field
+RECORD_COLUMNS = (("ts", "d"), ("seq", "I")) + BINARY_FIELDS
+
+CHUNK_SAMPLES = 4096  # samples per chunk; ~2 minutes at 30 Hz
+ZLIB_LEVEL = 6
+
+# Downsampled tiers written with every chunk (1:8 and 1:64); each coarser
+# tier is reduced from the one before it
+TIER_FACTORS = (8, 64)
+TIER_COLUMNS = tuple(c for c in RECORD_COLUMNS if c[0] not in ("ts", "seq"))
+
+_LENGTH = struct.Struct("<I")
+_CHUNK = struct.Struct("<4sIdd")
+_TIER = struct.Struct("<4sIII")
+_FOOTER = struct.Struct("<Q8s")
+
+NUMPY_TYPES = {"d": "<f8", "f": "<f4", "I": "<u4"}
+
+def lttb(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets: threshold points of (xs, ys) that keep
+    its visual shape. The first and last points are always kept; in between,
+    each bucket keeps the point making the largest triangle with the point
+    kept before it and the average of the next bucket. Returns (xs, ys)
+    lists.
+    """
+    n = len(xs)
+    if threshold >= n:
+        return list(xs), list(ys)
+    if threshold < 3:
+        picks = [0, n - 1][:max(threshold, 0)]
+        return [xs[i] for i in picks], [ys[i] for i in picks]
+
+    every = (n - 2) / (threshold - 2)
+    out_x = [xs[0]]
+    out_y = [ys[0]]
+    a = 0
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / count
+        avg_y = sum(ys[next_start:next_end]) / count
+
+        ax = xs[a]
+        ay = ys[a]
+        dx = ax - avg_x
+        dy = avg_y - ay
+        best = -1.0
+        pick = start = int(i * every) + 1
+        for j in range(start, next_start):
+            area = abs(dx * (ys[j] - ay) - (ax - xs[j]) * dy)
+            if area > best:
+                best = area
+                pick = j
+        out_x.append(xs[pick])
+        out_y.append(ys[pick])
+        a = pick
+    out_x.append(xs[-1])
+    out_y.append(ys[-1])
+    return out_x, out_y
+
+def _tier_size(count, factor):
+    return max(-(-count // factor), 2)
+
+class FlightRecorder:
+    """
+    Appends payloads to a recording file.
+
+    Samples are buffered per column and written one compressed chunk at a
+    time, so at most chunk_samples samples are lost if the process dies.
+    Missing values are stored as NaN (seq as 0) and left out of the tiers.
+    close() writes the index.
+    """
+
+    def __init__(self, path, columns=RECORD_COLUMNS, chunk_samples=CHUNK_SAMPLES, level=ZLIB_LEVEL):
+        self.path = path
+        self.columns = tuple(columns)
+        self.chunk_samples = chunk_samples
+        self.level = level
+        self.samples = 0
+        self.chunks = []  # index entries
+        self.tiers = {factor: [] for factor in TIER_FACTORS}  # tier offsets, one per chunk
+        self._tier_columns = [i for i, c in enumerate(self.columns) if c in TIER_COLUMNS]
+        self._file = open(path, "wb")
+        self._buffers = self._new_buffers()
+
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "columns": [list(c) for c in self.columns],
+            "chunk_samples": chunk_samples,
+            "compression": "zlib",
+            "shuffle": True,
+            "tiers": list(TIER_FACTORS),
+            "tier_columns": [list(self.columns[i]) for i in self._tier_columns],
+            # ts is time.monotonic(); these convert it to wall-clock time
+            "started_wall": time.time(),
+            "started_monotonic": time.monotonic(),
+        }).encode("utf-8")
+        self._file.write(FILE_MAGIC + _LENGTH.pack(len(header)) + header)
+
+    def _new_buffers(self):
+        return [array.array(kind) for _, kind in self.columns]
+
+    def append(self, payloads):
+        for payload in payloads:
+            for (name, kind), buffer in zip(self.columns, self._buffers):
+                value = payload.get(name)
+                if value is None:
+                    value = 0 if kind == "I" else math.nan
+                elif kind == "I":
+                    value = int(value) & 0xFFFFFFFF
+                buffer.append(value)
+            self.samples += 1
+            if len(self._buffers[0]) >= self.chunk_samples:
+                self._write_chunk()
+
+    def _write_chunk(self):
+        buffers = self._buffers
+        count = len(buffers[0])
+        if not count:
+            return
+        self._buffers = self._new_buffers()
+        tiers = self._downsample(buffers)
+
+        blobs = []
+        for buffer in buffers:
+            if sys.byteorder == "big":
+                buffer.byteswap()
+            raw = buffer.tobytes()
+            shuffled = b"".join(raw[i::buffer.itemsize] for i in range(buffer.itemsize))
+            blobs.append(zlib.compress(shuffled, self.level))
+
+        ts = buffers[0]
+        offset = self._file.tell()
+        self._file.write(_CHUNK.pack(CHUNK_MAGIC, count, ts[0], ts[-1]))
+        self._file.write(b"".join(_LENGTH.pack(len(b)) for b in blobs))
+        self._file.write(b"".join(blobs))
+        number = len(self.chunks)
+        for factor, tier in zip(TIER_FACTORS, tiers):
+            self.tiers[factor].append(self._file.tell())
+            blob = zlib.compress(tier, self.level)
+            self._file.write(_TIER.pack(TIER_MAGIC, factor, number, len(blob)) + blob)
+        self._file.flush()
+
+        self.chunks.append([ts[0], ts[-1], count, offset])
+
+    def _downsample(self, buffers):
+        """Encoded tier blocks for one chunk, finest first"""
+        ts = buffers[0]
+        levels = [[] for _ in TIER_FACTORS]
+        for index in self._tier_columns:
+            values = buffers[index]
+            kept = [(t, v) for t, v in zip(ts, values) if v == v]  # drop NaN
+            xs = [t for t, _ in kept]
+            ys = [v for _, v in kept]
+            for level, factor in zip(levels, TIER_FACTORS):
+                xs, ys = lttb(xs, ys, _tier_size(len(kept), factor))
+                level.append((values.typecode, xs, ys))
+        blocks = []
+        for level in levels:
+            parts = []
+            for kind, xs, ys in level:
+                xs = array.array("d", xs)
+                ys = array.array(kind, ys)
+                if sys.byteorder == "big":
+                    xs.byteswap()
+                    ys.byteswap()
+                parts += [_LENGTH.pack(len(xs)), xs.tobytes(), ys.tobytes()]
+            blocks.append(b"".join(parts))
+        return blocks
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._write_chunk()
+        offset = self._file.tell()
+        self._file.write(json.dumps({"chunks": self.chunks, "tiers": self.tiers}).encode("utf-8"))
+        self._file.write(_FOOTER.pack(offset, INDEX_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class FlightRecording:
+    """
+    Memory-mapped reader for a recording file.
+
+    Only the header and index are parsed on open. column(), slice() and
+    downsample() decompress just the chunks (or tiers) they need, straight
+    from the mapping, and return NumPy arrays.
+    """
+
+    def __init__(self, path):
+        if np is None:
+            raise RuntimeError("Reading flight recordings needs numpy (pip install numpy)")
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        data = self._map
+        if data[:len(FILE_MAGIC)] != FILE_MAGIC:
+            raise ValueError(f"{path} is not a flight recording")
+        start = len(FILE_MAGIC)
+        (length,) = _LENGTH.unpack_from(data, start)
+        start += _LENGTH.size
+        self.header = json.loads(data[start:start + length])
+        self.columns = tuple(tuple(c) for c in self.header["columns"])
+        self._column_index = {name: i for i, (name, _) in enumerate(self.columns)}
+        self._data_start = start + length
+
+        self.tier_columns = tuple(tuple(c) for c in self.header.get("tier_columns", ()))
+        self.chunks, self.tiers = self._read_index()
+        self._starts = [c[0] for c in self.chunks]
+        self._ends = [c[1] for c in self.chunks]
+
+    def _read_index(self):
+        data = self._map
+        if len(data) >= self._data_start + _FOOTER.size:
+            offset, magic = _FOOTER.unpack_from(data, len(data) - _FOOTER.size)
+            if magic == INDEX_MAGIC:
+                index = json.loads(data[offset:len(data) - _FOOTER.size])
+                return index["chunks"], {int(f): offsets for f, offsets in index.get("tiers", {}).items()}
+        return self._scan_chunks()
+
+    def _scan_chunks(self):
+        """Rebuild the index from chunk and tier headers (recorder was not closed)"""
+        data = self._map
+        table = _LENGTH.size * len(self.columns)
+        chunks = []
+        tiers = {}
+        offset = self._data_start
+        while offset + _CHUNK.size + table <= len(data):
+            magic, count, first, last = _CHUNK.unpack_from(data, offset)
+            if magic == TIER_MAGIC:
+                _, factor, number, length = _TIER.unpack_from(data, offset)
+                end = offset + _TIER.size + length
+                if end > len(data):
+                    break
+                tiers.setdefault(factor, []).append(offset)
+                offset = end
+                continue
+            if magic != CHUNK_MAGIC:
+                break
+            lengths = struct.unpack_from(f"<{len(self.columns)}I", data, offset + _CHUNK.size)
+            end = offset + _CHUNK.size + table + sum(lengths)
+            if end > len(data):
+                break  # cut off mid-write
+            chunks.append([first, last, count, offset])
+            offset = end
+        # A tier is only usable if every chunk has one
+        return chunks, {f: offsets for f, offsets in tiers.items() if len(offsets) >= len(chunks)}
+
+    def __len__(self):
+        return sum(c[2] for c in self.chunks)
+
+    @property
+    def time_range(self):
+        if not self.chunks:
+            return None
+        return self.chunks[0][0], self.chunks[-1][1]
+
+    def _chunk_column(self, chunk, name):
+        index = self._column_index[name]
+        count, offset = chunk[2], chunk[3]
+        lengths = struct.unpack_from(f"<{len(self.columns)}I", self._map, offset + _CHUNK.size)
+        start = offset + _CHUNK.size + _LENGTH.size * len(self.columns) + sum(lengths[:index])
+        raw = zlib.decompress(self._map[start:start + lengths[index]])
+        dtype = np.dtype(NUMPY_TYPES[self.columns[index][1]])
+        if self.header.get("shuffle"):
+            raw = np.frombuffer(raw, dtype=np.uint8).reshape(dtype.itemsize, count).T.tobytes()
+        return np.frombuffer(raw, dtype=dtype, count=count)
+
+    def _concat(self, chunks, name):
+        kind = NUMPY_TYPES[self.columns[self._column_index[name]][1]]
+        if not chunks:
+            return np.empty(0, dtype=kind)
+        return np.concatenate([self._chunk_column(c, name) for c in chunks])
+
+    def column(self, name):
+        """One channel for the whole flight"""
+        return self._concat(self.chunks, name)
+
+    def slice(self, start, end, columns=None):
+        """
+        Channels for samples with start <= ts <= end, as a dict of arrays.
+
+        Chunks are found by binary search on the index (recordings are in
+        capture order), so only the chunks overlapping the window are read.
+        """
+        names = list(columns) if columns is not None else [name for name, _ in self.columns]
+        first = bisect.bisect_left(self._ends, start)
+        last = bisect.bisect_right(self._starts, end)
+        chunks = self.chunks[first:last]
+
+        ts = self._concat(chunks, "ts")
+        lo = int(np.searchsorted(ts, start, side="left"))
+        hi = int(np.searchsorted(ts, end, side="right"))
+        return {name: (ts if name == "ts" else self._concat(chunks, name))[lo:hi] for name in names}
+
+    def _tier_block(self, factor, number):
+        """{channel: (ts, values)} of one chunk's tier"""
+        offset = self.tiers[factor][number]
+        _, _, _, length = _TIER.unpack_from(self._map, offset)
+        start = offset + _TIER.size
+        raw = zlib.decompress(self._map[start:start + length])
+        block = {}
+        position = 0
+        for name, kind in self.tier_columns:
+            (count,) = _LENGTH.unpack_from(raw, position)
+            position += _LENGTH.size
+            ts = np.frombuffer(raw, dtype="<f8", count=count, offset=position)
+            position += ts.nbytes
+            values = np.frombuffer(raw, dtype=NUMPY_TYPES[kind], count=count, offset=position)
+            position += values.nbytes
+            block[name] = (ts, values)
+        return block
+
+    def downsample(self, start, end, budget, columns=None):
+        """
+        At most budget points per channel for start <= ts <= end, for
+        drawing: (factor, {channel: (ts, values)}).
+
+        Uses the full-resolution samples (factor 1) when they fit, otherwise
+        the finest tier that does, and reduces further with LTTB when even
+        the coarsest tier is over budget. Channels are downsampled one by
+        one, so each has its own ts array; NaN samples are left out.
+        """
+        names = list(columns) if columns is not None else [name for name, _ in self.tier_columns]
+        first = bisect.bisect_left(self._ends, start)
+        last = bisect.bisect_right(self._starts, end)
+        chunks = self.chunks[first:last]
+
+        # Samples in the window, assuming they are spread evenly over each chunk
+        estimate = 0.0
+        for chunk_start, chunk_end, count, _ in chunks:
+            span = chunk_end - chunk_start
+            inside = min(chunk_end, end) - max(chunk_start, start)
+            estimate += count if span <= 0 else count * max(min(inside / span, 1.0), 0.0)
+
+        factor = 1
+        if estimate > budget:
+            tier_names = {name for name, _ in self.tier_columns}
+            tiered = sorted(self.tiers) if tier_names.issuperset(names) else []  # older files have none
+            factor = next((f for f in tiered if estimate / f <= budget), tiered[-1] if tiered else 1)
+
+        result = {}
+        if factor == 1:
+            window = self.slice(start, end, ["ts"] + names)
+            for name in names:
+                values = window[name]
+                kept = ~np.isnan(values.astype(float))
+                result[name] = (window["ts"][kept], values[kept])
+        else:
+            blocks = [self._tier_block(factor, first + i) for i in range(len(chunks))]
+            for name in names:
+                ts = np.concatenate([b[name][0] for b in blocks]) if blocks else np.empty(0)
+                values = np.concatenate([b[name][1] for b in blocks]) if blocks else np.empty(0)
+                inside = (ts >= start) & (ts <= end)
+                result[name] = (ts[inside], values[inside])
+
+        for name, (ts, values) in result.items():
+            if len(ts) > budget:
+                xs, ys = lttb(ts.tolist(), values.tolist(), budget)
+                result[name] = (np.array(xs), np.array(ys, dtype=values.dtype))
+        return factor, result
+
+    def to_wall_time(self, ts):
+        """Convert recorded capture times (monotonic) to Unix time"""
+        return ts - self.header["started_monotonic"] + self.header["started_wall"]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,165 @@
+"""
+JavaScript parity checks
+Runs the dashboard's own utils (ReactRoot/src/utils) under node on random
+inputs and compares them with the Python ports the bridge uses, so the
+ports' claims of matching the dashboard can be reproduced:
+
+    python js_parity.py          # every check, 2000 random cases each
+    python js_parity.py 10000
+
+Checks: detectLandingPhase against landing_phase.detect_phase,
+computePhaseBusting against bust_filter.compute_phase_busting, and
+gradeLandingPathPhaseBased against landing_grader (also run on its own with
+landing_grader.py --check-js). Needs node on the PATH.
+"""
+
+import collections
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+
+from bust_filter import compute_phase_busting
+from landing_phase import (BASE, COMPLETE, DOWNWIND, FINAL, JKA_ELEVATION, JKA_RUNWAY_27, NONE, ROLLOUT,
+                           THRESHOLD, Runway, detect_phase)
+
+JS_UTILS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ReactRoot", "src", "utils")
+
+DEFAULT_CASES = 2000
+
+def run_node(modules, script, data):
+    """
+    Copy the named utils modules next to script as .mjs, run script under
+    node with data parsed from data.json, and return the JSON it prints.
+    """
+    with tempfile.TemporaryDirectory(prefix="js-parity-") as tmp:
+        # Node needs the extensions the bundler fills in
+        for module in modules:
+            with open(os.path.join(JS_UTILS, module + ".js"), encoding="utf-8") as f:
+                source = re.sub(r"from '\./(\w+)'", r"from './\1.mjs'", f.read())
+            with open(os.path.join(tmp, module + ".mjs"), "w", encoding="utf-8") as f:
+                f.write(source)
+        with open(os.path.join(tmp, "data.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        with open(os.path.join(tmp, "check.mjs"), "w", encoding="utf-8") as f:
+            f.write("import fs from 'fs'\n"
+                    "const data = JSON.parse(fs.readFileSync('data.json'))\n" + script)
+        output = subprocess.run(["node", "check.mjs"], cwd=tmp, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+def _offset(lat, lon, course, nm):
+    """Flat-earth point nm along course from lat, lon (plenty for random inputs)"""
+    c = math.radians(course)
+    return (lat + nm / 60 * math.cos(c),
+            lon + nm / 60 * math.sin(c) / max(math.cos(math.radians(lat)), 0.05))
+
+def _random_runway(rng):
+    """KJKA 27 or a 0.5-2 NM runway anywhere within 70° of the equator"""
+    if rng.random() < 0.3:
+        return JKA_RUNWAY_27
+    lat, lon = rng.uniform(-70, 70), rng.uniform(-180, 180)
+    course = rng.uniform(0, 360)
+    end_lat, end_lon = _offset(lat, lon, course, rng.uniform(0.5, 2.0))
+    return {"heading": round(course + rng.uniform(-5, 5)) % 360,
+            "threshold": {"lat": lat, "lon": lon}, "oppositeEnd": {"lat": end_lat, "lon": end_lon}}
+
+def _random_landing_sample(rng, runway):
+    """A sample around the runway, biased towards the pattern legs"""
+    threshold = runway["threshold"]
+    heading = runway["heading"]
+    # Along the extended centerline (before or past the threshold), then off to one side
+    along = rng.choice((-1, 1)) * rng.uniform(0, 6) * rng.choice((1, 1, 0.05))
+    lat, lon = _offset(threshold["lat"], threshold["lon"], heading, along)
+    lat, lon = _offset(lat, lon, heading + 90, rng.choice((-1, 1)) * rng.uniform(0, 2) * rng.choice((1, 0.1)))
+    hdg = (rng.choice((heading, heading + 90, heading + 180, heading + 270, rng.uniform(0, 360)))
+           + rng.uniform(-70, 70)) % 360
+    return {
+        "lat": None if rng.random() < 0.01 else lat,
+        "lon": lon,
+        "alt_ft": None if rng.random() < 0.01 else JKA_ELEVATION + rng.choice((rng.uniform(-20, 150),
+                                                                             rng.uniform(0, 2000))),
+        "on_ground": rng.random() < 0.15,
+        "hdg_true": None if rng.random() < 0.03 else hdg,
+    }
+
+def check_landing_phase(count=DEFAULT_CASES, seed=1):
+    """
+    detectLandingPhase and detect_phase on count random samples with random
+    previous phases. Returns (mismatches, phases seen).
+    """
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        runway = _random_runway(rng)
+        previous = rng.choice((NONE, DOWNWIND, BASE, FINAL, THRESHOLD, ROLLOUT, COMPLETE))
+        cases.append([_random_landing_sample(rng, runway), runway, previous])
+    expected = run_node(("landingStandards",), (
+        "import { detectLandingPhase } from './landingStandards.mjs'\n"
+        "console.log(JSON.stringify(data.map(([sample, runway, previous]) =>\n"
+        "  detectLandingPhase(sample, runway, previous))))\n"), cases)
+
+    mismatches = []
+    seen = collections.Counter()
+    for (sample, runway, previous), js in zip(cases, expected):
+        ours = detect_phase(sample, Runway.from_dict(runway), previous)
+        seen[js] += 1
+        if ours != js:
+            mismatches.append((sample, runway, previous, ours, js))
+    return mismatches, seen
+
+def check_bust_filter(count=DEFAULT_CASES, seed=1):
+    """
+    computePhaseBusting and compute_phase_busting on count random bad/good
+    sequences, with default and random limits. Returns the mismatches.
+    """
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        bad_rate = rng.random()
+        flags = [rng.random() < bad_rate for _ in range(rng.randint(0, 60))]
+        opts = {} if rng.random() < 0.5 else {"minPercent": rng.choice((0.1, 0.2, 0.25, 0.5)),
+                                              "minConsecutive": rng.randint(1, 8)}
+        cases.append([flags, opts])
+    expected = run_node(("bustFilter",), (
+        "import { computePhaseBusting } from './bustFilter.mjs'\n"
+        "console.log(JSON.stringify(data.map(([flags, opts]) => computePhaseBusting(flags, bad => bad, opts))))\n"),
+        cases)
+
+    mismatches = []
+    for (flags, opts), js in zip(cases, expected):
+        limits = {"min_percent": opts["minPercent"], "min_consecutive": opts["minConsecutive"]} if opts else {}
+        ours = compute_phase_busting(flags, bool, **limits)
+        if ours != js:
+            mismatches.append((flags, opts, ours, js))
+    return mismatches
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CASES
+    failed = False
+
+    mismatches, seen = check_landing_phase(count)
+    for sample, runway, previous, ours, js in mismatches[:5]:
+        print(f"❌ {sample} on {runway} after {previous}: {ours} vs JavaScript {js}")
+    print(f"{'✅' if not mismatches else '❌'} detectLandingPhase: {count - len(mismatches)}/{count} match "
+          f"({', '.join(f'{phase} {n}' for phase, n in seen.most_common())})")
+    failed |= bool(mismatches)
+
+    mismatches = check_bust_filter(count)
+    for flags, opts, ours, js in mismatches[:5]:
+        print(f"❌ {flags} {opts}: {ours} vs JavaScript {js}")
+    print(f"{'✅' if not mismatches else '❌'} computePhaseBusting: {count - len(mismatches)}/{count} match")
+    failed |= bool(mismatches)
+
+    import landing_grader
+    mismatches = landing_grader.check_js(count)
+    total = (len(landing_grader.JS_EDGE_CASES) + count) * len(landing_grader.SKILL_LEVELS)
+    print(f"{'✅' if not mismatches else '❌'} gradeLandingPathPhaseBased: {total - len(mismatches)}/{total} match")
+    failed |= bool(mismatches)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
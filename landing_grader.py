@@ -0,0 +1,584 @@
+"""
+Batch landing grader
+Grades recorded flights with the dashboard's phase-based landing grade
+(gradeLandingPathPhaseBased in ReactRoot/src/utils/landingGradingScale.js,
+with the penalties from landingPenalty.js) using whole-column NumPy
+operations instead of a loop over sample objects, so an entire flight grades
+in milliseconds and regrading at another skill level only redoes the maxima.
+
+    python landing_grader.py recordings/flight-20250101-120000.flight --runway 27
+    python landing_grader.py FLIGHT --runway 27 --skill novice --vref 65
+    python landing_grader.py --check-js 400   # compare with the JavaScript under node
+
+Deviation samples are built the way Landing.jsx builds them live: airborne
+and faster than 30 kt, one every 0.5 s, within 5 NM of the threshold, against
+the 3 degree glidepath, Vref + 5 and -3 degrees of pitch, with the phase from
+detectLandingPhase. Results have the JavaScript's keys (finalGrade,
+phaseGrades, breakdown, maxByPhase, bust, notes, penaltySteps,
+penaltyReasons) plus the samples and the seconds spent past the bust limits
+in each phase.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # only needed for grading
+    np = None
+
+from landing_phase import (BASE, DOWNWIND, EARTH_RADIUS_KM, FINAL,
+                           KM_TO_NM, NONE, RUNWAY_CHANNELS, THRESHOLD, parse_runway)
+
+GRADE_ORDER = ("A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D+", "D", "D-", "F")
+
+# Graded phases, in the order the JavaScript adds them up
+PHASES = (DOWNWIND, BASE, FINAL, THRESHOLD)
+PHASE_WEIGHTS = {DOWNWIND: 0.10, BASE: 0.20, FINAL: 0.50, THRESHOLD: 0.20}
+
+METRICS = ("altitude", "lateral", "speed", "bank", "pitch")
+METRIC_WEIGHTS = {"speed": 0.35, "altitude": 0.30, "lateral": 0.20, "bank": 0.10, "pitch": 0.05}
+
+# ACS_THRESHOLDS: upper limit of each grade A+ .. D- (anything more is F)
+ACS_THRESHOLDS = {
+    DOWNWIND: {
+        "altitude": (50, 75, 100, 150, 200, 250, 300, 350, 400, 450, 500, 600),
+        "lateral": (400, 600, 800, 1000, 1300, 1600, 1900, 2200, 2600, 3000, 3500, 4000),
+        "speed": (5, 7, 10, 12, 15, 18, 20, 22, 25, 28, 30, 35),
+        "bank": (15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70),
+        "pitch": (3, 4, 5, 6, 7, 8, 9, 10, 12, 14, 16, 18),
+    },
+    BASE: {
+        "altitude": (60, 90, 120, 160, 200, 250, 300, 350, 400, 500, 600, 700),
+        "lateral": (350, 500, 700, 900, 1100, 1400, 1700, 2000, 2400, 2800, 3300, 3800),
+        "speed": (5, 7, 10, 12, 15, 18, 20, 22, 25, 28, 30, 35),
+        "bank": (20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 75),
+        "pitch": (3, 4, 5, 6, 7, 8, 9, 10, 12, 14, 16, 18),
+    },
+    FINAL: {
+        "altitude": (50, 75, 100, 125, 150, 175, 200, 250, 300, 350, 400, 450),
+        "lateral": (150, 250, 350, 450, 600, 750, 900, 1100, 1400, 1700, 2000, 2300),
+        "speed": (3, 5, 7, 8, 10, 12, 15, 18, 20, 22, 25, 28),
+        "bank": (10, 12, 15, 18, 20, 22, 25, 28, 30, 33, 35, 38),
+        "pitch": (3, 4, 5, 6, 7, 8, 9, 10, 12, 14, 16, 18),
+    },
+    THRESHOLD: {
+        "altitude": (20, 30, 40, 60, 80, 100, 120, 150, 180, 220, 250, 300),
+        "lateral": (50, 80, 120, 160, 220, 300, 380, 500, 650, 800, 1000, 1200),
+        "speed": (2, 3, 4, 5, 6, 7, 8, 10, 12, 14, 16, 18),
+        "bank": (5, 7, 10, 12, 15, 18, 20, 22, 25, 28, 30, 35),
+        "pitch": (2, 3, 4, 5, 6, 7, 8, 9, 10, 12, 14, 16),
+    },
+}
+
+SKILL_MULTIPLIERS = {
+    "acs": {"altitude": 1.0, "lateral": 1.0, "speed": 1.0, "bank": 1.0, "pitch": 1.0},
+    "novice": {"altitude": 1.5, "lateral": 1.5, "speed": 1.4, "bank": 1.2, "pitch": 1.3},
+    "beginner": {"altitude": 2.5, "lateral": 2.5, "speed": 2.0, "bank": 1.5, "pitch": 1.8},
+}
+
+SKILL_LEVELS = tuple(SKILL_MULTIPLIERS)
+
+# Bump when the grading logic changes in a way the tables below don't show,
+# so regrade_flights regrades every flight
+RULESET_VERSION = 1
+
+# A phase with fewer deviation samples than this is not graded
+MIN_PHASE_SAMPLES = 5
+
+# Bust limits on the phase maxima (altitude ft, lateral ft, speed kt, bank deg)
+BUST_LIMITS = {
+    FINAL: {"altitude": 400, "lateral": 2127, "speed": 20, "bank": 35},
+    THRESHOLD: {"altitude": 200, "lateral": 600, "speed": 15, "bank": 25},
+}
+
+# landingSeverity.js: (bust limit, mild, moderate, severe ratios)
+FINAL_SEVERITY = (
+    ("Altitude", "altDevAbs", (100, 1.0, 1.5, 2.5)),
+    ("Lateral", "lateralDevAbsNm", (0.1, 1.0, 1.5, 2.5)),
+    ("Speed", "speedDevAbsKt", (10, 1.0, 1.5, 2.5)),
+    ("Bank", "bankAbsDeg", (25, 1.0, 1.25, 1.6)),
+)
+THRESHOLD_SEVERITY = (
+    ("Altitude", "altDevAbs", (50, 1.0, 1.4, 2.0)),
+    ("Speed", "speedDevAbsKt", (5, 1.0, 1.4, 2.0)),
+    ("Vertical Speed", "vsAbsFpm", (300, 1.0, 1.3, 1.8)),
+)
+PHASE_BASE_STEPS = {FINAL: 1, THRESHOLD: 2}
+SEVERITY_NAMES = {1: "Mild", 2: "Moderate", 3: "Severe"}
+
+# Live deviation sampling in Landing.jsx
+DEFAULT_VREF = 60
+SAMPLE_INTERVAL = 0.5  # seconds between deviation samples
+MIN_SPEED_KT = 30
+APPROACH_NM = 5.0
+GLIDEPATH_DEG = 3.0
+TARGET_PITCH_DEG = -3.0
+FT_PER_NM = 6076
+
+# A sample counts towards bust time until the next one, but never for longer
+# than this (gaps where the aircraft left the approach or the sim paused)
+MAX_SAMPLE_GAP = 1.0
+
+# Recorded channels the grader reads
+GRADER_COLUMNS = ("ts", "lat", "lon", "alt_ft", "ias_kt", "on_ground", "pitch_deg", "bank_deg", "hdg_true")
+
+# Deviation sample columns (the JavaScript sample objects, as arrays)
+SAMPLE_COLUMNS = ("ts", "phase", "altDev", "lateralDev", "speedDev", "bankAbs", "pitchDev", "pitchAbs")
+
+_PHASE_CODES = {phase: code for code, phase in enumerate((NONE,) + PHASES)}
+
+def _need_numpy():
+    if np is None:
+        raise RuntimeError("Grading flights needs numpy (pip install numpy)")
+
+def js_round(value):
+    """
+    Math.round: halves round up. Not floor(value + 0.5), whose addition
+    rounds 0.49999999999999994 up to 1.0
+    """
+    whole = math.floor(value)
+    return whole + 1 if value - whole >= 0.5 else whole
+
+def points_to_grade(points):
+    """pointsToGrade: 12 points is A+, each point less one grade lower"""
+    return GRADE_ORDER[min(len(GRADE_ORDER) - 1, max(0, 12 - js_round(points)))]
+
+def apply_penalty(grade, steps):
+    """gradeMath.applyPenalty: move down steps grades, stopping at F"""
+    index = GRADE_ORDER.index(grade) if grade in GRADE_ORDER else len(GRADE_ORDER) - 1
+    return GRADE_ORDER[min(len(GRADE_ORDER) - 1, index + (steps or 0))]
+
+def classify_severity(value, limit, mild, moderate, severe):
+    """landingSeverity.classifySeverity: 0 none, 1 mild, 2 moderate, 3 severe"""
+    if value is None or not limit:
+        return 0
+    ratio = value / limit
+    if ratio < mild:
+        return 0
+    if ratio < moderate:
+        return 1
+    if ratio < severe:
+        return 2
+    return 3
+
+def _join_metrics(names):
+    return names[0] if len(names) == 1 else ", ".join(names[:-1]) + " and " + names[-1]
+
+def landing_penalty(final_metrics, threshold_metrics):
+    """computeLandingPenalty: (grade steps, reasons)"""
+    steps = 0
+    reasons = []
+    for phase, metrics, severities in ((FINAL, final_metrics, FINAL_SEVERITY),
+                                       (THRESHOLD, threshold_metrics, THRESHOLD_SEVERITY)):
+        if not metrics:
+            continue
+        by_severity = {}
+        for label, key, limits in severities:
+            severity = classify_severity(metrics.get(key), *limits)
+            if severity > 0:
+                s = PHASE_BASE_STEPS[phase] + severity
+                steps += s
+                bust = by_severity.setdefault(severity, {"metrics": [], "steps": 0})
+                bust["metrics"].append(label)
+                bust["steps"] += s
+        for severity in sorted(by_severity, reverse=True):
+            bust = by_severity[severity]
+            reasons.append(f"{SEVERITY_NAMES[severity]} {_join_metrics(bust['metrics'])} bust in "
+                           f"{phase.capitalize()} Phase: -{bust['steps']} grade step"
+                           f"{'s' if bust['steps'] != 1 else ''}")
+    return steps, reasons
+
+def grade_limits(phase, skill_level="acs"):
+    """(metrics x 12) grade limits for a phase at a skill level (getThreshold)"""
+    multipliers = SKILL_MULTIPLIERS.get((skill_level or "acs").lower(), {})
+    return np.array([[limit * (multipliers.get(metric) or 1.0) for limit in ACS_THRESHOLDS[phase][metric]]
+                     for metric in METRICS])
+
+# Vectorized runway geometry (same formulas as landing_phase)
+
+def _normalize_angles(angle):
+    angle = np.fmod(angle, 360.0)
+    return np.where(angle > 180, angle - 360.0, np.where(angle < -180, angle + 360.0, angle))
+
+def _distances_nm(lat, lon, point):
+    d_lat = np.radians(point.lat - lat)
+    d_lon = np.radians(point.lon - lon)
+    h = np.sin(d_lat / 2) ** 2 + np.cos(np.radians(lat)) * point.cos_lat * np.sin(d_lon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(h), np.sqrt(1 - h)) * KM_TO_NM
+
+def _bearings_from(point, lat, lon):
+    phi = np.radians(lat)
+    d_lon = np.radians(lon - point.lon)
+    y = np.sin(d_lon) * np.cos(phi)
+    x = point.cos_lat * np.sin(phi) - point.sin_lat * np.cos(phi) * np.cos(d_lon)
+    return (np.degrees(np.arctan2(y, x)) + 360) % 360
+
+def runway_channels(columns, runway):
+    """
+    RUNWAY_CHANNELS (distance to threshold, lateral offset, glidepath
+    deviation) for whole columns: RunwayFrame.channels on arrays
+    """
+    _need_numpy()
+    frame = parse_runway(runway).frame
+    lat = np.asarray(columns["lat"], dtype=float)
+    lon = np.asarray(columns["lon"], dtype=float)
+    alt_ft = np.asarray(columns["alt_ft"], dtype=float)
+    return dict(zip(RUNWAY_CHANNELS, frame.channels(lat, lon, alt_ft)))
+
+def detect_phases(columns, runway):
+    """
+    detectLandingPhase for whole columns, as phase codes (index into
+    (NONE,) + PHASES). Ground samples are NONE: rollout needs the previous
+    phase and is never graded.
+    """
+    _need_numpy()
+    lat = np.asarray(columns["lat"], dtype=float)
+    lon = np.asarray(columns["lon"], dtype=float)
+    alt_ft = np.asarray(columns["alt_ft"], dtype=float)
+    hdg = np.nan_to_num(np.asarray(columns["hdg_true"], dtype=float))
+    on_ground = np.nan_to_num(np.asarray(columns["on_ground"], dtype=float)) != 0
+
+    with np.errstate(invalid="ignore"):
+        to_threshold = _distances_nm(lat, lon, runway.threshold)
+        agl = alt_ft - runway.field_elevation
+        off_centerline = _normalize_angles(_bearings_from(runway.threshold, lat, lon) - runway.centerline)
+        lateral = np.abs(to_threshold * np.sin(np.radians(off_centerline)))
+        heading_dev = np.abs(_normalize_angles(hdg - runway.heading))
+        perpendicular_dev = np.minimum(np.abs(_normalize_angles(hdg - runway.perpendicular)),
+                                       np.abs(_normalize_angles(hdg - (runway.perpendicular + 180))))
+        downwind_dev = np.abs(_normalize_angles(hdg - runway.reciprocal))
+
+        valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnan(alt_ft) | on_ground)
+        threshold = (to_threshold < 0.1) & (agl > 10) & (agl < 100)
+        final = (to_threshold > 0.1) & (to_threshold < 5.0) & (heading_dev < 30) & (lateral < 0.5)
+        base = ((to_threshold > 0.5) & (to_threshold < 3.0) & (perpendicular_dev < 60)
+                & (lateral > 0.3) & (lateral < 1.5) & (agl > 300) & (agl < 1500))
+        downwind = ((downwind_dev < 30) & (lateral > 0.5) & (lateral < 1.5) & (agl > 800) & (agl < 1300)
+                    & (_distances_nm(lat, lon, runway.opposite_end) < 2.0))
+
+    return np.select([~valid, threshold, final, base, downwind],
+                     [_PHASE_CODES[NONE], _PHASE_CODES[THRESHOLD], _PHASE_CODES[FINAL],
+                      _PHASE_CODES[BASE], _PHASE_CODES[DOWNWIND]],
+                     _PHASE_CODES[NONE]).astype(np.int8)
+
+def _thin(ts, interval):
+    """Indices of the samples kept when taking one at least interval after the last"""
+    if interval <= 0 or len(ts) == 0:
+        return np.arange(len(ts))
+    # Where the next sample would be taken from each sample, then one hop per kept sample
+    following = np.searchsorted(ts, ts + interval, side="left").tolist()
+    keep = []
+    i = 0
+    while i < len(following):
+        keep.append(i)
+        i = following[i]
+    return np.array(keep, dtype=np.intp)
+
+def landing_samples(columns, runway, vref=DEFAULT_VREF, interval=SAMPLE_INTERVAL):
+    """
+    Deviation samples from recorded columns (dict of arrays as returned by
+    FlightRecording.slice), as a dict of SAMPLE_COLUMNS arrays.
+    """
+    _need_numpy()
+    runway = parse_runway(runway)
+    if runway is None:
+        raise ValueError("grading a landing needs a runway")
+
+    ts = np.asarray(columns["ts"], dtype=float)
+    ias = np.asarray(columns["ias_kt"], dtype=float)
+    airborne = np.nan_to_num(np.asarray(columns["on_ground"], dtype=float)) == 0
+    with np.errstate(invalid="ignore"):
+        path = np.flatnonzero(airborne & (ias > MIN_SPEED_KT))
+    path = path[_thin(ts[path], interval)]
+
+    lat = np.asarray(columns["lat"], dtype=float)[path]
+    lon = np.asarray(columns["lon"], dtype=float)[path]
+    to_threshold = _distances_nm(lat, lon, runway.threshold)
+    with np.errstate(invalid="ignore"):
+        near = to_threshold < APPROACH_NM
+    index = path[near]
+    to_threshold = to_threshold[near]
+
+    picked = {name: np.asarray(columns[name], dtype=float)[index] for name in GRADER_COLUMNS}
+    glidepath_msl = to_threshold * FT_PER_NM * math.tan(math.radians(GLIDEPATH_DEG)) + runway.field_elevation
+    off_centerline = _normalize_angles(_bearings_from(runway.threshold, picked["lat"], picked["lon"])
+                                       - runway.centerline)
+    pitch = np.nan_to_num(picked["pitch_deg"])
+    return {
+        "ts": picked["ts"],
+        "phase": detect_phases(picked, runway),
+        "altDev": picked["alt_ft"] - glidepath_msl,
+        "lateralDev": np.abs(to_threshold * np.sin(np.radians(off_centerline))),
+        "speedDev": picked["ias_kt"] - (vref + 5),
+        "bankAbs": np.abs(np.nan_to_num(picked["bank_deg"])),
+        "pitchDev": pitch - TARGET_PITCH_DEG,
+        "pitchAbs": np.abs(pitch),
+    }
+
+def samples_from_dicts(samples):
+    """Deviation samples from the dashboard's sample objects (landingDeviations.samples)"""
+    _need_numpy()
+
+    def column(key):
+        return np.array([s.get(key) if s.get(key) is not None else np.nan for s in samples], dtype=float)
+
+    codes = [_PHASE_CODES.get(str(s.get("phase") or "").lower(), _PHASE_CODES[NONE]) for s in samples]
+    arrays = {"ts": column("timestamp") / 1000.0, "phase": np.array(codes, dtype=np.int8)}
+    for key in SAMPLE_COLUMNS[2:]:
+        arrays[key] = column(key)
+    return arrays
+
+def _empty_result(note):
+    return {
+        "finalGrade": "F",
+        "phaseGrades": {},
+        "breakdown": {},
+        "maxByPhase": {},
+        "bust": {FINAL: False, THRESHOLD: False},
+        "notes": [note],
+        "bustSeconds": {},
+        "phaseSamples": {},
+    }
+
+def grade_samples(samples, skill_level="acs"):
+    """gradeLandingPathPhaseBased over deviation sample arrays"""
+    _need_numpy()
+    phase = samples["phase"]
+    if len(phase) == 0:
+        return _empty_result("No samples collected")
+
+    # JavaScript treats missing deviations as 0 (sample.altDev || 0)
+    lateral_ft = np.nan_to_num(samples["lateralDev"]) * FT_PER_NM
+    signed = np.column_stack([np.nan_to_num(samples["altDev"]), lateral_ft,
+                              np.nan_to_num(samples["speedDev"]), np.nan_to_num(samples["bankAbs"]),
+                              np.nan_to_num(samples["pitchDev"])])
+    magnitudes = np.abs(signed)
+    magnitudes[:, 4] = np.nan_to_num(samples["pitchAbs"])
+    ts = samples["ts"]
+    dt = np.minimum(np.diff(ts, append=ts[-1]), MAX_SAMPLE_GAP)
+
+    results = {}
+    bust_seconds = {}
+    phase_samples = {}
+    for name in PHASES:
+        mask = phase == _PHASE_CODES[name]
+        count = int(np.count_nonzero(mask))
+        if count < MIN_PHASE_SAMPLES:
+            continue
+        phase_samples[name] = count
+        values = magnitudes[mask]
+        # First sample with the largest magnitude, like the JavaScript's strict >
+        first = values.argmax(axis=0)
+        maxima = np.maximum(values[first, np.arange(len(METRICS))], 0.0)
+        at_max = signed[mask][first, np.arange(len(METRICS))]
+        at_max = np.where(maxima > 0, at_max, 0.0)
+
+        grades = [GRADE_ORDER[int(i)] for i in
+                  (np.searchsorted(limits, value) for limits, value in zip(grade_limits(name, skill_level), maxima))]
+        breakdown = dict(zip(METRICS, grades))
+        points = {metric: 12 - GRADE_ORDER.index(grade) for metric, grade in breakdown.items()}
+        phase_points = (points["altitude"] * METRIC_WEIGHTS["altitude"]
+                        + points["lateral"] * METRIC_WEIGHTS["lateral"]
+                        + points["speed"] * METRIC_WEIGHTS["speed"]
+                        + points["bank"] * METRIC_WEIGHTS["bank"]
+                        + points["pitch"] * METRIC_WEIGHTS["pitch"])
+        maxima = maxima.tolist()
+        at_max = at_max.tolist()
+        results[name] = {
+            "grade": points_to_grade(phase_points),
+            "breakdown": breakdown,
+            "max": {
+                "altitudeFt": maxima[0], "lateralFt": maxima[1], "speedKt": maxima[2],
+                "bankDeg": maxima[3], "pitchDeg": maxima[4],
+            },
+            "signed": {"altitudeFt": at_max[0], "lateralFt": at_max[1], "speedKt": at_max[2],
+                       "pitchDeg": at_max[4]},
+            "points": phase_points,
+        }
+
+        limits = BUST_LIMITS.get(name)
+        if limits is not None:
+            over = ((magnitudes[:, 0] > limits["altitude"]) | (magnitudes[:, 1] > limits["lateral"])
+                    | (magnitudes[:, 2] > limits["speed"]) | (magnitudes[:, 3] > limits["bank"]))
+            bust_seconds[name] = float(dt[mask & over].sum())
+
+    if not results:
+        return _empty_result("No valid phase data collected")
+
+    total_weight = 0.0
+    weighted_points = 0.0
+    for name, result in results.items():
+        total_weight += PHASE_WEIGHTS[name]
+        weighted_points += result["points"] * PHASE_WEIGHTS[name]
+    base_final_grade = points_to_grade(weighted_points / total_weight if total_weight > 0 else 0)
+
+    bust = {FINAL: False, THRESHOLD: False}
+    final_metrics = threshold_metrics = None
+    if FINAL in results:
+        m = results[FINAL]["max"]
+        limits = BUST_LIMITS[FINAL]
+        bust[FINAL] = (m["altitudeFt"] > limits["altitude"] or m["lateralFt"] > limits["lateral"]
+                       or m["speedKt"] > limits["speed"] or m["bankDeg"] > limits["bank"])
+        final_metrics = {"altDevAbs": m["altitudeFt"], "lateralDevAbsNm": m["lateralFt"] / FT_PER_NM,
+                         "speedDevAbsKt": m["speedKt"], "bankAbsDeg": m["bankDeg"]}
+    if THRESHOLD in results:
+        m = results[THRESHOLD]["max"]
+        limits = BUST_LIMITS[THRESHOLD]
+        bust[THRESHOLD] = (m["altitudeFt"] > limits["altitude"] or m["lateralFt"] > limits["lateral"]
+                           or m["speedKt"] > limits["speed"] or m["bankDeg"] > limits["bank"])
+        threshold_metrics = {"altDevAbs": m["altitudeFt"], "speedDevAbsKt": m["speedKt"], "vsAbsFpm": None}
+
+    steps, reasons = landing_penalty(final_metrics, threshold_metrics)
+    final_grade = apply_penalty(base_final_grade, steps) if steps > 0 else base_final_grade
+
+    return {
+        "finalGrade": final_grade,
+        "baseFinalGrade": base_final_grade,
+        "phaseGrades": {name: r["grade"] for name, r in results.items()},
+        "breakdown": {name: r["breakdown"] for name, r in results.items()},
+        "maxByPhase": {name: {**r["max"], **r["signed"]} for name, r in results.items()},
+        "bust": bust,
+        "notes": list(reasons),
+        "penaltySteps": steps,
+        "penaltyReasons": reasons,
+        "bustSeconds": bust_seconds,
+        "phaseSamples": phase_samples,
+    }
+
+def recording_samples(recording, runway, vref=DEFAULT_VREF, interval=SAMPLE_INTERVAL, start=None, end=None):
+    """Deviation samples from a FlightRecording, optionally within start <= ts <= end"""
+    columns = recording.slice(-math.inf if start is None else start, math.inf if end is None else end,
+                              GRADER_COLUMNS)
+    return landing_samples(columns, runway, vref, interval)
+
+def grade_recording(recording, runway, skill_level="acs", vref=DEFAULT_VREF, interval=SAMPLE_INTERVAL,
+                    start=None, end=None):
+    """Grade the landing in a FlightRecording"""
+    return grade_samples(recording_samples(recording, runway, vref, interval, start, end), skill_level)
+
+def compact_result(result):
+    """The parts of a result worth keeping in a regrade index"""
+    compact = {"grade": result["finalGrade"], "phases": result["phaseGrades"]}
+    if result.get("penaltySteps"):
+        compact["penalty"] = result["penaltySteps"]
+    busts = {phase: round(seconds, 1) for phase, seconds in result.get("bustSeconds", {}).items() if seconds}
+    if busts:
+        compact["bustSeconds"] = busts
+    return compact
+
+def ruleset():
+    """Everything a grade depends on; regrade_flights hashes it to spot changed tolerances"""
+    return {
+        "version": RULESET_VERSION,
+        "thresholds": ACS_THRESHOLDS,
+        "skills": SKILL_MULTIPLIERS,
+        "phase_weights": PHASE_WEIGHTS,
+        "metric_weights": METRIC_WEIGHTS,
+        "min_phase_samples": MIN_PHASE_SAMPLES,
+        "bust_limits": BUST_LIMITS,
+        "severity": [FINAL_SEVERITY, THRESHOLD_SEVERITY, PHASE_BASE_STEPS],
+        "sampling": [SAMPLE_INTERVAL, MIN_SPEED_KT, APPROACH_NM, GLIDEPATH_DEG, TARGET_PITCH_DEG],
+    }
+
+# JavaScript the parity check grades with, from ReactRoot/src/utils
+JS_MODULES = ("landingGradingScale", "landingPenalty", "landingSeverity", "gradeMath")
+
+# Parity check sample sets that once disagreed: a final phase graded F, F,
+# D-, D-, D- scores 0.35 + 0.1 + 0.05 = 0.49999999999999994 points, which
+# Math.round takes down to F
+JS_EDGE_CASES = (
+    [{"ts": i * 0.5, "phase": FINAL, "altDev": 1000.0, "lateralDev": 1.0, "speedDev": 27.0,
+      "bankAbs": 37.0, "pitchDev": 17.0, "pitchAbs": 17.0} for i in range(MIN_PHASE_SAMPLES)],
+)
+
+def _random_sample_set(rng):
+    """Deviation samples spread across every grade, with some nulls"""
+    def value(scale):
+        return None if rng.random() < 0.02 else rng.uniform(-scale, scale)
+
+    samples = []
+    ts = 0.0
+    for _ in range(rng.randint(0, 80)):
+        ts += rng.choice((0.5, 0.5, 0.5, 1.0, 10.0))
+        pitch_dev = value(20)
+        samples.append({
+            "ts": ts, "phase": rng.choice((NONE,) + PHASES),
+            "altDev": value(700), "lateralDev": value(0.8), "speedDev": value(40),
+            "bankAbs": None if rng.random() < 0.02 else rng.uniform(0, 80),
+            "pitchDev": pitch_dev, "pitchAbs": None if pitch_dev is None else abs(pitch_dev),
+        })
+    return samples
+
+def _sample_columns(samples):
+    """JavaScript sample objects as grade_samples arrays (null is NaN)"""
+    columns = {name: np.array([math.nan if s[name] is None else s[name] for s in samples], dtype=float)
+               for name in SAMPLE_COLUMNS if name != "phase"}
+    columns["phase"] = np.array([_PHASE_CODES[s["phase"]] for s in samples], dtype=np.int8)
+    return columns
+
+def check_js(count=400, seed=1):
+    """
+    Grade JS_EDGE_CASES and count random sample sets at every skill level
+    here and with gradeLandingPathPhaseBased under node, and return the
+    (skill, samples, python, javascript) grades that differ.
+    """
+    from js_parity import run_node
+
+    _need_numpy()
+    rng = random.Random(seed)
+    sets = list(JS_EDGE_CASES) + [_random_sample_set(rng) for _ in range(count)]
+    expected = run_node(JS_MODULES, (
+        "import { gradeLandingPathPhaseBased } from './landingGradingScale.mjs'\n"
+        "console.log(JSON.stringify(data.sets.map(samples => data.skills.map(skillLevel => {\n"
+        "  const r = gradeLandingPathPhaseBased({ samples, skillLevel })\n"
+        "  return [r.finalGrade, r.phaseGrades, r.breakdown, r.bust]\n"
+        "}))))\n"), {"sets": sets, "skills": SKILL_LEVELS})
+
+    mismatches = []
+    for samples, js_grades in zip(sets, expected):
+        columns = _sample_columns(samples)
+        for skill, js in zip(SKILL_LEVELS, js_grades):
+            r = grade_samples(columns, skill)
+            ours = [r["finalGrade"], r["phaseGrades"], r["breakdown"], r["bust"]]
+            if ours != js:
+                mismatches.append((skill, samples, ours, js))
+    return mismatches
+
+def main():
+    from flight_recorder import FlightRecording
+
+    parser = argparse.ArgumentParser(description="Grade the landing in a recorded flight")
+    parser.add_argument("recording", nargs="?", help="flight-*.flight file written by the bridge recorder")
+    parser.add_argument("--runway", default="27", help="27 (KJKA) or THR_LAT,THR_LON,END_LAT,END_LON[,HEADING]")
+    parser.add_argument("--skill", choices=SKILL_LEVELS, default="acs", help="grading scale")
+    parser.add_argument("--vref", type=float, default=DEFAULT_VREF, help="Vref in knots (target is Vref + 5)")
+    parser.add_argument("--start", type=float, help="first recorded ts to grade")
+    parser.add_argument("--end", type=float, help="last recorded ts to grade")
+    parser.add_argument("--check-js", type=int, metavar="N",
+                        help="grade N random sample sets here and under node and compare")
+    args = parser.parse_args()
+
+    if args.check_js is not None:
+        mismatches = check_js(args.check_js)
+        for skill, samples, ours, js in mismatches[:5]:
+            print(f"❌ {skill}, {len(samples)} samples: {ours} vs JavaScript {js}")
+        total = (len(JS_EDGE_CASES) + args.check_js) * len(SKILL_LEVELS)
+        print(f"{total - len(mismatches)}/{total} gradings match the JavaScript")
+        return 1 if mismatches else 0
+    if args.recording is None:
+        parser.error("a recording is needed unless --check-js is given")
+
+    with FlightRecording(args.recording) as recording:
+        began = time.perf_counter()
+        result = grade_recording(recording, args.runway, args.skill, args.vref, start=args.start, end=args.end)
+        elapsed = time.perf_counter() - began
+    print(json.dumps(result, indent=2))
+    print(f"Read and graded {len(recording)} samples in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+if __name__ == "__main__":
+    sys.exit(main())
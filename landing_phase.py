@@ -0,0 +1,386 @@
+"""
+Landing phase detection
+Streaming port of detectLandingPhase (ReactRoot/src/utils/landingStandards.js)
+so the bridge works out the landing phase once per sample for every viewer,
+instead of each browser tab redoing it from the raw stream.
+
+The detector runs in the bridge core against the selected runway and adds
+{"landing": {"phase": "final", "from": "base"}} to the sample where the
+phase changes. Phases, thresholds and the distance/bearing math match the
+JavaScript, including its use of the KJKA field elevation for height above
+the field on the dashboard's runways; runways from a runway database use
+their own threshold elevation. Per sample it costs a handful of trig calls;
+everything that only depends on the runway is computed once.
+
+With a runway selected, every sample also gets runway channels from a
+RunwayFrame: distance to the threshold, signed offset from the extended
+centerline and height above the 3° glidepath from the threshold (at the
+threshold elevation when the runway gives one). The frame is a local
+east/north plane at the threshold on the WGS84 ellipsoid, set up once per
+runway, so the channels cost a few multiply-adds per sample.
+"""
+
+import math
+
+EARTH_RADIUS_KM = 6371.0
+KM_TO_NM = 0.539957
+
+# WGS84 ellipsoid, for the runway frame
+WGS84_A = 6378137.0  # semi-major axis, m
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+FT_PER_M = 1 / 0.3048
+FT_PER_NM = 1852 * FT_PER_M
+GLIDEPATH_DEG = 3.0
+
+# LANDING_PHASES
+NONE = "none"
+DOWNWIND = "downwind"
+BASE = "base"
+FINAL = "final"
+THRESHOLD = "threshold"
+ROLLOUT = "rollout"
+COMPLETE = "complete"
+
+# JKA_AIRPORT
+JKA_ELEVATION = 17  # ft MSL, used for AGL on the dashboard's runways like the dashboard
+JKA_RUNWAY_27 = {
+    "heading": 270,
+    "threshold": {"lat": 30.2958, "lon": -87.6875, "elevation": 17},
+    "oppositeEnd": {"lat": 30.2899, "lon": -87.6720},
+    "length": 6969,
+    "width": 98,
+}
+
+def normalize_angle(angle):
+    """normalizeAngle: wrap to -180..180 (180 and -180 both stay)"""
+    angle = math.fmod(angle, 360.0)
+    if angle > 180:
+        angle -= 360.0
+    elif angle < -180:
+        angle += 360.0
+    return angle
+
+class _Point:
+    """A position with the trig the haversine and bearing formulas reuse"""
+
+    __slots__ = ("lat", "lon", "sin_lat", "cos_lat")
+
+    def __init__(self, lat, lon):
+        self.lat = lat
+        self.lon = lon
+        phi = math.radians(lat)
+        self.sin_lat = math.sin(phi)
+        self.cos_lat = math.cos(phi)
+
+def distance_nm(a, b):
+    """calculateDistance: haversine distance in NM"""
+    d_lat = math.radians(b.lat - a.lat)
+    d_lon = math.radians(b.lon - a.lon)
+    h = (math.sin(d_lat / 2) ** 2
+         + a.cos_lat * b.cos_lat * math.sin(d_lon / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(h), math.sqrt(1 - h)) * KM_TO_NM
+
+def bearing_deg(a, b):
+    """calculateBearing: initial bearing from a to b, 0..360"""
+    d_lon = math.radians(b.lon - a.lon)
+    y = math.sin(d_lon) * b.cos_lat
+    x = a.cos_lat * b.sin_lat - a.sin_lat * b.cos_lat * math.cos(d_lon)
+    return (math.degrees(math.atan2(y, x)) + 360) % 360
+
+def ecef(lat, lon, alt_m=0.0):
+    """Earth-centred, earth-fixed x, y, z in metres for a WGS84 position"""
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    sin_phi = math.sin(phi)
+    n = WGS84_A / math.sqrt(1 - WGS84_E2 * sin_phi * sin_phi)
+    return ((n + alt_m) * math.cos(phi) * math.cos(lam),
+            (n + alt_m) * math.cos(phi) * math.sin(lam),
+            (n * (1 - WGS84_E2) + alt_m) * sin_phi)
+
+class RunwayFrame:
+    """
+    East/north/up frame at a runway threshold.
+
+    The ECEF position and ENU basis of the threshold, the centerline unit
+    vector (threshold to opposite end, in that basis) and the tangent plane's
+    scale and curvature terms there are computed once. Positions near the
+    field then map onto the plane with a few multiply-adds, within a couple
+    of feet of the exact transform inside the 5 NM the landing pages look at.
+    """
+
+    def __init__(self, threshold, opposite_end, elevation_ft=JKA_ELEVATION):
+        self.lat = threshold.lat
+        self.lon = threshold.lon
+        self.elevation_ft = elevation_ft
+        phi = math.radians(self.lat)
+        lam = math.radians(self.lon)
+        sin_phi, cos_phi = math.sin(phi), math.cos(phi)
+        sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+        self.origin = ecef(self.lat, self.lon)
+        self.east = (-sin_lam, cos_lam, 0.0)
+        self.north = (-sin_phi * cos_lam, -sin_phi * sin_lam, cos_phi)
+        self.up = (cos_phi * cos_lam, cos_phi * sin_lam, sin_phi)
+
+        # Meridian and prime vertical radii of curvature at the threshold
+        w = math.sqrt(1 - WGS84_E2 * sin_phi * sin_phi)
+        meridian = WGS84_A * (1 - WGS84_E2) / w ** 3
+        prime_vertical = WGS84_A / w
+        self.ft_per_deg_lat = math.radians(meridian) * FT_PER_M
+        self.ft_per_deg_lon = math.radians(prime_vertical * cos_phi) * FT_PER_M
+        # First-order change of the longitude scale with latitude (meridians converge)
+        self.lon_scale_per_deg_lat = -math.radians(math.tan(phi))
+        # Parallels curve away from the tangent plane's east axis towards the pole
+        self.parallel_curvature = math.tan(phi) / (2 * prime_vertical * FT_PER_M)
+
+        east, north, _ = self.enu(opposite_end.lat, opposite_end.lon)
+        length = math.hypot(east, north)
+        if not length:
+            raise ValueError("runway threshold and opposite end are the same point")
+        self.length_ft = length
+        self.along = (east / length, north / length)  # centerline unit vector, landing direction
+        self.glidepath_slope = math.tan(math.radians(GLIDEPATH_DEG))
+
+    def enu(self, lat, lon, alt_ft=0.0):
+        """Exact east, north, up in feet from the threshold"""
+        x, y, z = ecef(lat, lon, alt_ft / FT_PER_M)
+        dx, dy, dz = x - self.origin[0], y - self.origin[1], z - self.origin[2]
+        return tuple((b[0] * dx + b[1] * dy + b[2] * dz) * FT_PER_M for b in (self.east, self.north, self.up))
+
+    def plane(self, lat, lon):
+        """
+        East and north in feet from the threshold on the tangent plane.
+        Plain arithmetic, so lat and lon can be NumPy arrays too.
+        """
+        d_lat = lat - self.lat
+        east = (lon - self.lon) * self.ft_per_deg_lon * (1 + d_lat * self.lon_scale_per_deg_lat)
+        return east, d_lat * self.ft_per_deg_lat + east * east * self.parallel_curvature
+
+    def channels(self, lat, lon, alt_ft):
+        """
+        (distance to threshold NM, lateral offset ft, glidepath deviation ft).
+        The offset is positive right of the extended centerline looking from
+        the threshold towards the opposite end; the glidepath deviation is
+        altitude above a 3° path over the threshold distance, as the Landing
+        page measures it. Like plane(), works on NumPy arrays as well
+        (landing_grader.runway_channels).
+        """
+        east, north = self.plane(lat, lon)
+        along_e, along_n = self.along
+        distance_ft = (east * east + north * north) ** 0.5
+        lateral_ft = east * along_n - north * along_e
+        glidepath_dev = None
+        if alt_ft is not None:
+            glidepath_dev = alt_ft - self.elevation_ft - distance_ft * self.glidepath_slope
+        return distance_ft / FT_PER_NM, lateral_ft, glidepath_dev
+
+class Runway:
+    """
+    A runway as the dashboard describes it: threshold, opposite end and
+    heading (the landing direction). Accepts the dashboard's runway objects
+    ({"heading", "threshold": {"lat", "lon", "elevation"}, "oppositeEnd": {...}}).
+    elevation is the threshold's in ft MSL, when known. field_elevation is
+    what phase detection measures height above the field from: KJKA's for
+    the dashboard's runways, like detectLandingPhase.
+    """
+
+    def __init__(self, threshold, opposite_end, heading=None, name=None, length=None, width=None,
+                 elevation=None, field_elevation=JKA_ELEVATION):
+        self.threshold = _Point(*threshold)
+        self.opposite_end = _Point(*opposite_end)
+        self.centerline = bearing_deg(self.threshold, self.opposite_end)
+        self.heading = self.centerline if heading is None else float(heading)
+        self.name = name
+        self.length = length
+        self.width = width
+        self.elevation = None if elevation is None else float(elevation)
+        self.field_elevation = field_elevation
+        self.perpendicular = (self.heading + 90) % 360
+        self.reciprocal = (self.heading + 180) % 360
+        self.frame = RunwayFrame(self.threshold, self.opposite_end,
+                                 JKA_ELEVATION if self.elevation is None else self.elevation)
+
+    @classmethod
+    def from_dict(cls, runway, name=None):
+        threshold = runway["threshold"]
+        opposite_end = runway["oppositeEnd"]
+        return cls((float(threshold["lat"]), float(threshold["lon"])),
+                   (float(opposite_end["lat"]), float(opposite_end["lon"])),
+                   runway.get("heading"), name=name or runway.get("name"),
+                   length=runway.get("length"), width=runway.get("width"),
+                   elevation=threshold.get("elevation"))
+
+    def to_dict(self):
+        runway = {
+            "heading": self.heading,
+            "threshold": {"lat": self.threshold.lat, "lon": self.threshold.lon},
+            "oppositeEnd": {"lat": self.opposite_end.lat, "lon": self.opposite_end.lon},
+        }
+        if self.elevation is not None:
+            runway["threshold"]["elevation"] = self.elevation
+        for key in ("name", "length", "width"):
+            if getattr(self, key) is not None:
+                runway[key] = getattr(self, key)
+        return runway
+
+def parse_runway(value):
+    """
+    Runway from a setting: "27" (KJKA runway 27), "THR_LAT,THR_LON,END_LAT,END_LON"
+    optionally followed by ",HEADING", or a dashboard runway dict. None and ""
+    mean no runway.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, Runway):
+        return value
+    if isinstance(value, dict):
+        return Runway.from_dict(value)
+    text = str(value).strip()
+    if text.upper() in ("27", "KJKA 27", "KJKA27", "JKA 27", "JKA27"):
+        return Runway.from_dict(JKA_RUNWAY_27, name="KJKA 27")
+    parts = [float(p) for p in text.split(",")]
+    if len(parts) not in (4, 5):
+        raise ValueError(f"Unknown runway {value!r}: use 27 or THR_LAT,THR_LON,END_LAT,END_LON[,HEADING]")
+    return Runway(parts[0:2], parts[2:4], parts[4] if len(parts) == 5 else None)
+
+def detect_phase(sample, runway, previous=NONE):
+    """detectLandingPhase for one payload"""
+    if not sample or runway is None:
+        return NONE
+    lat = sample.get("lat")
+    lon = sample.get("lon")
+    alt_ft = sample.get("alt_ft")
+    if lat is None or lon is None or alt_ft is None:
+        return NONE
+    # A null heading is 0 in the JavaScript arithmetic
+    hdg_true = sample.get("hdg_true") or 0.0
+
+    aircraft = _Point(lat, lon)
+    distance_to_threshold = distance_nm(aircraft, runway.threshold)
+
+    if sample.get("on_ground"):
+        if distance_to_threshold < 2.0 and previous in (ROLLOUT, THRESHOLD):
+            return ROLLOUT
+        return NONE
+
+    altitude_agl = alt_ft - runway.field_elevation
+
+    if distance_to_threshold < 0.1 and 10 < altitude_agl < 100:
+        return THRESHOLD
+
+    # Lateral deviation from the extended centerline (calculateLateralDeviation)
+    off_centerline = normalize_angle(bearing_deg(runway.threshold, aircraft) - runway.centerline)
+    lateral_dev = abs(distance_to_threshold * math.sin(math.radians(off_centerline)))
+    heading_dev = abs(normalize_angle(hdg_true - runway.heading))
+
+    if 0.1 < distance_to_threshold < 5.0 and heading_dev < 30 and lateral_dev < 0.5:
+        return FINAL
+
+    perpendicular_dev = min(abs(normalize_angle(hdg_true - runway.perpendicular)),
+                            abs(normalize_angle(hdg_true - (runway.perpendicular + 180))))
+    if (0.5 < distance_to_threshold < 3.0 and perpendicular_dev < 60
+            and 0.3 < lateral_dev < 1.5 and 300 < altitude_agl < 1500):
+        return BASE
+
+    downwind_dev = abs(normalize_angle(hdg_true - runway.reciprocal))
+    if (downwind_dev < 30 and 0.5 < lateral_dev < 1.5 and 800 < altitude_agl < 1300
+            and distance_nm(aircraft, runway.opposite_end) < 2.0):
+        return DOWNWIND
+
+    return NONE
+
+# Runway setting that lets a runway database pick the runway
+AUTO = "auto"
+
+# Per-sample runway channels (RunwayFrame.channels)
+RUNWAY_CHANNELS = ("rwy_dist_nm", "rwy_lateral_ft", "gp_dev_ft")
+
+class LandingPhaseDetector:
+    """
+    Bridge processor tracking the landing phase sample by sample.
+
+    process() returns the RUNWAY_CHANNELS for every sample with a position
+    and {"landing": {"phase", "from"}} when the phase changes.
+    LAN clients can pick the runway and ask for the current phase with
+    {"type": "landing", "runway": "27" | "auto" | {dashboard runway}}; the
+    reply carries the phase and runway.
+
+    With runway "auto" and a runway database (a runway_index.RunwayIndex),
+    every airborne sample looks up the runway the aircraft is lined up with.
+    A different one replaces the current runway and is announced as
+    {"landing": {"runway": {...}}}; samples that line up with nothing (the
+    pattern legs) keep the last one.
+    """
+
+    name = "landing"
+
+    def __init__(self, runway=None, runways=None):
+        self.runways = runways
+        self.changes = 0
+        self.runway_changes = 0
+        self.set_runway(runway)
+
+    def set_runway(self, runway):
+        """Switch runway; a bad setting raises and leaves the current one in use"""
+        auto = isinstance(runway, str) and runway.strip().lower() == AUTO
+        if auto and self.runways is None:
+            raise ValueError("auto needs a runway database")
+        parsed = None if auto else parse_runway(runway)
+        self.auto = auto
+        self.runway = parsed
+        self._end = None
+        self.phase = NONE
+
+    def _pick_runway(self, lat, lon, hdg):
+        end = self.runways.nearest_aligned(lat, lon, hdg)
+        if end is None or end is self._end:
+            return None
+        self._end = end
+        self.runway = end.runway
+        self.phase = NONE
+        self.runway_changes += 1
+        return {"runway": self.runway.to_dict()}
+
+    def process(self, payload):
+        lat = payload.get("lat")
+        lon = payload.get("lon")
+        event = None
+        if self.auto and lat is not None and lon is not None and not payload.get("on_ground"):
+            event = self._pick_runway(lat, lon, payload.get("hdg_true") or 0.0)
+        if self.runway is None:
+            return None
+        result = {"landing": event} if event else None
+        if lat is not None and lon is not None:
+            result = result or {}
+            result.update(zip(RUNWAY_CHANNELS, self.runway.frame.channels(lat, lon, payload.get("alt_ft"))))
+        phase = detect_phase(payload, self.runway, self.phase)
+        if phase != self.phase:
+            result = result or {}
+            result.setdefault("landing", {}).update({"phase": phase, "from": self.phase})
+            self.phase = phase
+            self.changes += 1
+        return result
+
+    def control(self, request):
+        if request.get("type") != "landing":
+            return None
+        if "runway" in request:
+            try:
+                self.set_runway(request["runway"])
+            except (KeyError, TypeError, ValueError) as e:
+                return {"type": "error", "msg": f"Bad runway: {e}"}
+        return {
+            "type": "landing",
+            "phase": self.phase,
+            "runway": self.runway.to_dict() if self.runway is not None else None,
+            "auto": self.auto,
+        }
+
+    def summary(self):
+        if self.runway is None:
+            return "waiting for an aligned runway" if self.auto else "no runway selected"
+        name = self.runway.name or f"runway {self.runway.heading:.0f}"
+        text = f"{name}: {self.phase}, {self.changes} phase changes"
+        if self.auto:
+            text += f", {self.runway_changes} runway changes"
+        return text
@@ -0,0 +1,786 @@
+"""
+Maneuver engine
+Streaming port of the steep turn and slow flight pages' auto-start and
+grading (SteepTurn.jsx and SlowFlight.jsx with autoStartTolerances.js and
+steepTurnGrading.js), so the bridge follows a maneuver once for every viewer
+instead of each tab keeping its own sample arrays.
+
+Each tracker keeps running sums, maxima and flags only (plus the last 20
+level samples for the entry baseline), so memory is constant however long
+the maneuver lasts. The bridge adds one event at a time to the payloads:
+
+    {"maneuver": {"event": "start", "type": "steep_turn", "entry": {...}}}
+    {"maneuver": {"event": "progress", "type": "steep_turn", "totalTurn": 182.4, ...}}
+    {"maneuver": {"event": "rollout", ...}}
+    {"maneuver": {"event": "bust", "rule": "alt", "isBusted": true, "percentBad": 0.25, ...}}
+    {"maneuver": {"event": "cancel", "reason": "..."}}
+    {"maneuver": {"event": "result", "finalGrade": "B+", ...}}
+
+The state machines follow the React effects sample by sample, including
+the sample that starts tracking (or rollout) being tracked again in the new
+state. The steep turn re-arms after its result. Slow flight, like the page,
+runs until a client sends {"type": "maneuver", "action": "complete"}.
+
+Grades use the pages' busts (a single sample past a limit). Alongside them,
+progress and result events carry "busting": bustFilter's filtered view per
+rule ({"isBusted", "percentBad", "maxConsecutiveBad"}), and a "bust" event
+goes out once, on the sample where a rule becomes busted by it. Live
+isBusted never goes back to false; the result's also counts bustFilter's
+verdict over the whole maneuver.
+
+ManeuverGrader replays recorded flights through the trackers, so
+regrade_flights.py can regrade every steep turn and slow flight at each
+skill level when the tolerances change.
+"""
+
+import collections
+import math
+
+from bust_filter import MIN_CONSECUTIVE, MIN_PERCENT, MIN_SAMPLES, BustFilter
+from landing_phase import normalize_angle
+
+STEEP_TURN = "steep_turn"
+SLOW_FLIGHT = "slow_flight"
+MANEUVER_TYPES = (STEEP_TURN, SLOW_FLIGHT)
+
+BEGINNER = "beginner"
+NOVICE = "novice"
+ACS = "acs"
+SKILL_LEVELS = (BEGINNER, NOVICE, ACS)
+
+GRADE_ORDER = ("A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D+", "D", "D-", "F")
+
+# Tracker states
+READY = "ready"
+TRACKING = "tracking"
+ROLLOUT = "rollout"
+COMPLETE = "complete"
+
+# Seconds between progress events while tracking
+PROGRESS_SECONDS = 1.0
+
+# AUTO_START_TOLERANCES[steep_turn]: (establishment bank, pass tolerances)
+STEEP_TURN_TOLERANCES = {
+    BEGINNER: (25, {"altitude": 200, "airspeed": 20, "bank": (25, 65), "rolloutHeading": 20}),
+    NOVICE: (35, {"altitude": 150, "airspeed": 15, "bank": (35, 55), "rolloutHeading": 15}),
+    ACS: (40, {"altitude": 100, "airspeed": 10, "bank": (40, 50), "rolloutHeading": 10}),
+}
+
+# AUTO_START_TOLERANCES[slow_flight]: deviations from the reference that
+# count as stable enough to start
+SLOW_FLIGHT_TOLERANCES = {
+    BEGINNER: {"altitude": 500, "airspeed": (-20, 30), "heading": 30, "bank": 20},
+    NOVICE: {"altitude": 250, "airspeed": (-10, 20), "heading": 15, "bank": 15},
+    ACS: {"altitude": 150, "airspeed": (-5, 12), "heading": 12, "bank": 12},
+}
+
+# SLOW_FLIGHT_ACS_STANDARDS: the busts the slow flight page checks
+SLOW_FLIGHT_STANDARDS = {"altitude": 100, "airspeed": (0, 10), "heading": 10, "bank": 10}
+
+# steepTurnGrading GRADING_THRESHOLDS, A+ .. D- (anything more is F). Bank
+# grades need both the average error and the largest deviation in range.
+STEEP_TURN_GRADES = {
+    ACS: {
+        "bank": ((0.5, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10),
+                 (10, 12), (12, 15)),
+        "altitude": (10, 20, 30, 40, 50, 60, 80, 100, 120, 150, 200, 250),
+        "airspeed": (1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 25),
+    },
+    NOVICE: {
+        "bank": ((1, 2), (2, 4), (3, 6), (5, 8), (7, 10), (9, 12), (12, 15), (15, 18), (18, 22), (22, 25),
+                 (25, 30), (30, 35)),
+        "altitude": (20, 40, 60, 80, 100, 120, 150, 180, 220, 250, 300, 350),
+        "airspeed": (2, 4, 6, 8, 10, 12, 15, 18, 22, 25, 30, 35),
+    },
+    BEGINNER: {
+        "bank": ((2, 4), (4, 8), (6, 12), (10, 15), (15, 20), (20, 25), (25, 30), (30, 35), (35, 40),
+                 (40, 45), (45, 50), (50, 55)),
+        "altitude": (40, 80, 120, 160, 200, 240, 280, 320, 360, 400, 450, 500),
+        "airspeed": (4, 8, 12, 16, 20, 24, 28, 32, 36, 40, 45, 50),
+    },
+}
+
+TARGET_BANK = 45
+ROLLOUT_TRIGGER_BANK = TARGET_BANK * 0.5
+ROLLOUT_START_TURN = 325  # degrees turned before a decreasing bank counts as rollout
+WINGS_LEVEL_BANK = 5
+
+# Steep turn auto-start
+LEVEL_BANK = 3  # bank counted as level while waiting
+LEVEL_SECONDS = 1.0  # level this long before a turn can start tracking
+TURN_START_BANK = 5
+BASELINE_SAMPLES = 20  # level samples averaged into the entry
+SIGNIFICANT_BANK = 20  # turn direction and averages
+CANCEL_BANK = 25  # once reached before establishment, dropping below 20 cancels
+LEVEL_CANCEL_SECONDS = 3.0  # established turn cancelled after this long wings level
+BANK_DEV_MIN_TURN = 45  # bank deviation counted between these turn angles...
+BANK_DEV_MAX_TURN = 330
+BANK_DEV_MIN_BANK = 40  # ...at no less than this bank
+
+# Slow flight auto-start
+BASELINE_SECONDS = 0.5
+IN_RANGE_SECONDS = 2.0
+OUT_OF_RANGE_SECONDS = 2.0
+
+def _worse_grade(a, b):
+    if not a:
+        return b
+    if not b:
+        return a
+    return a if GRADE_ORDER.index(a) > GRADE_ORDER.index(b) else b
+
+def _grade(value, limits):
+    for grade, limit in zip(GRADE_ORDER, limits):
+        if value <= limit:
+            return grade
+    return "F"
+
+def _normalize_skill(skill):
+    skill = (skill or ACS).lower()
+    if skill not in SKILL_LEVELS:
+        raise ValueError(f"Unknown skill level {skill!r}, expected one of {SKILL_LEVELS}")
+    return skill
+
+def grade_steep_turn(avg_bank, max_bank_dev, max_alt_dev, max_spd_dev, busted, skill=ACS):
+    """gradeSteepTurn"""
+    grades = STEEP_TURN_GRADES.get(skill, STEEP_TURN_GRADES[ACS])
+    avg_bank_error = abs(avg_bank - TARGET_BANK)
+    bank_dev = abs(max_bank_dev or 0)
+    alt_dev = abs(max_alt_dev or 0)
+    spd_dev = abs(max_spd_dev or 0)
+
+    bank_grade = "F"
+    for grade, (avg_limit, max_limit) in zip(GRADE_ORDER, grades["bank"]):
+        if avg_bank_error <= avg_limit and bank_dev <= max_limit:
+            bank_grade = grade
+            break
+    alt_grade = _grade(alt_dev, grades["altitude"])
+    spd_grade = _grade(spd_dev, grades["airspeed"])
+
+    final_grade = _worse_grade(_worse_grade(bank_grade, alt_grade), spd_grade)
+    if busted["alt"] or busted["spd"]:
+        final_grade = _worse_grade(final_grade, "C-")
+    if busted["bank"]:
+        final_grade = _worse_grade(final_grade, "D")
+    if sum(1 for key in ("alt", "spd", "bank") if busted[key]) >= 2:
+        final_grade = "F"
+
+    return {
+        "finalGrade": final_grade,
+        "breakdown": {"bank": bank_grade, "alt": alt_grade, "spd": spd_grade},
+        "metrics": {"avgBankError": avg_bank_error, "maxBankDev": bank_dev, "maxAltDev": alt_dev,
+                    "maxSpdDev": spd_dev},
+    }
+
+def circular_mean(headings):
+    """Mean heading in 0..360 (an arithmetic mean breaks across north)"""
+    x = sum(math.cos(math.radians(h)) for h in headings)
+    y = sum(math.sin(math.radians(h)) for h in headings)
+    return math.degrees(math.atan2(y, x)) % 360
+
+class _Running:
+    """Count and sum of a value, for averages without keeping the samples"""
+
+    __slots__ = ("count", "total")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+class _Tracker:
+    """Shared plumbing: state, events and throttled progress"""
+
+    type = None
+
+    def __init__(self, skill=ACS):
+        self.skill = _normalize_skill(skill)
+        self.state = READY
+        self.results = 0
+        self.cancels = 0
+        self.entry = None
+        self._events = None
+        self._last_progress = None
+
+    def _emit(self, event, **fields):
+        self._events.append({"event": event, "type": self.type, **fields})
+
+    def _filter_busts(self, flags):
+        for rule in self.busting.update(flags):
+            self._emit("bust", rule=rule, **self.busting.result()[rule])
+
+    def _maybe_progress(self, now):
+        if self.state not in (TRACKING, ROLLOUT) or self._events:
+            return
+        if self._last_progress is None or now - self._last_progress >= PROGRESS_SECONDS:
+            self._last_progress = now
+            self._emit("progress", **self.progress())
+
+    def update(self, sample):
+        """Feed one payload; returns the events it caused (usually none)"""
+        self._events = []
+        now = sample.get("ts") or 0.0
+        self._step(sample, now)
+        self._maybe_progress(now)
+        return self._events
+
+    def _step(self, sample, now):
+        raise NotImplementedError
+
+    def progress(self):
+        raise NotImplementedError
+
+class SteepTurnTracker(_Tracker):
+    """
+    Steep turn auto-start, 360 degree completion and grading (SteepTurn.jsx).
+
+    Waits for a second of level flight, averages the last level samples into
+    the entry, starts when the bank passes 5 degrees, cancels on the page's
+    rules, enters rollout after 325 degrees of turn once the bank decreases
+    from above 22.5 degrees, and grades when the wings are level again.
+    """
+
+    type = STEEP_TURN
+
+    def __init__(self, skill=ACS):
+        super().__init__(skill)
+        self.establishment_bank, self.pass_tolerances = STEEP_TURN_TOLERANCES[self.skill]
+        self._rearm()
+
+    def _rearm(self):
+        self.state = READY
+        self.entry = None
+        self._phase = "waiting_for_level"
+        self._level_since = None
+        self._baseline = None
+        self._baseline_position = None
+
+    def _start(self, sample, now):
+        hdgs, alts, spds = zip(*self._baseline)
+        lat, lon = self._baseline_position
+        self.entry = {
+            "hdg": circular_mean(hdgs),
+            "alt": sum(alts) / len(alts),
+            "spd": sum(spds) / len(spds),
+            "lat": lat or sample.get("lat"),
+            "lon": lon or sample.get("lon"),
+        }
+        self.state = TRACKING
+        self._phase = "tracking"
+        self._level_since = None
+        self._baseline = None
+        self._reached_cancel_bank = False
+        self._level_after_established = None
+        self._rollout_scheduled = False
+        self._last_progress = now
+
+        self.direction = None
+        self.total_turn = 0.0
+        self._last_hdg = self.entry["hdg"]
+        self._last_bank_abs = None
+        self.max_alt_dev = 0.0
+        self.max_spd_dev = 0.0
+        self.max_bank_dev = 0.0
+        self.max_bank_reached = 0.0
+        self.busted = {"alt": False, "spd": False, "bank": False}
+        self.busting = BustFilter(self.busted)
+        self.bank = _Running()
+        self.alt = _Running()
+        self.spd = _Running()
+        self.established = False
+        self.rollout_started = False
+        self.rollout_completed = False
+        self.rollout_start_hdg = None
+        self.rollout_end_hdg = None
+        self._emit("start", skill=self.skill, entry=dict(self.entry))
+
+    def _cancel(self, reason, sample, now):
+        self.cancels += 1
+        self._emit("cancel", reason=reason)
+        self._rearm()
+        self._auto_start(sample, now)
+
+    def _step(self, sample, now):
+        if self.state == COMPLETE:
+            self._rearm()
+        if self.state == READY:
+            self._auto_start(sample, now)
+        elif self.state in (TRACKING, ROLLOUT):
+            self._track(sample, now)
+
+    def _auto_start(self, sample, now):
+        bank = sample.get("bank_deg") or 0.0
+        bank_abs = abs(bank)
+        if self._phase == "waiting_for_level":
+            if bank_abs <= LEVEL_BANK:
+                if self._level_since is None:
+                    self._level_since = now
+                    self._baseline = collections.deque(maxlen=BASELINE_SAMPLES)
+                    self._baseline_position = (sample.get("lat"), sample.get("lon"))
+                if now - self._level_since >= LEVEL_SECONDS:
+                    self._phase = "waiting_for_turn"
+                self._add_baseline(sample)
+            else:
+                self._level_since = None
+                self._baseline = None
+        elif self._phase == "waiting_for_turn":
+            if bank_abs <= LEVEL_BANK:
+                self._add_baseline(sample)
+            elif bank_abs > TURN_START_BANK:
+                self._start(sample, now)
+                self._track(sample, now)  # the page tracks the starting sample too
+
+    def _add_baseline(self, sample):
+        self._baseline.append((sample.get("hdg_true") or 0.0, sample.get("alt_ft") or 0.0,
+                               sample.get("ias_kt") or 0.0))
+
+    def _track(self, sample, now):
+        hdg = sample.get("hdg_true")
+        alt = sample.get("alt_ft")
+        spd = sample.get("ias_kt")
+        bank = sample.get("bank_deg")
+        if hdg is None or alt is None or spd is None or bank is None:
+            return
+        bank_abs = abs(bank)
+        tolerances = self.pass_tolerances
+
+        if bank_abs >= CANCEL_BANK:
+            self._reached_cancel_bank = True
+        if not self.established and self._reached_cancel_bank and bank_abs < SIGNIFICANT_BANK:
+            self._cancel("bank angle dropped below 20° before establishing turn", sample, now)
+            return
+        if not self.established and bank_abs <= LEVEL_BANK:
+            self._cancel("leveled out before establishing turn", sample, now)
+            return
+        if self.established:
+            if bank_abs <= WINGS_LEVEL_BANK:
+                if self._level_after_established is None:
+                    self._level_after_established = now
+                elif now - self._level_after_established >= LEVEL_CANCEL_SECONDS:
+                    self._cancel("leveled out for 3 seconds", sample, now)
+                    return
+            else:
+                self._level_after_established = None
+
+        if self.direction is None and bank_abs > SIGNIFICANT_BANK:
+            self.direction = "right" if bank > 0 else "left"
+        if bank_abs > self.max_bank_reached:
+            self.max_bank_reached = bank_abs
+
+        if self.direction and self._last_hdg is not None and not self.rollout_completed:
+            delta = normalize_angle(hdg - self._last_hdg)
+            if self.direction == "right" and delta > 0:
+                self.total_turn += delta
+            elif self.direction == "left" and delta < 0:
+                self.total_turn += -delta
+        self._last_hdg = hdg
+
+        enter_rollout = False
+        previous_bank_abs = self._last_bank_abs if self._last_bank_abs is not None else bank_abs
+        if (not self.rollout_started and self.total_turn >= ROLLOUT_START_TURN
+                and previous_bank_abs > ROLLOUT_TRIGGER_BANK and bank_abs < previous_bank_abs):
+            self.rollout_started = True
+            self.rollout_start_hdg = hdg
+            if not self._rollout_scheduled:
+                self._rollout_scheduled = True
+                enter_rollout = True
+        if self.rollout_started and not self.rollout_completed and bank_abs <= WINGS_LEVEL_BANK:
+            self.rollout_completed = True
+            self.rollout_end_hdg = hdg
+        self._last_bank_abs = bank_abs
+
+        alt_dev = alt - self.entry["alt"]
+        spd_dev = spd - self.entry["spd"]
+        bank_dev = bank_abs - TARGET_BANK
+
+        if bank_abs >= self.establishment_bank:
+            self.established = True
+        if bank_abs > SIGNIFICANT_BANK:
+            self.bank.add(bank_abs)
+            self.alt.add(alt)
+            self.spd.add(spd)
+
+        if abs(alt_dev) > abs(self.max_alt_dev):
+            self.max_alt_dev = alt_dev
+        if abs(spd_dev) > abs(self.max_spd_dev):
+            self.max_spd_dev = spd_dev
+        if (self.established and self.state == TRACKING and BANK_DEV_MIN_TURN <= self.total_turn < BANK_DEV_MAX_TURN
+                and bank_abs >= BANK_DEV_MIN_BANK and abs(bank_dev) > abs(self.max_bank_dev)):
+            self.max_bank_dev = bank_dev
+
+        if self.established:
+            low, high = tolerances["bank"]
+            flags = {"alt": abs(alt_dev) > tolerances["altitude"], "spd": abs(spd_dev) > tolerances["airspeed"]}
+            if self.state == TRACKING:
+                flags["bank"] = bank_abs < low or bank_abs > high
+            for rule, bad in flags.items():
+                if bad:
+                    self.busted[rule] = True
+            self._filter_busts(flags)
+
+        if self.rollout_completed and self.state == ROLLOUT:
+            self._finish()
+        elif enter_rollout:
+            # The page switches to rollout and runs the same sample again
+            self.state = ROLLOUT
+            self._emit("rollout", totalTurn=self.total_turn, heading=hdg)
+            self._track(sample, now)
+
+    def _finish(self):
+        hdg_err = abs(normalize_angle(self.rollout_end_hdg - self.entry["hdg"]))
+        hdg_pass = hdg_err <= self.pass_tolerances["rolloutHeading"]
+        busted = dict(self.busted)
+        grade = grade_steep_turn(self.bank.mean, self.max_bank_dev, self.max_alt_dev, self.max_spd_dev,
+                                 busted, self.skill)
+        avg_alt = self.alt.mean
+        avg_spd = self.spd.mean
+        self.state = COMPLETE
+        self.results += 1
+        self._emit("result", **grade, allPass=not any(busted.values()) and hdg_pass, hdgErr=hdg_err,
+                   hdgPass=hdg_pass, totalTurn=self.total_turn, skill=self.skill,
+                   averages={"bank": self.bank.mean, "alt": avg_alt, "spd": avg_spd,
+                             "altDev": avg_alt - self.entry["alt"], "spdDev": avg_spd - self.entry["spd"]},
+                   busted=busted, busting=self.busting.result(final=True), turnDirection=self.direction, maxBankReached=self.max_bank_reached,
+                   entry=dict(self.entry))
+
+    def progress(self):
+        if self.state not in (TRACKING, ROLLOUT):
+            return {"state": self.state}
+        return {
+            "state": self.state,
+            "totalTurn": self.total_turn,
+            "turnDirection": self.direction,
+            "established": self.established,
+            "maxAltDev": self.max_alt_dev,
+            "maxSpdDev": self.max_spd_dev,
+            "maxBankDev": self.max_bank_dev,
+            "avgBank": self.bank.mean,
+            "busted": dict(self.busted),
+            "busting": self.busting.result(),
+        }
+
+class SlowFlightTracker(_Tracker):
+    """
+    Slow flight auto-start and running statistics (SlowFlight.jsx).
+
+    Takes a reference half a second after arming, starts once the aircraft
+    has stayed within the skill level's tolerances of it for 2 seconds, and
+    tracks deviations from the entry against the ACS standards until
+    complete() is called.
+    """
+
+    type = SLOW_FLIGHT
+
+    def __init__(self, skill=ACS):
+        super().__init__(skill)
+        self.tolerances = SLOW_FLIGHT_TOLERANCES[self.skill]
+        self._rearm()
+
+    def _rearm(self):
+        self.state = READY
+        self.entry = None
+        self._reference = None
+        self._reference_since = None
+        self._in_range_since = None
+        self._out_of_range_since = None
+
+    def _step(self, sample, now):
+        if self.state == COMPLETE:
+            self._rearm()
+        if self.state == READY:
+            self._auto_start(sample, now)
+        elif self.state == TRACKING:
+            self._track(sample)
+
+    def _in_range(self, sample):
+        """checkSlowFlightInRange"""
+        reference = self._reference
+        tolerances = self.tolerances
+        alt_dev = abs((sample.get("alt_ft") or 0) - (reference["alt"] or 0))
+        spd_dev = (sample.get("ias_kt") or 0) - (reference["spd"] or 0)
+        hdg_dev = abs(normalize_angle((sample.get("hdg_true") or 0) - (reference["hdg"] or 0)))
+        bank_abs = abs(sample.get("bank_deg") or 0)
+        low, high = tolerances["airspeed"]
+        return (alt_dev <= tolerances["altitude"] and low <= spd_dev <= high
+                and hdg_dev <= tolerances["heading"] and bank_abs <= tolerances["bank"])
+
+    def _auto_start(self, sample, now):
+        if self._reference is None:
+            self._reference = {"hdg": sample.get("hdg_true"), "alt": sample.get("alt_ft"),
+                               "spd": sample.get("ias_kt")}
+            self._reference_since = now
+            self._out_of_range_since = None
+            return
+        if now - self._reference_since < BASELINE_SECONDS:
+            return
+
+        if self._in_range(sample):
+            self._out_of_range_since = None
+            if self._in_range_since is None:
+                self._in_range_since = now
+            elif now - self._in_range_since >= IN_RANGE_SECONDS:
+                self._start(sample, now)
+        else:
+            self._in_range_since = None
+            if self._out_of_range_since is None:
+                self._out_of_range_since = now
+            if now - self._out_of_range_since > OUT_OF_RANGE_SECONDS:
+                self._reference = None
+                self._reference_since = None
+                self._out_of_range_since = None
+
+    def _start(self, sample, now):
+        values = (sample.get("hdg_true"), sample.get("alt_ft"), sample.get("ias_kt"))
+        if None in values:
+            return  # start on the next complete sample
+        self.entry = dict(zip(("hdg", "alt", "spd"), values))
+        self.state = TRACKING
+        self.started = now
+        self.elapsed = 0.0
+        self._last_progress = now
+        self.max_alt_dev = 0.0
+        self.max_spd_dev = 0.0
+        self.max_hdg_dev = 0.0
+        self.max_bank_dev = 0.0
+        self.busted = {"alt": False, "spd": False, "hdg": False, "bank": False}
+        self.busting = BustFilter(self.busted)
+        self.phases = {"straight": 0, "turn": 0, "climb": 0, "descent": 0}
+        self.alt = _Running()
+        self.spd = _Running()
+        self.bank = _Running()
+        self.yaw_rate = _Running()
+        self._emit("start", skill=self.skill, entry=dict(self.entry))
+        self._track(sample)  # the page tracks the starting sample too
+
+    def _track(self, sample):
+        hdg = sample.get("hdg_true")
+        alt = sample.get("alt_ft")
+        spd = sample.get("ias_kt")
+        bank = sample.get("bank_deg")
+        if hdg is None or alt is None or spd is None or bank is None:
+            return
+        self.elapsed = (sample.get("ts") or self.started) - self.started
+        standards = SLOW_FLIGHT_STANDARDS
+
+        alt_dev = alt - self.entry["alt"]
+        spd_dev = spd - self.entry["spd"]
+        hdg_dev = abs(normalize_angle(hdg - self.entry["hdg"]))
+        bank_abs = abs(bank)
+
+        if abs(alt_dev) > abs(self.max_alt_dev):
+            self.max_alt_dev = alt_dev
+        # Slow is worse than fast: once below the entry speed, only a slower sample replaces it
+        if spd_dev < 0:
+            if self.max_spd_dev >= 0 or spd_dev < self.max_spd_dev:
+                self.max_spd_dev = spd_dev
+        elif spd_dev > self.max_spd_dev:
+            self.max_spd_dev = spd_dev
+        if hdg_dev > self.max_hdg_dev:
+            self.max_hdg_dev = hdg_dev
+        if bank_abs > self.max_bank_dev:
+            self.max_bank_dev = bank_abs
+
+        low, high = standards["airspeed"]
+        flags = {
+            "alt": abs(alt_dev) > standards["altitude"],
+            "spd": spd_dev < low or spd_dev > high,
+            "hdg": hdg_dev > standards["heading"],
+            "bank": bank_abs > standards["bank"],
+        }
+        for rule, bad in flags.items():
+            if bad:
+                self.busted[rule] = True
+        self._filter_busts(flags)
+
+        vs = sample.get("vs_fpm") or 0
+        if bank_abs > 5:
+            phase = "turn"
+        elif vs > 100:
+            phase = "climb"
+        elif vs < -100:
+            phase = "descent"
+        else:
+            phase = "straight"
+        self.phases[phase] += 1
+
+        self.alt.add(alt)
+        self.spd.add(spd)
+        self.bank.add(bank_abs)
+        yaw_rate = sample.get("yaw_rate")
+        if yaw_rate is not None:
+            self.yaw_rate.add(abs(yaw_rate))
+
+    def complete(self):
+        """completeManeuver: grade what was flown so far, or None if nothing was"""
+        if self.state != TRACKING or not self.alt.count:
+            return None
+        self._events = []
+        busted = dict(self.busted)
+        avg_alt = self.alt.mean
+        avg_spd = self.spd.mean
+        self.state = COMPLETE
+        self.results += 1
+        self._emit("result", allPass=not any(busted.values()), skill=self.skill,
+                   averages={"alt": avg_alt, "spd": avg_spd, "bank": self.bank.mean, "yawRate": self.yaw_rate.mean,
+                             "altDev": avg_alt - self.entry["alt"], "spdDev": avg_spd - self.entry["spd"]},
+                   maxAltDev=self.max_alt_dev, maxSpdDev=self.max_spd_dev, maxHdgDev=self.max_hdg_dev,
+                   maxBankDev=self.max_bank_dev, busted=busted, busting=self.busting.result(final=True),
+                   phases=dict(self.phases),
+                   elapsed=self.elapsed, entry=dict(self.entry))
+        return self._events[0]
+
+    def progress(self):
+        if self.state != TRACKING:
+            return {"state": self.state}
+        return {
+            "state": self.state,
+            "elapsed": self.elapsed,
+            "maxAltDev": self.max_alt_dev,
+            "maxSpdDev": self.max_spd_dev,
+            "maxHdgDev": self.max_hdg_dev,
+            "maxBankDev": self.max_bank_dev,
+            "busted": dict(self.busted),
+            "busting": self.busting.result(),
+        }
+
+TRACKERS = {STEEP_TURN: SteepTurnTracker, SLOW_FLIGHT: SlowFlightTracker}
+
+class ManeuverEngine:
+    """
+    Bridge processor running the selected maneuver's tracker.
+
+    process() returns {"maneuver": event} for start, progress, rollout,
+    cancel and result events; if one sample causes several, the rest go out
+    on the following samples. LAN clients pick the maneuver and skill level
+    with {"type": "maneuver", "maneuver": "steep_turn" | "slow_flight" | null,
+    "skill": "acs"}, and can send "action": "complete" or "cancel".
+    """
+
+    name = "maneuver"
+
+    def __init__(self, maneuver=None, skill=ACS):
+        self.tracker = None
+        self._pending = collections.deque()
+        self.select(maneuver, skill)
+
+    def select(self, maneuver, skill=ACS):
+        if maneuver is not None and maneuver not in TRACKERS:
+            raise ValueError(f"Unknown maneuver {maneuver!r}, expected one of {MANEUVER_TYPES}")
+        self.tracker = TRACKERS[maneuver](skill) if maneuver else None
+        self._pending.clear()
+
+    def process(self, payload):
+        if self.tracker is not None:
+            self._pending.extend(self.tracker.update(payload))
+        if not self._pending:
+            return None
+        return {"maneuver": self._pending.popleft()}
+
+    def control(self, request):
+        if request.get("type") != "maneuver":
+            return None
+        tracker = self.tracker
+        try:
+            if "maneuver" in request or "skill" in request:
+                maneuver = request.get("maneuver", tracker.type if tracker else None)
+                self.select(maneuver, request.get("skill", tracker.skill if tracker else ACS))
+        except (TypeError, AttributeError, ValueError) as e:
+            return {"type": "error", "msg": f"Bad maneuver request: {e}"}
+
+        reply = {"type": "maneuver"}
+        action = request.get("action")
+        if action == "complete" and isinstance(self.tracker, SlowFlightTracker):
+            result = self.tracker.complete()
+            if result is not None:
+                self._pending.append(result)
+            reply["result"] = result
+        elif action == "cancel" and self.tracker is not None:
+            self.select(self.tracker.type, self.tracker.skill)
+        elif action is not None:
+            return {"type": "error", "msg": f"Cannot {action} {self.tracker.type if self.tracker else 'no maneuver'}"}
+
+        tracker = self.tracker
+        reply.update(maneuver=tracker.type if tracker else None, skill=tracker.skill if tracker else None,
+                     progress=tracker.progress() if tracker else None)
+        return reply
+
+    def summary(self):
+        tracker = self.tracker
+        if tracker is None:
+            return "no maneuver selected"
+        return f"{tracker.type} ({tracker.skill}): {tracker.state}, {tracker.results} graded, {tracker.cancels} cancelled"
+
+# Recorded channels the trackers read
+TRACKER_COLUMNS = ("ts", "lat", "lon", "alt_ft", "ias_kt", "vs_fpm", "bank_deg", "hdg_true", "yaw_rate")
+
+class ManeuverGrader:
+    """
+    Batch grading of one maneuver type over recorded flights, with the
+    grader interface regrade_flights.py expects: SKILL_LEVELS, ruleset(),
+    recording_samples(recording), grade_samples(samples, skill) and
+    compact_result(result).
+
+    Samples are replayed through a fresh tracker per skill level, so every
+    steep turn in the flight is graded. Recordings don't hold the client's
+    complete action, so slow flight is completed at the end of the samples.
+    """
+
+    SKILL_LEVELS = SKILL_LEVELS
+
+    def __init__(self, maneuver):
+        if maneuver not in TRACKERS:
+            raise ValueError(f"Unknown maneuver {maneuver!r}, expected one of {MANEUVER_TYPES}")
+        self.maneuver = maneuver
+
+    def ruleset(self):
+        """Everything a grade depends on, for regrade_flights' ruleset hash"""
+        rules = {"bust_filter": [MIN_PERCENT, MIN_CONSECUTIVE, MIN_SAMPLES]}
+        if self.maneuver == STEEP_TURN:
+            rules.update(tolerances=STEEP_TURN_TOLERANCES, grades=STEEP_TURN_GRADES, limits=[
+                TARGET_BANK, ROLLOUT_START_TURN, WINGS_LEVEL_BANK, LEVEL_BANK, LEVEL_SECONDS, TURN_START_BANK,
+                BASELINE_SAMPLES, SIGNIFICANT_BANK, CANCEL_BANK, LEVEL_CANCEL_SECONDS, BANK_DEV_MIN_TURN,
+                BANK_DEV_MAX_TURN, BANK_DEV_MIN_BANK])
+        else:
+            rules.update(tolerances=SLOW_FLIGHT_TOLERANCES, standards=SLOW_FLIGHT_STANDARDS,
+                         limits=[BASELINE_SECONDS, IN_RANGE_SECONDS, OUT_OF_RANGE_SECONDS])
+        return rules
+
+    def recording_samples(self, recording, start=None, end=None):
+        """Payload dicts from a FlightRecording (recorded NaN is None again)"""
+        columns = recording.slice(-math.inf if start is None else start, math.inf if end is None else end,
+                                  TRACKER_COLUMNS)
+        rows = zip(*(columns[name].tolist() for name in TRACKER_COLUMNS))
+        return [{name: None if value != value else value for name, value in zip(TRACKER_COLUMNS, row)}
+                for row in rows]
+
+    def grade_samples(self, samples, skill):
+        """{"results": result events, each with the "ts" it ended on, "cancels": count}"""
+        tracker = TRACKERS[self.maneuver](skill)
+        results = []
+        for sample in samples:
+            for event in tracker.update(sample):
+                if event["event"] == "result":
+                    results.append({**event, "ts": sample["ts"]})
+        if isinstance(tracker, SlowFlightTracker):
+            event = tracker.complete()
+            if event is not None:
+                results.append({**event, "ts": samples[-1]["ts"]})
+        return {"results": results, "cancels": tracker.cancels}
+
+    def compact_result(self, result):
+        """The parts of a result worth keeping in a regrade index"""
+        compact = []
+        for event in result["results"]:
+            entry = {"ts": event["ts"], "pass": event["allPass"],
+                     "busted": sorted(rule for rule, busted in event["busted"].items() if busted)}
+            if "finalGrade" in event:
+                entry["grade"] = event["finalGrade"]
+            compact.append(entry)
+        return {"results": compact, "cancels": result["cancels"]}
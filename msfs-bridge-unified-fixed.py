@@ -254,9 +254,10 @@ async def run_bridge(session_id):
                     pitch_rad = safe_get(aq, "PLANE_PITCH_DEGREES")
                     bank_rad = safe_get(aq, "PLANE_BANK_DEGREES")
                     
-                    roll_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_X")
-                    pitch_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_Y")
-                    yaw_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_Z")
+                    # Body axes: X pitch, Y yaw, Z roll
+                    roll_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_Z")
+                    pitch_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_X")
+                    yaw_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_Y")
                     g_force = safe_get(aq, "G_FORCE")
                     
                     # Build payload
@@ -5,14 +5,12 @@ Users just run the exe, paste their Session ID, and it works!
 """
 
 import asyncio
-import json
-import math
 import os
 import socket
 import tkinter as tk
 from tkinter import messagebox
-import websockets
-from SimConnect import SimConnect, AircraftRequests
+from bridge_core import BridgeCore
+from bridge_sinks import CloudSink, LocalServerSink, RecorderSink
 
 # Cloud server configuration
 CLOUD_WS_URL = "wss://host-bridge-production.up.railway.app"
@@ -21,20 +19,21 @@ CLOUD_WS_URL = "wss://host-bridge-production.up.railway.app"
 CONFIG_FILE = "bridge-config.txt"
 
 HZ = 30  # Update frequency (30 Hz = ~33ms updates for smoother telemetry)
-
-def safe_get(aq, var_name: str):
-    try:
-        return aq.get(var_name)
-    except Exception:
-        return None
-
-def rad_to_deg(x):
-    if x is None:
-        return None
-    try:
-        return float(x) * 180.0 / math.pi
-    except Exception:
-        return None
+SEND_HZ = 30  # Messages per second; below HZ batches samples (e.g. HZ = 60, SEND_HZ = 10)
+STATS_EVERY = 60  # Seconds between sampling rate reports
+DELTA_MODE = False  # Send keyframes + changed fields only (dashboard merges them)
+WIRE_FORMAT = "json"  # "json" or "binary" (packed records, relay converts for JSON clients)
+LOCAL_SERVER = False  # Also serve LAN pages on ws://<pc-ip>:8765 from the same sampler
+RECORD_FLIGHTS = False  # Also record every sample to recordings/flight-*.flight
+METRICS_PORT = None  # e.g. 9108 to serve latency histograms on http://127.0.0.1:9108/metrics
+STAGE_TIMINGS = False  # Add capture wall time and read/convert timings to every sample
+ADAPTIVE_RATE = False  # Sample between RATE_FLOOR_HZ and RATE_CEILING_HZ by flight phase instead of at HZ
+RATE_FLOOR_HZ = 2  # parked or stable cruise
+RATE_CEILING_HZ = 30  # flare, steep turns, takeoff and landing rolls
+LANDING_RUNWAY = None  # e.g. "27" (KJKA) to send landing phase changes with the telemetry
+RUNWAY_DATABASE = None  # e.g. "runways.csv" (OurAirports) with LANDING_RUNWAY = "auto"
+MANEUVER = None  # "steep_turn" or "slow_flight" to send maneuver start, progress and result events
+MANEUVER_SKILL = "acs"  # beginner, novice or acs
 
 def read_config():
     """Read session ID from config file"""
@@ -222,8 +221,11 @@ async def run_bridge(session_id):
     print(f"Connecting to SimConnect...")
     
     # Connect to SimConnect
-    sm = SimConnect()
-    aq = AircraftRequests(sm, _time=0)
+    adaptive = (RATE_FLOOR_HZ, RATE_CEILING_HZ) if ADAPTIVE_RATE else None
+    core = BridgeCore(HZ, stats_every=STATS_EVERY, timings=STAGE_TIMINGS, metrics_port=METRICS_PORT,
+                      adaptive=adaptive, runway=LANDING_RUNWAY, runways=RUNWAY_DATABASE,
+                      maneuver=MANEUVER, skill=MANEUVER_SKILL)
+    core.connect()
     print("✅ SimConnect connected")
     
     # Build WebSocket URL
@@ -234,78 +236,13 @@ async def run_bridge(session_id):
     print("=" * 60)
     print()
     
-    interval = 1.0 / max(1, HZ)
-    reconnect_delay = 5
-    
-    while True:
-        try:
-            async with websockets.connect(ws_url) as ws:
-                print("✅ Connected to cloud server")
-                
-                # Wait for confirmation
-                try:
-                    msg = await asyncio.wait_for(ws.recv(), timeout=2.0)
-                    data = json.loads(msg)
-                    if data.get('type') == 'connected':
-                        print(f"✅ Session confirmed: {data.get('sessionId')}")
-                        print("\n🛫 Ready! Start flying in MSFS to see live data in your dashboard.\n")
-                except asyncio.TimeoutError:
-                    pass
-                
-                # Main loop - send telemetry data
-                while True:
-                    # Get telemetry from MSFS
-                    lat = safe_get(aq, "PLANE_LATITUDE")
-                    lon = safe_get(aq, "PLANE_LONGITUDE")
-                    alt_ft = safe_get(aq, "PLANE_ALTITUDE")
-                    ias_kt = safe_get(aq, "AIRSPEED_INDICATED")
-                    vs_fpm = safe_get(aq, "VERTICAL_SPEED")
-                    hdg_true = safe_get(aq, "PLANE_HEADING_DEGREES_TRUE")
-                    on_ground = safe_get(aq, "SIM_ON_GROUND")
-                    
-                    pitch_rad = safe_get(aq, "PLANE_PITCH_DEGREES")
-                    bank_rad = safe_get(aq, "PLANE_BANK_DEGREES")
-                    
-                    roll_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_X")
-                    pitch_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_Y")
-                    yaw_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_Z")
-                    g_force = safe_get(aq, "G_FORCE")
-                    
-                    # Build payload
-                    payload = {
-                        "ts": asyncio.get_event_loop().time(),
-                        "lat": lat,
-                        "lon": lon,
-                        "alt_ft": alt_ft,
-                        "ias_kt": ias_kt,
-                        "vs_fpm": vs_fpm,
-                        "on_ground": on_ground,
-                        "pitch_raw": pitch_rad,
-                        "bank_raw": bank_rad,
-                        "pitch_deg": rad_to_deg(pitch_rad),
-                        "bank_deg": -rad_to_deg(bank_rad) if rad_to_deg(bank_rad) is not None else None,
-                        "roll_rate": rad_to_deg(roll_rate),
-                        "pitch_rate": rad_to_deg(pitch_rate),
-                        "yaw_rate": rad_to_deg(yaw_rate),
-                        "g_force": g_force,
-                    }
-                    
-                    hdg_deg = rad_to_deg(hdg_true)
-                    if hdg_deg is not None:
-                        hdg_deg = hdg_deg % 360
-                    payload["hdg_true"] = hdg_deg
-                    
-                    # Send to cloud server
-                    await ws.send(json.dumps(payload))
-                    await asyncio.sleep(interval)
-                    
-        except websockets.exceptions.ConnectionClosed:
-            print(f"❌ Connection closed. Reconnecting in {reconnect_delay} seconds...")
-            await asyncio.sleep(reconnect_delay)
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            print(f"Reconnecting in {reconnect_delay} seconds...")
-            await asyncio.sleep(reconnect_delay)
+    sinks = [CloudSink(ws_url, SEND_HZ, WIRE_FORMAT, delta=DELTA_MODE, batch=SEND_HZ < core.max_hz,
+                       ready_message="\n🛫 Ready! Start flying in MSFS to see live data in your dashboard.\n")]
+    if LOCAL_SERVER:
+        sinks.append(LocalServerSink(core.max_hz, core.max_hz, on_control=core.control))
+    if RECORD_FLIGHTS:
+        sinks.append(RecorderSink())
+    await core.run(sinks)
 
 if __name__ == "__main__":
     # Always show dialog, but pre-fill with existing session ID if found
@@ -1,13 +1,16 @@
+import argparse
 import asyncio
-import json
-import math
 import socket
-import websockets
-from SimConnect import SimConnect, AircraftRequests
+from adaptive_rate import CEILING_HZ, FLOOR_HZ
+from bridge_core import BridgeCore
+from bridge_sinks import LocalServerSink
+from maneuver_engine import ACS, MANEUVER_TYPES, SKILL_LEVELS
 
 HOST = "0.0.0.0"
 PORT = 8765
 HZ = 15  # good for attitude indicator
+SEND_HZ = 15  # Send ticks per second; ?batch=1 clients get one message per tick
+STATS_EVERY = 60  # Seconds between sampling rate reports
 
 def get_local_ip():
     """Get the local IP address for LAN access"""
@@ -26,34 +29,13 @@ def get_local_ip():
         except Exception:
             return None
 
-clients = set()
-
-def safe_get(aq, var_name: str):
-    try:
-        return aq.get(var_name)
-    except Exception:
-        return None
-
-def rad_to_deg(x):
-    if x is None:
-        return None
-    try:
-        return float(x) * 180.0 / math.pi
-    except Exception:
-        return None
-
-async def ws_handler(ws):
-    clients.add(ws)
-    try:
-        await ws.send(json.dumps({"type": "hello", "msg": "connected"}))
-        await ws.wait_closed()
-    finally:
-        clients.discard(ws)
-
-async def main():
+async def main(args):
     print("Connecting to SimConnect...")
-    sm = SimConnect()
-    aq = AircraftRequests(sm, _time=0)
+    core = BridgeCore(HZ, stats_every=STATS_EVERY, fake_sim=args.fake_sim,
+                      timings=args.timings, metrics_port=args.metrics_port,
+                      adaptive=(args.floor_hz, args.ceiling_hz) if args.adaptive else None,
+                      runway=args.runway, runways=args.runways, maneuver=args.maneuver, skill=args.skill)
+    core.connect()
     print("SimConnect connected")
     
     local_ip = get_local_ip()
@@ -74,80 +56,29 @@ async def main():
         print(f"  3. Open http://<your-pc-ip>/index.html on your phone")
     print(f"{'='*60}\n")
 
-    async with websockets.serve(ws_handler, HOST, PORT):
-        interval = 1.0 / max(1, HZ)
-
-        while True:
-            # Core telemetry
-            lat = safe_get(aq, "PLANE_LATITUDE")
-            lon = safe_get(aq, "PLANE_LONGITUDE")
-            alt_ft = safe_get(aq, "PLANE_ALTITUDE")
-            ias_kt = safe_get(aq, "AIRSPEED_INDICATED")
-            vs_fpm = safe_get(aq, "VERTICAL_SPEED")
-            hdg_true = safe_get(aq, "PLANE_HEADING_DEGREES_TRUE")  # may also come back as radians in some setups
-            on_ground = safe_get(aq, "SIM_ON_GROUND")
-
-            # Attitude:
-            # These variables are commonly returned in radians even though the name says "DEGREES".
-            pitch_rad = safe_get(aq, "PLANE_PITCH_DEGREES")
-            bank_rad  = safe_get(aq, "PLANE_BANK_DEGREES")
-
-            # Rotation rates (rad/s) - critical for maneuver tracking
-            roll_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_X")
-            pitch_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_Y")
-            yaw_rate = safe_get(aq, "ROTATION_VELOCITY_BODY_Z")
-
-            # G-force for maneuver intensity
-            g_force = safe_get(aq, "G_FORCE")
-
-            payload = {
-                "ts": asyncio.get_event_loop().time(),
-
-                "lat": lat,
-                "lon": lon,
-                "alt_ft": alt_ft,
-                "ias_kt": ias_kt,
-                "vs_fpm": vs_fpm,
-                "on_ground": on_ground,
-
-                # Debug: raw values (usually radians)
-                "pitch_raw": pitch_rad,
-                "bank_raw": bank_rad,
-
-                # UI values: degrees
-                "pitch_deg": rad_to_deg(pitch_rad),
-                "bank_deg": -rad_to_deg(bank_rad) if rad_to_deg(bank_rad) is not None else None,
-
-                # Rotation rates (deg/s) - for maneuver detection
-                "roll_rate": rad_to_deg(roll_rate),
-                "pitch_rate": rad_to_deg(pitch_rate),
-                "yaw_rate": rad_to_deg(yaw_rate),
-
-                # G-force
-                "g_force": g_force,
-            }
-
-            hdg_deg = rad_to_deg(hdg_true)
-            if hdg_deg is not None:
-                hdg_deg = hdg_deg % 360
-            payload["hdg_true"] = hdg_deg
-
-            if clients:
-                msg = json.dumps(payload)
-                dead = []
-                for ws in list(clients):
-                    try:
-                        await ws.send(msg)
-                    except Exception:
-                        dead.append(ws)
-                for ws in dead:
-                    clients.discard(ws)
-
-            await asyncio.sleep(interval)
+    await core.run([LocalServerSink(SEND_HZ, core.max_hz, HOST, PORT, on_control=core.control)])
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve MSFS telemetry to LAN clients")
+    parser.add_argument("--fake-sim", metavar="SCENARIO",
+                        help="use the fake SimConnect model, e.g. steep_turns or approach,latency=0.002")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve pipeline latency histograms on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--timings", action="store_true",
+                        help="add capture wall time and read/convert timings to every sample")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="pick the sampling rate from the flight state instead of a fixed rate")
+    parser.add_argument("--floor-hz", type=int, default=FLOOR_HZ, help="adaptive rate when parked or stable")
+    parser.add_argument("--ceiling-hz", type=int, default=CEILING_HZ, help="adaptive rate in critical phases")
+    parser.add_argument("--runway", help="detect landing phases for this runway: 27 (KJKA), "
+                                         "THR_LAT,THR_LON,END_LAT,END_LON[,HEADING] or auto (needs --runways)")
+    parser.add_argument("--runways", metavar="PATH",
+                        help="runway database (OurAirports runways.csv or JSON runways) for --runway auto")
+    parser.add_argument("--maneuver", choices=MANEUVER_TYPES, help="track and grade this maneuver")
+    parser.add_argument("--skill", choices=SKILL_LEVELS, default=ACS, help="maneuver skill level")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args))
     except KeyboardInterrupt:
         print("\nShutting down...")
     except ConnectionError as e:
@@ -0,0 +1,151 @@
+"""
+Pipeline metrics
+Per-stage latency histograms for the sample pipeline and a small local HTTP
+endpoint to read them, to see where the per-sample budget goes:
+
+    read       SimConnect read in the sampler thread
+    convert    raw SimVars -> payload dict
+    queue      sample capture -> serialization (time spent waiting on ticks)
+    serialize  payloads -> wire messages, per encode call
+    send       one websocket send (label sink="local" or "cloud")
+
+GET /metrics returns Prometheus text format, /metrics.json the same data
+with approximate percentiles.
+"""
+
+import asyncio
+import bisect
+import json
+import threading
+
+METRICS_HOST = "127.0.0.1"
+
+# Histogram bucket upper bounds in seconds (50 us .. 2.5 s)
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Approximate percentile, interpolated within its bucket"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                # Never report more than the largest value actually seen
+                upper = min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+                lower = min(self.buckets[i - 1] if i > 0 else 0.0, upper)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def snapshot(self):
+        def ms(value):
+            return value * 1000.0 if value is not None else None
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.sum / self.count) if self.count else None,
+            "p50_ms": ms(self.percentile(0.50)),
+            "p90_ms": ms(self.percentile(0.90)),
+            "p99_ms": ms(self.percentile(0.99)),
+            "max_ms": ms(self.max) if self.count else None,
+        }
+
+class Metrics:
+    """
+    Registry of stage histograms plus counters read on demand.
+
+    observe() is called from the sampler thread and the event loop; each
+    histogram is only ever written from one of them.
+    """
+
+    def __init__(self):
+        self.histograms = {}  # (stage, sink) -> Histogram
+        self.counters = {}  # name -> callable returning the current value
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, sink=None):
+        histogram = self.histograms.get((stage, sink))
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault((stage, sink), Histogram())
+        histogram.observe(seconds)
+
+    def counter(self, name, read):
+        """Expose a value that is counted elsewhere (e.g. ring drops)"""
+        self.counters[name] = read
+
+    def prometheus(self):
+        lines = [
+            "# HELP bridge_stage_seconds Time spent per pipeline stage",
+            "# TYPE bridge_stage_seconds histogram",
+        ]
+        for (stage, sink), h in sorted(self.histograms.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+            labels = f'stage="{stage}"' + (f',sink="{sink}"' if sink else "")
+            total = 0
+            for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+                total += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'bridge_stage_seconds_bucket{{{labels},le="{le}"}} {total}')
+            lines.append(f"bridge_stage_seconds_sum{{{labels}}} {h.sum}")
+            lines.append(f"bridge_stage_seconds_count{{{labels}}} {h.count}")
+        for name, read in sorted(self.counters.items()):
+            lines.append(f"# TYPE bridge_{name} counter")
+            lines.append(f"bridge_{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        stages = {}
+        for (stage, sink), h in self.histograms.items():
+            stages[f"{stage}:{sink}" if sink else stage] = h.snapshot()
+        return {"stages": stages, "counters": {name: read() for name, read in self.counters.items()}}
+
+# Process-wide registry used by the sampler, encoders and sinks
+METRICS = Metrics()
+
+async def serve_metrics(port, host=METRICS_HOST, metrics=METRICS):
+    """Serve GET /metrics and /metrics.json until cancelled"""
+
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # skip headers
+            parts = request.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) > 1 else "/"
+            if path == "/metrics":
+                status, kind, body = "200 OK", "text/plain; version=0.0.4", metrics.prometheus()
+            elif path == "/metrics.json":
+                status, kind, body = "200 OK", "application/json", json.dumps(metrics.snapshot())
+            else:
+                status, kind, body = "404 Not Found", "text/plain", "Try /metrics or /metrics.json\n"
+            data = body.encode("utf-8")
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {kind}\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+        except (ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
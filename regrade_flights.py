@@ -0,0 +1,208 @@
+"""
+Bulk regrading
+Regrades every recorded flight in a directory for every maneuver and skill
+level after the grading tolerances change, spread over a process pool:
+
+    python regrade_flights.py recordings
+    python regrade_flights.py recordings --runway 27 --jobs 8
+    python regrade_flights.py recordings --maneuver landing --force
+    python regrade_flights.py recordings --maneuver steep_turn
+
+Results go to a compact JSON index (grades-index.json in the directory by
+default), keyed by the flight's path relative to the directory. Each entry
+keeps the flight's size, mtime and SHA-256 and a hash of each maneuver's
+ruleset (its tolerance tables plus the options used), so a rerun only grades
+flights whose content changed and maneuvers whose rules changed. A file
+whose size and mtime match the index isn't even read; one that was only
+touched is hashed and skipped.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import landing_grader
+from flight_recorder import FlightRecording
+from maneuver_engine import SLOW_FLIGHT, STEEP_TURN, ManeuverGrader
+
+INDEX_NAME = "grades-index.json"
+INDEX_VERSION = 1
+FLIGHT_SUFFIX = ".flight"
+HASH_BLOCK = 1 << 20
+SAVE_EVERY = 200  # flights between index checkpoints
+
+# Maneuver -> grader (module or ManeuverGrader). Each provides
+# SKILL_LEVELS, ruleset(), recording_samples(recording, **options),
+# grade_samples(samples, skill) and compact_result(result).
+MANEUVERS = {
+    "landing": landing_grader,
+    STEEP_TURN: ManeuverGrader(STEEP_TURN),
+    SLOW_FLIGHT: ManeuverGrader(SLOW_FLIGHT),
+}
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def ruleset_hash(maneuver, options):
+    rules = {"rules": MANEUVERS[maneuver].ruleset(), "options": options}
+    text = json.dumps(rules, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def find_flights(directory):
+    """Relative paths of every recorded flight under directory, sorted"""
+    flights = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in files:
+            if name.endswith(FLIGHT_SUFFIX):
+                flights.append(os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/"))
+    return sorted(flights)
+
+def load_index(path):
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return {"version": INDEX_VERSION, "flights": {}}
+    if index.get("version") != INDEX_VERSION:
+        print(f"⚠️  {path} is from another version of this tool; regrading everything")
+        return {"version": INDEX_VERSION, "flights": {}}
+    return index
+
+def save_index(path, index):
+    """Write the index atomically, so an interrupted run keeps the last checkpoint"""
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        json.dump(index, f, separators=(",", ":"), sort_keys=True)
+    os.replace(temp, path)
+
+def regrade_flight(task):
+    """
+    Worker: hash one flight and grade the maneuvers that need it.
+
+    task is (path, name, known sha256, stale maneuvers, all maneuvers,
+    options). If the content changed every maneuver is graded, otherwise
+    only the stale ones. Returns (name, sha256, grades, seconds, error).
+    """
+    path, name, known, stale, maneuvers, options = task
+    began = time.perf_counter()
+    try:
+        digest = file_digest(path)
+        todo = stale if digest == known else maneuvers
+        grades = {}
+        if todo:
+            with FlightRecording(path) as recording:
+                for maneuver in todo:
+                    grader = MANEUVERS[maneuver]
+                    samples = grader.recording_samples(recording, **options[maneuver])
+                    grades[maneuver] = {skill: grader.compact_result(grader.grade_samples(samples, skill))
+                                        for skill in grader.SKILL_LEVELS}
+        return name, digest, grades, time.perf_counter() - began, None
+    except Exception as e:
+        return name, None, None, time.perf_counter() - began, f"{type(e).__name__}: {e}"
+
+def plan(directory, index, maneuvers, hashes, force=False):
+    """
+    (tasks, skipped): flights that need grading and how many are up to date.
+    Flights that failed before are retried only once the file changes.
+    """
+    tasks = []
+    skipped = 0
+    for name in find_flights(directory):
+        path = os.path.join(directory, name)
+        stat = os.stat(path)
+        entry = None if force else index["flights"].get(name)
+        rulesets = entry.get("rulesets", {}) if entry else {}
+        stale = [m for m in maneuvers if rulesets.get(m) != hashes[m]]
+        same_file = entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+        if same_file and (not stale or "error" in entry):
+            skipped += 1
+            continue
+        tasks.append((path, name, entry.get("sha256") if entry else None, stale, maneuvers))
+    return tasks, skipped
+
+def merge(index, name, path, digest, grades, hashes):
+    stat = os.stat(path)
+    entry = index["flights"].get(name)
+    if entry is None or entry.get("sha256") != digest:
+        entry = {"rulesets": {}, "grades": {}}  # new content: nothing old still applies
+    entry.update(sha256=digest, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    entry.pop("error", None)
+    for maneuver, by_skill in grades.items():
+        entry["grades"][maneuver] = by_skill
+        entry["rulesets"][maneuver] = hashes[maneuver]
+    index["flights"][name] = entry
+
+def main():
+    parser = argparse.ArgumentParser(description="Regrade every recorded flight in a directory")
+    parser.add_argument("directory", help="directory searched recursively for *.flight recordings")
+    parser.add_argument("--index", help=f"results index (default DIRECTORY/{INDEX_NAME})")
+    parser.add_argument("--maneuver", action="append", choices=tuple(MANEUVERS),
+                        help="grade only this maneuver (repeatable; default all)")
+    parser.add_argument("--runway", default="27", help="landing runway: 27 (KJKA) or THR_LAT,THR_LON,END_LAT,END_LON")
+    parser.add_argument("--vref", type=float, default=landing_grader.DEFAULT_VREF, help="landing Vref in knots")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--force", action="store_true", help="regrade everything, ignoring the index")
+    args = parser.parse_args()
+
+    index_path = args.index or os.path.join(args.directory, INDEX_NAME)
+    maneuvers = args.maneuver or list(MANEUVERS)
+    options = {"landing": {"runway": args.runway, "vref": args.vref}, STEEP_TURN: {}, SLOW_FLIGHT: {}}
+    hashes = {m: ruleset_hash(m, options[m]) for m in maneuvers}
+
+    index = load_index(index_path)
+    present = set(find_flights(args.directory))
+    pruned = [name for name in index["flights"] if name not in present]
+    for name in pruned:
+        del index["flights"][name]
+
+    tasks, skipped = plan(args.directory, index, maneuvers, hashes, args.force)
+    tasks = [task + (options,) for task in tasks]
+    print(f"🔎 {len(present)} flights: {len(tasks)} to check, {skipped} up to date, {len(pruned)} removed")
+
+    began = time.perf_counter()
+    graded = unchanged = failed = 0
+    grade_seconds = 0.0
+    jobs = max(1, min(args.jobs, len(tasks)))
+    pool = multiprocessing.Pool(jobs) if jobs > 1 else None
+    try:
+        results = (pool.imap_unordered(regrade_flight, tasks, chunksize=max(1, len(tasks) // (jobs * 16)))
+                   if pool else map(regrade_flight, tasks))
+        paths = {task[1]: task[0] for task in tasks}
+        for done, (name, digest, grades, seconds, error) in enumerate(results, 1):
+            grade_seconds += seconds
+            if error:
+                failed += 1
+                print(f"⚠️  {name}: {error}")
+                stat = os.stat(paths[name])
+                index["flights"][name] = {"error": error, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            else:
+                if grades:
+                    graded += 1
+                else:
+                    unchanged += 1
+                merge(index, name, paths[name], digest, grades, hashes)
+            if done % SAVE_EVERY == 0:
+                save_index(index_path, index)
+                print(f"   {done}/{len(tasks)} flights")
+    finally:
+        if pool:
+            pool.terminate()
+        index.setdefault("rulesets", {}).update(hashes)
+        save_index(index_path, index)
+
+    elapsed = time.perf_counter() - began
+    print(f"✅ {graded} regraded, {unchanged} unchanged, {failed} failed in {elapsed:.1f} s "
+          f"({grade_seconds:.1f} s of work on {jobs} processes) -> {index_path}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Replay Bridge
+Streams a recorded flight (recordings/flight-*.flight) through the same
+sinks and payload format as the live bridge, so the dashboard, the relay
+and the grading pages can be exercised without MSFS running.
+
+    python replay_bridge.py recordings/flight-20250101-120000.flight
+    python replay_bridge.py FLIGHT --speed 10 --loop
+    python replay_bridge.py FLIGHT --speed max --cloud SESSION_ID
+
+While running, LAN clients can send
+{"type": "replay", "seek": 120, "speed": 10, "loop": true} (any subset)
+and get the replay state back.
+"""
+
+import argparse
+import asyncio
+import bisect
+import time
+
+from bridge_core import BridgeCore
+from bridge_sinks import CloudSink, LocalServerSink
+from flight_recorder import FlightRecording
+from maneuver_engine import ACS, MANEUVER_TYPES, SKILL_LEVELS
+from telemetry_codec import PAYLOAD_FIELDS
+from tick_scheduler import TickScheduler
+
+CLOUD_WS_URL = "wss://host-bridge-production.up.railway.app"
+HOST = "0.0.0.0"
+PORT = 8765
+REPLAY_HZ = 30  # replay ticks per second (samples are sent with their recorded spacing)
+SEND_HZ = 15
+STATS_EVERY = 10  # Seconds between replay reports
+DRAIN_GRACE = 1.0  # Seconds to let sinks send the last samples before exiting
+
+class ReplayCore(BridgeCore):
+    """
+    Bridge core fed from a flight recording instead of SimConnect.
+
+    speed is a playback multiplier, or None to go as fast as the sinks take
+    samples (never more than the free space in their inboxes). Samples keep
+    their recorded spacing in ts, shifted so ts and seq keep increasing
+    across seeks and loops, like a live session.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False, start=0.0, hz=REPLAY_HZ, stats_every=STATS_EVERY,
+                 runway=None, runways=None, maneuver=None, skill=ACS):
+        super().__init__(hz, stats_every, runway=runway, runways=runways, maneuver=maneuver, skill=skill)
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.start = start
+        self.seq = 0
+        self.played = 0
+        self.loops = 0
+        self._ts = []
+        self._columns = []
+        self._pos = 0
+        self._clock = 0.0  # recording time of the replay cursor
+        self._ts_offset = 0.0
+        self._last_ts = None
+
+    def connect(self):
+        """Load the recording into memory"""
+        with FlightRecording(self.path) as recording:
+            recorded = {name for name, _ in recording.columns}
+            self._ts = recording.column("ts").tolist()
+            self._columns = [(name, recording.column(name).tolist())
+                             for name in PAYLOAD_FIELDS if name in recorded]
+        if not self._ts:
+            raise ValueError(f"{self.path} has no samples")
+        self.seek(self.start)
+
+    def __len__(self):
+        return len(self._ts)
+
+    @property
+    def duration(self):
+        return self._ts[-1] - self._ts[0] if self._ts else 0.0
+
+    @property
+    def position(self):
+        return self._clock - self._ts[0] if self._ts else 0.0
+
+    def seek(self, seconds):
+        """Move the cursor to `seconds` from the start of the recording"""
+        seconds = min(max(0.0, seconds), self.duration)
+        self._pos = bisect.bisect_left(self._ts, self._ts[0] + seconds)
+        self._clock = self._ts[min(self._pos, len(self._ts) - 1)]
+        if self._last_ts is None:
+            self._ts_offset = time.monotonic() - self._clock
+        else:
+            # Carry on one tick after the last sample sent
+            self._ts_offset = self._last_ts + 1.0 / self.hz - self._clock
+
+    def _payload(self, i):
+        payload = {"ts": self._ts[i] + self._ts_offset}
+        for name, values in self._columns:
+            value = values[i]
+            payload[name] = None if value != value else value  # NaN was a missing value
+        self.seq += 1
+        payload["seq"] = self.seq
+        return payload
+
+    def _take(self, end):
+        payloads = [self._payload(i) for i in range(self._pos, end)]
+        self._pos = end
+        if payloads:
+            self._last_ts = payloads[-1]["ts"]
+            self.played += len(payloads)
+        return payloads
+
+    def _next_payloads(self, elapsed):
+        if self.speed is None:
+            room = min((sink.inbox.capacity - len(sink.inbox) for sink in self.sinks), default=0)
+            end = min(len(self._ts), self._pos + room)
+            self._clock = self._ts[max(0, end - 1)]
+        else:
+            self._clock += elapsed * self.speed
+            end = bisect.bisect_right(self._ts, self._clock, lo=self._pos)
+        return self._take(end)
+
+    def control(self, request):
+        """Handle a {"type": "replay"} message from a LAN client"""
+        if request.get("type") != "replay":
+            return super().control(request)
+        try:
+            if "speed" in request:
+                speed = request["speed"]
+                self.speed = None if speed in ("max", 0, None) else parse_speed(speed)
+            if "loop" in request:
+                self.loop = bool(request["loop"])
+            if "seek" in request:
+                self.seek(float(request["seek"]))
+        except (TypeError, ValueError) as e:
+            return {"type": "error", "msg": f"Bad replay request: {e}"}
+        return {
+            "type": "replay",
+            "position": self.position,
+            "duration": self.duration,
+            "speed": self.speed or "max",
+            "loop": self.loop,
+        }
+
+    def summary(self):
+        speed = f"{self.speed:g}x" if self.speed else "max speed"
+        return (f"Replay {self.position:.0f}/{self.duration:.0f} s at {speed}, "
+                f"{self.played} samples sent, {self.loops} loops")
+
+    async def run(self, sinks):
+        """Replay until the end of the recording (forever with loop)"""
+        self.sinks = list(sinks)
+        tasks = [asyncio.create_task(sink.run()) for sink in self.sinks]
+        pump = asyncio.create_task(self._pump())
+        try:
+            done, _ = await asyncio.wait([pump, *tasks], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()  # a sink failed (e.g. port in use)
+            await asyncio.sleep(DRAIN_GRACE)
+        finally:
+            for task in [pump, *tasks]:
+                task.cancel()
+            await asyncio.gather(pump, *tasks, return_exceptions=True)
+
+    async def _pump(self):
+        ticks = TickScheduler(self.hz)
+        last = time.monotonic()
+        while True:
+            now = time.monotonic()
+            payloads = self._next_payloads(now - last)
+            last = now
+            if payloads:
+                self.offer(payloads)
+
+            if self._pos >= len(self._ts):
+                if not self.loop:
+                    print(f"⏹ Replay finished: {self.played} samples sent")
+                    return
+                self.loops += 1
+                self.seek(0.0)
+
+            self.report(ticks)
+            await ticks.wait()
+
+def parse_speed(value):
+    if value == "max":
+        return None
+    speed = float(value)
+    if not speed > 0:
+        raise ValueError("speed must be positive or 'max'")
+    return speed
+
+async def main(args):
+    core = ReplayCore(args.recording, speed=args.speed, loop=args.loop, start=args.seek,
+                      runway=args.runway, runways=args.runways, maneuver=args.maneuver, skill=args.skill)
+    core.connect()
+    print(f"📼 {args.recording}: {len(core)} samples, {core.duration:.0f} s")
+
+    sinks = []
+    if args.cloud:
+        sinks.append(CloudSink(f"{args.url}?role=bridge&sessionId={args.cloud}", SEND_HZ,
+                               batch=SEND_HZ < REPLAY_HZ))
+    if args.local or not args.cloud:
+        sinks.append(LocalServerSink(SEND_HZ, REPLAY_HZ, HOST, args.port, on_control=core.control))
+        print(f"WebSocket server running on ws://127.0.0.1:{args.port}")
+    await core.run(sinks)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded flight as a live bridge")
+    parser.add_argument("recording", help="flight-*.flight file written by the bridge recorder")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="playback speed, e.g. 1, 10 or max")
+    parser.add_argument("--seek", type=float, default=0.0, help="start this many seconds into the flight")
+    parser.add_argument("--loop", action="store_true", help="start over at the end")
+    parser.add_argument("--local", action="store_true", help="serve LAN clients (default unless --cloud)")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--cloud", metavar="SESSION_ID", help="act as the bridge for this cloud session")
+    parser.add_argument("--url", default=CLOUD_WS_URL, help="cloud relay URL")
+    parser.add_argument("--runway", help="detect landing phases for this runway, e.g. 27 (KJKA) or auto")
+    parser.add_argument("--runways", metavar="PATH", help="runway database for --runway auto")
+    parser.add_argument("--maneuver", choices=MANEUVER_TYPES, help="track and grade this maneuver")
+    parser.add_argument("--skill", choices=SKILL_LEVELS, default=ACS, help="maneuver skill level")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        print("\nShutting down...")
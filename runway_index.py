@@ -0,0 +1,205 @@
+"""
+Runway database and spatial index
+Loads tens of thousands of runway ends and picks the runway an aircraft is
+lined up with, so the bridge can choose the landing runway by itself instead
+of it being set by hand (JKA runway 27, custom runways from calibration).
+
+Runway ends go into a grid of GRID_DEG cells keyed by latitude and
+longitude. A query only looks at the few cells within SEARCH_NM of the
+aircraft, then keeps the ends whose heading is within MAX_HEADING_DEV of the
+aircraft's and that it is approaching or rolling out on, so picking a runway
+on every sample costs a few microseconds rather than a scan of the database.
+
+Databases are CSV files in the OurAirports runways.csv layout (both ends of
+each runway, closed runways skipped) or JSON lists of dashboard runway
+objects ({"name", "heading", "threshold": {"lat", "lon", "elevation"},
+"oppositeEnd"}), such as exported custom runways. A runway end's threshold
+elevation, when the database has one, is used for height above the field
+in phase detection and for the glidepath channel:
+
+    python runway_index.py runways.csv 30.31 -87.65 270
+"""
+
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+
+from landing_phase import FT_PER_NM, JKA_ELEVATION, Runway, normalize_angle
+
+GRID_DEG = 0.25  # cell size; a few cells cover SEARCH_NM anywhere but the poles
+SEARCH_NM = 10.0  # runway ends further than this from the aircraft are ignored
+MAX_HEADING_DEV = 30.0  # same alignment limit as final approach detection
+MAX_LATERAL_FT = 0.5 * FT_PER_NM  # off the extended centerline
+DISTANCE_WEIGHT = 0.05  # cost per foot of distance, against a foot of lateral offset
+
+NM_PER_DEG_LAT = 60.0
+
+class RunwayEnd:
+    """One landing direction: threshold (and its elevation), the far end and the landing heading"""
+
+    __slots__ = ("name", "lat", "lon", "heading", "end_lat", "end_lon", "length", "width", "elevation", "_runway")
+
+    def __init__(self, name, lat, lon, heading, end_lat, end_lon, length=None, width=None, elevation=None):
+        self.name = name
+        self.lat = lat
+        self.lon = lon
+        self.heading = heading
+        self.end_lat = end_lat
+        self.end_lon = end_lon
+        self.length = length
+        self.width = width
+        self.elevation = elevation
+        self._runway = None
+
+    @property
+    def runway(self):
+        """The landing_phase Runway, built (with its frame) on first use"""
+        if self._runway is None:
+            elevation = self.elevation
+            self._runway = Runway((self.lat, self.lon), (self.end_lat, self.end_lon), self.heading,
+                                  name=self.name, length=self.length, width=self.width, elevation=elevation,
+                                  field_elevation=JKA_ELEVATION if elevation is None else elevation)
+        return self._runway
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _csv_ends(path):
+    """Runway ends from an OurAirports runways.csv"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("closed") == "1":
+                continue
+            le = (_float(row.get("le_latitude_deg")), _float(row.get("le_longitude_deg")))
+            he = (_float(row.get("he_latitude_deg")), _float(row.get("he_longitude_deg")))
+            if None in le or None in he or le == he:
+                continue
+            airport = row.get("airport_ident", "")
+            length = _float(row.get("length_ft"))
+            width = _float(row.get("width_ft"))
+            for (lat, lon), (end_lat, end_lon), ident, heading, elevation in (
+                    (le, he, row.get("le_ident"), _float(row.get("le_heading_degT")),
+                     _float(row.get("le_elevation_ft"))),
+                    (he, le, row.get("he_ident"), _float(row.get("he_heading_degT")),
+                     _float(row.get("he_elevation_ft")))):
+                yield RunwayEnd(f"{airport} {ident}".strip(), lat, lon, heading, end_lat, end_lon, length, width,
+                                elevation)
+
+def _json_ends(path):
+    """Runway ends from a JSON list of dashboard runway objects"""
+    with open(path, encoding="utf-8") as f:
+        runways = json.load(f)
+    for runway in runways:
+        data = runway.get("runway_data", runway)  # custom_runways rows wrap the runway
+        threshold = data["threshold"]
+        opposite_end = data["oppositeEnd"]
+        if (threshold["lat"], threshold["lon"]) == (opposite_end["lat"], opposite_end["lon"]):
+            continue  # no length, so no centerline
+        yield RunwayEnd(runway.get("runway_name") or data.get("name"), float(threshold["lat"]),
+                        float(threshold["lon"]), _float(data.get("heading")), float(opposite_end["lat"]),
+                        float(opposite_end["lon"]), data.get("length"), data.get("width"),
+                        _float(threshold.get("elevation")))
+
+def load_runways(path):
+    """RunwayIndex of every runway end in a CSV or JSON database"""
+    ends = _json_ends(path) if path.lower().endswith(".json") else _csv_ends(path)
+    return RunwayIndex(ends)
+
+class RunwayIndex:
+    """
+    Grid of runway ends. nearest_aligned(lat, lon, hdg) returns the end the
+    aircraft is best lined up with, or None.
+    """
+
+    def __init__(self, ends=()):
+        self.cells = {}
+        self.count = 0
+        for end in ends:
+            self.add(end)
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def _cell(lat, lon):
+        return (math.floor(lat / GRID_DEG), math.floor(lon / GRID_DEG))
+
+    def add(self, end):
+        if end.heading is None:
+            # A missing true heading: the direction from the threshold to the far end
+            end.heading = end.runway.centerline
+        self.cells.setdefault(self._cell(end.lat, end.lon), []).append(end)
+        self.count += 1
+
+    def near(self, lat, lon, radius_nm=SEARCH_NM):
+        """Runway ends in the cells that could hold one within radius_nm"""
+        d_lat = radius_nm / NM_PER_DEG_LAT
+        d_lon = d_lat / max(math.cos(math.radians(lat)), 0.01)
+        row0, col0 = self._cell(lat - d_lat, lon - d_lon)
+        row1, col1 = self._cell(lat + d_lat, lon + d_lon)
+        cells = self.cells
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                yield from cells.get((row, col), ())
+
+    def nearest_aligned(self, lat, lon, hdg, radius_nm=SEARCH_NM):
+        """
+        The runway end the aircraft is lined up with: heading within
+        MAX_HEADING_DEV of the runway's, within MAX_LATERAL_FT of its extended
+        centerline, and before the far end. The closest to the centerline
+        wins, with a small penalty for distance so a nearer airport's runway
+        beats one further down the same line.
+        """
+        best = None
+        best_cost = None
+        radius_ft = radius_nm * FT_PER_NM
+        for end in self.near(lat, lon, radius_nm):
+            if abs(normalize_angle(hdg - end.heading)) > MAX_HEADING_DEV:
+                continue
+            frame = end.runway.frame
+            east, north = frame.plane(lat, lon)
+            along_e, along_n = frame.along
+            lateral_ft = east * along_n - north * along_e
+            # Along the centerline from the threshold: negative on approach,
+            # up to the runway length during the rollout
+            along_ft = east * along_e + north * along_n
+            if abs(lateral_ft) > MAX_LATERAL_FT or along_ft > frame.length_ft:
+                continue
+            distance_ft = math.sqrt(east * east + north * north)
+            if distance_ft > radius_ft:
+                continue
+            cost = abs(lateral_ft) + DISTANCE_WEIGHT * distance_ft
+            if best_cost is None or cost < best_cost:
+                best = end
+                best_cost = cost
+        return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the runway an aircraft is lined up with")
+    parser.add_argument("database", help="OurAirports runways.csv or a JSON list of dashboard runways")
+    parser.add_argument("lat", type=float)
+    parser.add_argument("lon", type=float)
+    parser.add_argument("heading", type=float, help="true heading in degrees")
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    index = load_runways(args.database)
+    loaded = time.perf_counter()
+    end = index.nearest_aligned(args.lat, args.lon, args.heading)
+    found = time.perf_counter()
+    print(f"Loaded {len(index)} runway ends in {(loaded - began) * 1000:.0f} ms", file=sys.stderr)
+    print(f"Query took {(found - loaded) * 1e6:.0f} us", file=sys.stderr)
+    if end is None:
+        print("No aligned runway")
+        return 1
+    print(json.dumps(end.runway.to_dict()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,435 @@
+"""
+SimConnect sampling engine
+Registers every telemetry SimVar once as a single data definition and
+receives them together in one struct, instead of one request per variable.
+"""
+
+import collections
+import ctypes
+import math
+import threading
+import time
+
+from pipeline_metrics import METRICS
+from tick_scheduler import TickScheduler
+
+# SimVars sent to the dashboard, in data definition order
+TELEMETRY_VARS = (
+    "PLANE_LATITUDE",
+    "PLANE_LONGITUDE",
+    "PLANE_ALTITUDE",
+    "PLANE_ALT_ABOVE_GROUND",
+    "AIRSPEED_INDICATED",
+    "VERTICAL_SPEED",
+    "PLANE_HEADING_DEGREES_TRUE",
+    "SIM_ON_GROUND",
+    "PLANE_PITCH_DEGREES",
+    "PLANE_BANK_DEGREES",
+    "ROTATION_VELOCITY_BODY_X",
+    "ROTATION_VELOCITY_BODY_Y",
+    "ROTATION_VELOCITY_BODY_Z",
+    "G_FORCE",
+)
+
+# SimConnect constants (see SimConnect.h)
+SIMCONNECT_OBJECT_ID_USER = 0
+SIMCONNECT_UNUSED = 0xFFFFFFFF
+SIMCONNECT_DATATYPE_FLOAT64 = 4
+SIMCONNECT_PERIOD_NEVER = 0
+SIMCONNECT_PERIOD_SIM_FRAME = 3
+SIMCONNECT_PERIOD_SECOND = 4
+SIMCONNECT_DATA_REQUEST_FLAG_DEFAULT = 0
+
+# Fall back to per-variable polling if no frame arrived for this long
+STALE_AFTER = 1.0
+
+# Client event IDs for the pause and flight state system events, clear of
+# the SimConnect package's own (0-3)
+PAUSE_EVENT_ID = 0x4D50
+SIM_EVENT_ID = 0x4D51
+
+# While paused or in the menus, send one sample this often instead of
+# sampling at the normal rate
+HEARTBEAT_SECONDS = 5.0
+
+# After unpausing, wait this long for a fresh data frame before sampling
+RESUME_FRAME_WAIT = 0.1
+
+# Samples held between the sampler thread and the async senders
+RING_CAPACITY = 256
+
+def safe_get(aq, var_name: str):
+    try:
+        return aq.get(var_name)
+    except Exception:
+        return None
+
+def rad_to_deg(x):
+    if x is None:
+        return None
+    try:
+        return float(x) * 180.0 / math.pi
+    except Exception:
+        return None
+
+def poll_simvars(aq, names=TELEMETRY_VARS):
+    """Read each SimVar with its own request (the old per-tick path)"""
+    return {name: safe_get(aq, name) for name in names}
+
+def build_payload(values, ts, seq=None):
+    """Convert one sample of raw SimVar values into the dashboard payload"""
+    pitch_rad = values.get("PLANE_PITCH_DEGREES")
+    bank_rad = values.get("PLANE_BANK_DEGREES")
+    bank_deg = rad_to_deg(bank_rad)
+
+    payload = {
+        "ts": ts,
+
+        "lat": values.get("PLANE_LATITUDE"),
+        "lon": values.get("PLANE_LONGITUDE"),
+        "alt_ft": values.get("PLANE_ALTITUDE"),
+        "agl_ft": values.get("PLANE_ALT_ABOVE_GROUND"),
+        "ias_kt": values.get("AIRSPEED_INDICATED"),
+        "vs_fpm": values.get("VERTICAL_SPEED"),
+        "on_ground": values.get("SIM_ON_GROUND"),
+
+        # Debug: raw values (usually radians)
+        "pitch_raw": pitch_rad,
+        "bank_raw": bank_rad,
+
+        # UI values: degrees
+        "pitch_deg": rad_to_deg(pitch_rad),
+        "bank_deg": -bank_deg if bank_deg is not None else None,
+
+        # Rotation rates (deg/s) - for maneuver detection. SimConnect's body
+        # axes are X pitch, Y yaw, Z roll (as adaptive_rate reads them)
+        "roll_rate": rad_to_deg(values.get("ROTATION_VELOCITY_BODY_Z")),
+        "pitch_rate": rad_to_deg(values.get("ROTATION_VELOCITY_BODY_X")),
+        "yaw_rate": rad_to_deg(values.get("ROTATION_VELOCITY_BODY_Y")),
+
+        # G-force
+        "g_force": values.get("G_FORCE"),
+    }
+
+    hdg_deg = rad_to_deg(values.get("PLANE_HEADING_DEGREES_TRUE"))
+    if hdg_deg is not None:
+        hdg_deg = hdg_deg % 360
+    payload["hdg_true"] = hdg_deg
+
+    if seq is not None:
+        payload["seq"] = seq
+
+    return payload
+
+def sample_payloads(samples, timings=False):
+    """
+    Payloads for (seq, capture_time, values, read_seconds, events) samples
+    drained from a SampleRing. events (or None) is merged into the
+    payload: "rate": {"hz", "from", "reason"} on the first sample at a new
+    adaptive rate, "sim": "paused" / "menu" / "running" on heartbeats and
+    the first sample after resuming. With timings, each payload also
+    carries "timing": {"wall": capture time as Unix time (comparable
+    across machines), "read_ms": SimConnect read, "convert_ms": this
+    conversion}.
+    """
+    payloads = []
+    wall_offset = time.time() - time.monotonic()
+    for seq, captured, values, read_seconds, events in samples:
+        start = time.perf_counter()
+        payload = build_payload(values, captured, seq)
+        convert_seconds = time.perf_counter() - start
+        METRICS.observe("convert", convert_seconds)
+        if events:
+            payload.update(events)
+        if timings:
+            payload["timing"] = {
+                "wall": captured + wall_offset,
+                "read_ms": read_seconds * 1000.0,
+                "convert_ms": convert_seconds * 1000.0,
+            }
+        payloads.append(payload)
+    return payloads
+
+class SimVarBatch:
+    """
+    One SimConnect data definition holding all telemetry SimVars.
+
+    SimConnect pushes the whole struct every sim frame (or every second),
+    and read() returns the latest one without a round trip. Units come from
+    the AircraftRequests definitions so values match the polled path.
+    """
+
+    def __init__(self, sm, aq, names=TELEMETRY_VARS, period="sim_frame", interval=0):
+        self.sm = sm
+        self.aq = aq
+        self.names = tuple(names)
+        self.period = SIMCONNECT_PERIOD_SECOND if period == "second" else SIMCONNECT_PERIOD_SIM_FRAME
+        self.interval = interval  # periods to skip between frames
+        self.frames = 0
+        self.polls = 0
+        self._latest = None  # (perf_counter time, tuple of values)
+        self._fresh = threading.Event()  # set by every frame
+        self._definition_id = None
+        self._request_id = None
+
+    def start(self):
+        """Register the data definition and subscribe to periodic frames"""
+        sm = self.sm
+        self._definition_id = sm.new_def_id()
+        self._request_id = sm.new_request_id()
+
+        for name in self.names:
+            datum, units = self.aq.find(name).definitions[0]
+            sm.dll.AddToDataDefinition(
+                sm.hSimConnect, self._definition_id.value, datum, units,
+                SIMCONNECT_DATATYPE_FLOAT64, 0, SIMCONNECT_UNUSED,
+            )
+
+        # Route our frames here, everything else to the library as before
+        library_handler = sm.handle_simobject_event
+
+        def handle_simobject_event(obj):
+            if obj.dwRequestID == self._request_id.value:
+                self._on_frame(obj)
+            else:
+                library_handler(obj)
+
+        sm.handle_simobject_event = handle_simobject_event
+        self._request(self.period)
+
+    def _request(self, period):
+        self.sm.dll.RequestDataOnSimObject(
+            self.sm.hSimConnect, self._request_id.value, self._definition_id.value,
+            SIMCONNECT_OBJECT_ID_USER, period,
+            SIMCONNECT_DATA_REQUEST_FLAG_DEFAULT, 0, self.interval, 0,
+        )
+
+    def pause(self):
+        """Stop the periodic frames (sim paused or in the menus)"""
+        self._request(SIMCONNECT_PERIOD_NEVER)
+
+    def resume(self, timeout=RESUME_FRAME_WAIT):
+        """Restart the periodic frames and wait up to timeout for the first one"""
+        self._fresh.clear()
+        self._request(self.period)
+        self._fresh.wait(timeout)
+
+    def _on_frame(self, obj):
+        # Runs on the SimConnect dispatch thread
+        data = ctypes.cast(obj.dwData, ctypes.POINTER(ctypes.c_double * len(self.names))).contents
+        self._latest = (time.perf_counter(), tuple(data))
+        self.frames += 1
+        self._fresh.set()
+
+    def latest(self):
+        """Return (capture_time, values dict) of the newest frame, or None"""
+        latest = self._latest
+        if latest is None:
+            return None
+        captured, data = latest
+        return captured, dict(zip(self.names, data))
+
+    def read(self):
+        """Latest frame values, polling per variable if frames have stopped"""
+        latest = self.latest()
+        if latest is not None and time.perf_counter() - latest[0] < STALE_AFTER:
+            return latest[1]
+        self.polls += 1
+        return poll_simvars(self.aq, self.names)
+
+class SimStateWatcher:
+    """
+    Tracks whether a flight is running and unpaused.
+
+    Subscribes to the Pause_EX1 system event (any pause: full, active or
+    sim pause, including the ESC menu) and the Sim event (0 in the main
+    menu and loading screens). Events arrive on the SimConnect dispatch
+    thread; `changed` is set on every change so the sampler wakes at once.
+    """
+
+    def __init__(self, sm):
+        self.sm = sm
+        self.paused = False
+        self.running = True  # until the sim says otherwise
+        self.changes = 0
+        self.changed = threading.Event()
+        self._request_id = None
+
+    def start(self):
+        sm = self.sm
+        self._request_id = sm.new_request_id()
+
+        # Route our events here, everything else to the library as before
+        library_event_handler = sm.handle_id_event
+        library_state_handler = sm.handle_state_event
+
+        def handle_id_event(event):
+            if event.uEventID == PAUSE_EVENT_ID:
+                self._set(paused=event.dwData != 0)
+            elif event.uEventID == SIM_EVENT_ID:
+                self._set(running=event.dwData != 0)
+            else:
+                library_event_handler(event)
+
+        def handle_state_event(state):
+            if state.dwRequestID == self._request_id.value:
+                self._set(running=state.dwInteger != 0)
+            else:
+                library_state_handler(state)
+
+        sm.handle_id_event = handle_id_event
+        sm.handle_state_event = handle_state_event
+
+        sm.dll.SubscribeToSystemEvent(sm.hSimConnect, PAUSE_EVENT_ID, b"Pause_EX1")
+        sm.dll.SubscribeToSystemEvent(sm.hSimConnect, SIM_EVENT_ID, b"Sim")
+        # Events only report changes; ask for the current flight state once
+        sm.dll.RequestSystemState(sm.hSimConnect, self._request_id.value, b"Sim")
+
+    def _set(self, paused=None, running=None):
+        old = self.state
+        if paused is not None:
+            self.paused = paused
+        if running is not None:
+            self.running = running
+        if self.state != old:
+            self.changes += 1
+            self.changed.set()
+
+    @property
+    def idle(self):
+        return self.paused or not self.running
+
+    @property
+    def state(self):
+        if not self.running:
+            return "menu"
+        return "paused" if self.paused else "running"
+
+class SampleRing:
+    """
+    Bounded buffer of (seq, capture_time, values, read_seconds, events)
+    samples between threads; events is None or the dict of sample events
+    (adaptive rate change, sim state) to merge into the payload.
+
+    Backed by a deque with maxlen, so push and drain are atomic without a
+    lock and a full buffer drops its oldest sample. Drops are counted.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self._samples = collections.deque(maxlen=capacity)
+        self.capacity = capacity
+        self.pushed = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._samples)
+
+    def push(self, sample):
+        if len(self._samples) >= self.capacity:
+            self.dropped += 1
+        self._samples.append(sample)
+        self.pushed += 1
+
+    def drain(self):
+        """Remove and return every buffered sample, oldest first"""
+        samples = []
+        while True:
+            try:
+                samples.append(self._samples.popleft())
+            except IndexError:
+                return samples
+
+    def latest(self):
+        try:
+            return self._samples[-1]
+        except IndexError:
+            return None
+
+class SamplerThread(threading.Thread):
+    """
+    Reads SimConnect at a fixed or adaptive rate off the asyncio event loop.
+
+    Blocking reads (including the per-variable polling fallback) happen
+    here, so websocket pings, receives and sends never wait on the sim.
+    Capture times use time.monotonic(), the same clock as the event loop,
+    and every sample gets the next sequence number so receivers can spot
+    gaps and merge backfilled samples. With a RateController the thread
+    retimes itself to the rate it picks after each sample. With a
+    SimStateWatcher it stops reading while the sim is paused or in the
+    menus and only pushes a heartbeat (the last values again) every
+    HEARTBEAT_SECONDS, until the sim resumes.
+    """
+
+    def __init__(self, source, hz, ring=None, rate=None, sim_state=None,
+                 heartbeat=HEARTBEAT_SECONDS):
+        super().__init__(name="simconnect-sampler", daemon=True)
+        self.source = source
+        self.rate = rate
+        self.sim_state = sim_state
+        self.heartbeat = heartbeat
+        self.heartbeats = 0
+        self._values = {}
+        self.scheduler = TickScheduler(rate.hz if rate is not None else hz)
+        self.ring = ring if ring is not None else SampleRing()
+        self.errors = 0
+        self.seq = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self.scheduler.wait_blocking(self._stop_event):
+            events = None
+            if self.sim_state is not None and self.sim_state.idle:
+                self._idle()
+                if self._stop_event.is_set():
+                    return
+                self.scheduler.restart()  # no skipped ticks for the pause
+                events = {"sim": "running"}
+            try:
+                start = time.perf_counter()
+                values = self.source.read()
+                read_seconds = time.perf_counter() - start
+                METRICS.observe("read", read_seconds)
+                captured = time.monotonic()
+                if self.rate is not None:
+                    change = self.rate.update(values, captured)
+                    if change is not None:
+                        self.scheduler.set_hz(change["hz"])
+                        events = {**(events or {}), "rate": change}
+                self._values = values
+                self._push(captured, values, read_seconds, events)
+            except Exception:
+                self.errors += 1
+
+    def _push(self, captured, values, read_seconds, events):
+        self.seq += 1
+        self.ring.push((self.seq, captured, values, read_seconds, events))
+
+    def _idle(self):
+        """Heartbeats only until the sim is running and unpaused again"""
+        state = self.sim_state
+        pause = getattr(self.source, "pause", None)
+        if pause is not None:
+            pause()
+        while not self._stop_event.is_set():
+            state.changed.clear()
+            if not state.idle:
+                break
+            self.heartbeats += 1
+            self._push(time.monotonic(), self._values, 0.0, {"sim": state.state})
+            state.changed.wait(self.heartbeat)
+        resume = getattr(self.source, "resume", None)
+        if resume is not None:
+            resume()
+
+    def stop(self):
+        self._stop_event.set()
+        if self.sim_state is not None:
+            self.sim_state.changed.set()
+
+    def summary(self):
+        summary = f"Sampling {self.scheduler.summary()}, {self.ring.dropped} dropped"
+        if self.rate is not None:
+            summary += f", {self.rate.summary()}"
+        if self.sim_state is not None and self.sim_state.idle:
+            summary += f", sim {self.sim_state.state} ({self.heartbeats} heartbeats)"
+        return summary
@@ -0,0 +1,282 @@
+"""
+Telemetry stream encoding
+Shared by the LAN server and the cloud bridges so every wire format is
+produced in one place.
+
+Binary format (subprotocol "msfs-telemetry.bin.v2"): the server first sends a
+JSON {"type": "schema"} message describing the record layout, then one binary
+message per sample, little-endian, with no padding:
+
+    uint32 seq | uint32 null bitmap | float64 ts | one value per schema field
+
+Bit i of the bitmap is set when field i is null (its value is then NaN).
+v2 added agl_ft after alt_ft, moving every later field; a decoder with the
+v1 layout built in would misread it, so the subprotocol name changed with it.
+
+Backfill: samples recorded while the cloud link was down are sent later as
+{"type": "backfill", "samples": [...]}, always full JSON payloads, to be
+merged by seq rather than treated as the current state.
+
+Batching: several samples can share one message. JSON batches are
+{"type": "batch", "samples": [...]}, oldest first; binary batches are
+records concatenated back to back (split by the schema "size").
+"""
+
+import json
+import math
+import struct
+import time
+
+from landing_phase import RUNWAY_CHANNELS
+
+# Delta mode: smallest change worth sending per field. Fields not listed
+# (on_ground) are sent on any change; ts and seq are always sent.
+DELTA_EPSILON = {
+    "lat": 1e-6,          # ~0.1 m
+    "lon": 1e-6,
+    "alt_ft": 0.5,
+    "agl_ft": 0.5,
+    "ias_kt": 0.1,
+    "vs_fpm": 5.0,
+    "pitch_raw": 0.0005,  # radians
+    "bank_raw": 0.0005,
+    "pitch_deg": 0.03,
+    "bank_deg": 0.03,
+    "roll_rate": 0.05,    # deg/s
+    "pitch_rate": 0.05,
+    "yaw_rate": 0.05,
+    "g_force": 0.005,
+    "hdg_true": 0.03,
+    "rwy_dist_nm": 0.001,
+    "rwy_lateral_ft": 1.0,
+    "gp_dev_ft": 1.0,
+}
+
+ALWAYS_SENT = ("ts", "seq")
+
+# Delta mode: send a full keyframe at least this often
+KEYFRAME_EVERY_TICKS = 30
+KEYFRAME_EVERY_SECONDS = 2.0
+
+# Binary mode: subprotocol name and field layout. Values are float32, except
+# lat/lon which need float64 to stay under a metre of error.
+BINARY_SUBPROTOCOL = "msfs-telemetry.bin.v2"
+BINARY_HEADER = (("seq", "I"), ("nulls", "I"), ("ts", "d"))
+BINARY_FIELDS = (
+    ("lat", "d"),
+    ("lon", "d"),
+    ("alt_ft", "f"),
+    ("agl_ft", "f"),
+    ("ias_kt", "f"),
+    ("vs_fpm", "f"),
+    ("on_ground", "f"),
+    ("pitch_raw", "f"),
+    ("bank_raw", "f"),
+    ("pitch_deg", "f"),
+    ("bank_deg", "f"),
+    ("roll_rate", "f"),
+    ("pitch_rate", "f"),
+    ("yaw_rate", "f"),
+    ("g_force", "f"),
+    ("hdg_true", "f"),
+)
+
+# Sampled payload fields (ts and seq always come along)
+PAYLOAD_FIELDS = tuple(name for name, _ in BINARY_FIELDS)
+
+# Fields a client can subscribe to: the sampled ones plus the runway
+# channels added while a landing runway is selected (JSON only)
+SUBSCRIBABLE_FIELDS = PAYLOAD_FIELDS + RUNWAY_CHANNELS
+
+# Subscription rate limit: a sample up to this fraction of the interval early
+# still counts, so asking for the sampling rate itself doesn't halve it
+RATE_TOLERANCE = 0.25
+
+# Annotations that ride on a single sample (adaptive rate changes, sim
+# paused / menu / running, landing phase changes, maneuver events). JSON
+# only; kept through field subsets, and a sample carrying one is never
+# thinned out by a rate limit.
+SAMPLE_EVENTS = ("rate", "sim", "landing", "maneuver")
+
+def changed(old, new, epsilon):
+    if old is None or new is None:
+        return old is not new
+    if epsilon is None or isinstance(new, bool):
+        return old != new
+    try:
+        return abs(new - old) > epsilon
+    except TypeError:
+        return old != new
+
+class DeltaEncoder:
+    """
+    Turns full payloads into keyframes and deltas.
+
+    A keyframe is the full payload with "frame": "key". In between, a delta
+    ("frame": "delta") carries ts, seq and only the fields that moved more than
+    their epsilon since the value clients last received, so slow drift is
+    still sent once it adds up. Clients merge deltas onto the last keyframe.
+    """
+
+    def __init__(self, keyframe_ticks=KEYFRAME_EVERY_TICKS,
+                 keyframe_seconds=KEYFRAME_EVERY_SECONDS, epsilon=None):
+        self.keyframe_ticks = keyframe_ticks
+        self.keyframe_seconds = keyframe_seconds
+        self.epsilon = DELTA_EPSILON if epsilon is None else epsilon
+        self.keyframes = 0
+        self.deltas = 0
+        self._sent = None  # field values as clients currently see them
+        self._ticks_since_key = 0
+        self._key_time = 0.0
+
+    def force_keyframe(self):
+        """Make the next encode() a keyframe (new client, reconnect)"""
+        self._sent = None
+
+    def encode(self, payload):
+        now = time.monotonic()
+        self._ticks_since_key += 1
+        if (self._sent is None
+                or self._ticks_since_key >= self.keyframe_ticks
+                or now - self._key_time >= self.keyframe_seconds):
+            # Events belong to this sample only; never remembered or resent
+            self._sent = {k: v for k, v in payload.items() if k not in SAMPLE_EVENTS}
+            self._ticks_since_key = 0
+            self._key_time = now
+            self.keyframes += 1
+            return {**payload, "frame": "key"}
+
+        message = {"frame": "delta"}
+        sent = self._sent
+        for field, value in payload.items():
+            if field in SAMPLE_EVENTS:
+                message[field] = value  # never compared against earlier samples
+                continue
+            if (field in ALWAYS_SENT or field not in sent
+                    or changed(sent[field], value, self.epsilon.get(field))):
+                message[field] = value
+                sent[field] = value
+        self.deltas += 1
+        return message
+
+class BinaryEncoder:
+    """
+    Packs payloads into fixed-layout binary records.
+
+    Send schema() once (as JSON) when a client connects, then encode() for
+    every sample. The header carries the payload's seq, or a counter of this
+    encoder's frames if the payload has none.
+    """
+
+    def __init__(self, fields=BINARY_FIELDS):
+        self.fields = tuple(fields)
+        if len(self.fields) > 32:
+            raise ValueError("Binary frames support at most 32 fields")
+        self._struct = struct.Struct("<" + "".join(t for _, t in BINARY_HEADER + self.fields))
+        self.seq = 0
+
+    @property
+    def size(self):
+        return self._struct.size
+
+    def schema(self):
+        return {
+            "type": "schema",
+            "format": BINARY_SUBPROTOCOL,
+            "byte_order": "little",
+            "header": [list(f) for f in BINARY_HEADER],
+            "fields": [list(f) for f in self.fields],
+            "size": self._struct.size,
+        }
+
+    def encode(self, payload):
+        nulls = 0
+        values = []
+        for i, (name, _) in enumerate(self.fields):
+            value = payload.get(name)
+            if value is None:
+                nulls |= 1 << i
+                value = math.nan
+            values.append(float(value))
+        seq = payload.get("seq")
+        if seq is None:
+            self.seq += 1
+            seq = self.seq
+        ts = payload.get("ts")
+        return self._struct.pack(seq & 0xFFFFFFFF, nulls, math.nan if ts is None else float(ts), *values)
+
+def decode_binary(schema, data):
+    """Unpack one binary record back into a payload dict (tools and replay)"""
+    header = [tuple(f) for f in schema["header"]]
+    fields = [tuple(f) for f in schema["fields"]]
+    record = struct.unpack("<" + "".join(t for _, t in header + fields), data)
+    seq, nulls, ts = record[:3]
+    payload = {"seq": seq, "ts": ts}
+    for i, (name, _) in enumerate(fields):
+        payload[name] = None if nulls >> i & 1 else record[3 + i]
+    return payload
+
+def backfill_message(payloads):
+    return json.dumps({"type": "backfill", "samples": payloads})
+
+class StreamEncoder:
+    """
+    Turns sample payloads into wire messages for one client format.
+
+    wire_format is "json" or "binary"; delta applies to JSON only. With
+    batch, all payloads passed to one encode() call go into a single
+    message, otherwise each payload is its own message. fields limits
+    payloads to a subset of SUBSCRIBABLE_FIELDS and max_hz thins samples to at
+    most that rate. Messages are serialized once and can be sent to every
+    client using this format.
+    """
+
+    def __init__(self, wire_format="json", delta=False, batch=False, fields=None, max_hz=None):
+        self.fields = tuple(f for f in SUBSCRIBABLE_FIELDS if f in fields) if fields else None
+        binary_fields = BINARY_FIELDS
+        if self.fields is not None:
+            binary_fields = tuple(f for f in BINARY_FIELDS if f[0] in self.fields)
+        self.binary = BinaryEncoder(binary_fields) if wire_format == "binary" else None
+        self.delta = DeltaEncoder() if delta and self.binary is None else None
+        self.batch = batch
+        self.min_interval = 1.0 / max_hz if max_hz else 0.0
+        self._next_due = None
+
+    def start_messages(self):
+        """Messages a newly connected client needs before its first frame"""
+        if self.delta is not None:
+            self.delta.force_keyframe()
+        if self.binary is not None:
+            return [json.dumps(self.binary.schema())]
+        return []
+
+    def select(self, payloads):
+        """Apply the rate limit and field subset"""
+        selected = []
+        for payload in payloads:
+            if self.min_interval:
+                ts = payload.get("ts") or 0.0
+                if self._next_due is not None and ts < self._next_due - self.min_interval * RATE_TOLERANCE:
+                    if not any(k in payload for k in SAMPLE_EVENTS):
+                        continue
+                else:
+                    if self._next_due is None or ts - self._next_due > self.min_interval:
+                        self._next_due = ts  # first sample, or fell behind: restart the schedule
+                    self._next_due += self.min_interval
+            if self.fields is not None:
+                payload = {k: payload[k] for k in ALWAYS_SENT + self.fields + SAMPLE_EVENTS if k in payload}
+            selected.append(payload)
+        return selected
+
+    def encode(self, payloads):
+        payloads = self.select(payloads)
+        if not payloads:
+            return []
+        if self.binary is not None:
+            frames = [self.binary.encode(p) for p in payloads]
+            return [b"".join(frames)] if self.batch else frames
+        if self.delta is not None:
+            payloads = [self.delta.encode(p) for p in payloads]
+        if self.batch:
+            return [json.dumps({"type": "batch", "samples": payloads})]
+        return [json.dumps(p) for p in payloads]
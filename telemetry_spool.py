@@ -0,0 +1,117 @@
+"""
+Disk spool for telemetry recorded while the cloud connection is down
+Samples are appended to size-capped segment files and drained oldest first
+after reconnect, behind the live stream, so an outage on short final does
+not lose the approach.
+"""
+
+import asyncio
+import json
+import os
+
+SPOOL_DIR = "telemetry-spool"
+SPOOL_MAX_BYTES = 64 * 1024 * 1024  # oldest samples are dropped beyond this
+SEGMENT_BYTES = 1024 * 1024
+
+# Backfill drain rate after reconnect (samples per second)
+BACKFILL_RATE = 120
+
+class TelemetrySpool:
+    """
+    Bounded, append-only on-disk queue of payloads.
+
+    Payloads are written as JSON lines into segment files of about
+    SEGMENT_BYTES. When the spool grows past max_bytes the oldest segment is
+    deleted and its unread samples are counted as dropped. read() loads the
+    oldest closed segment into memory, deletes it, and hands out its samples.
+    The spool starts empty; sequence numbers from an earlier run would not
+    merge with the current one.
+    """
+
+    def __init__(self, directory=SPOOL_DIR, max_bytes=SPOOL_MAX_BYTES, segment_bytes=SEGMENT_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.pending = 0
+        self.dropped = 0
+        self._segments = []  # [path, lines, bytes], oldest first; last one is being written
+        self._next_segment = 0
+        self._file = None
+        self._reading = []
+        self._read_index = 0
+
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".jsonl"):
+                os.remove(os.path.join(directory, name))
+
+    def _open_segment(self):
+        self._next_segment += 1
+        path = os.path.join(self.directory, f"spool-{self._next_segment:06d}.jsonl")
+        self._file = open(path, "a", encoding="utf-8")
+        self._segments.append([path, 0, 0])
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, payloads):
+        if not payloads:
+            return
+        if self._file is None:
+            self._open_segment()
+
+        data = "".join(json.dumps(p) + "\n" for p in payloads)
+        self._file.write(data)
+        self._file.flush()
+        segment = self._segments[-1]
+        segment[1] += len(payloads)
+        segment[2] += len(data)
+        self.pending += len(payloads)
+
+        if segment[2] >= self.segment_bytes:
+            self._close_segment()
+
+        # Enforce the size cap by dropping the oldest closed segments
+        while sum(s[2] for s in self._segments) > self.max_bytes and len(self._segments) > 1:
+            path, lines, _ = self._segments.pop(0)
+            os.remove(path)
+            self.pending -= lines
+            self.dropped += lines
+
+    def _load_oldest(self):
+        if not self._segments:
+            return False
+        if self._file is not None and len(self._segments) == 1:
+            self._close_segment()  # reading caught up with the writer
+
+        path, _, _ = self._segments.pop(0)
+        with open(path, encoding="utf-8") as f:
+            self._reading = [json.loads(line) for line in f if line.strip()]
+        self._read_index = 0
+        os.remove(path)
+        return True
+
+    def read(self, limit):
+        """Remove and return up to `limit` spooled payloads, oldest first"""
+        out = []
+        while len(out) < limit:
+            if self._read_index >= len(self._reading):
+                if not self._load_oldest():
+                    break
+                continue
+            take = self._reading[self._read_index:self._read_index + limit - len(out)]
+            self._read_index += len(take)
+            out.extend(take)
+        self.pending -= len(out)
+        return out
+
+    def close(self):
+        self._close_segment()
+
+async def spool_payloads(inbox, spool, interval=0.25):
+    """Move payloads from a sink's inbox into the spool until cancelled"""
+    while True:
+        spool.append(inbox.drain())
+        await asyncio.sleep(interval)
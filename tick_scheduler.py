@@ -0,0 +1,113 @@
+"""
+Fixed-rate tick scheduler
+Targets absolute tick deadlines so the achieved rate matches HZ no matter how
+long each tick's work takes, and keeps jitter statistics for reporting.
+"""
+
+import asyncio
+import collections
+import time
+
+# Number of recent ticks used for rate and jitter statistics
+STATS_WINDOW = 512
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class TickScheduler:
+    """
+    Deadline-based scheduler for a loop that should run at `hz`.
+
+    Each tick is due at start + n * interval. A late tick runs immediately;
+    if whole intervals were missed they are skipped (and counted) instead of
+    bursting to catch up. Jitter is how late each tick woke past its deadline.
+    """
+
+    def __init__(self, hz, window=STATS_WINDOW, clock=time.monotonic):
+        self.hz = hz
+        self.interval = 1.0 / max(1, hz)
+        self.clock = clock
+        self.ticks = 0
+        self.skipped = 0
+        self._deadline = None
+        self._tick_times = collections.deque(maxlen=window)
+        self._jitter = collections.deque(maxlen=window)
+
+    def reset(self):
+        """Start a fresh schedule (e.g. after a reconnect) without skipping"""
+        self._deadline = None
+
+    def restart(self):
+        """Continue the schedule from now after a deliberate pause, without skipping"""
+        self._deadline = self.clock()
+
+    def set_hz(self, hz):
+        """Change the rate from the next tick on (the adaptive sampler)"""
+        self.hz = hz
+        self.interval = 1.0 / max(1, hz)
+
+    def _delay(self):
+        now = self.clock()
+        if self._deadline is None:
+            self._deadline = now
+            return 0.0
+
+        self._deadline += self.interval
+        if now >= self._deadline + self.interval:
+            missed = int((now - self._deadline) / self.interval)
+            self.skipped += missed
+            self._deadline += missed * self.interval
+        return max(0.0, self._deadline - now)
+
+    def _record(self):
+        now = self.clock()
+        self._jitter.append(now - self._deadline)
+        self._tick_times.append(now)
+        self.ticks += 1
+
+    async def wait(self):
+        """Sleep until the next tick deadline (asyncio loops)"""
+        await asyncio.sleep(self._delay())
+        self._record()
+
+    def wait_blocking(self, stop_event=None):
+        """Sleep until the next tick deadline (threads). True if stopped."""
+        delay = self._delay()
+        if stop_event is not None:
+            if stop_event.wait(delay):
+                return True
+        elif delay > 0:
+            time.sleep(delay)
+        self._record()
+        return False
+
+    def achieved_hz(self):
+        times = self._tick_times
+        if len(times) < 2 or times[-1] <= times[0]:
+            return None
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def stats(self):
+        jitter = sorted(self._jitter)
+        p50 = percentile(jitter, 0.50)
+        p99 = percentile(jitter, 0.99)
+        return {
+            "target_hz": self.hz,
+            "achieved_hz": self.achieved_hz(),
+            "jitter_p50_ms": p50 * 1000.0 if p50 is not None else None,
+            "jitter_p99_ms": p99 * 1000.0 if p99 is not None else None,
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+        }
+
+    def summary(self):
+        s = self.stats()
+        if s["achieved_hz"] is None:
+            return f"target {self.hz} Hz, not enough ticks yet"
+        return (f"{s['achieved_hz']:.1f}/{self.hz} Hz, "
+                f"jitter p50 {s['jitter_p50_ms']:.1f} ms p99 {s['jitter_p99_ms']:.1f} ms, "
+                f"{s['skipped']} skipped")